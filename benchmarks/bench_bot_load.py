@@ -0,0 +1,459 @@
+"""
+bench_bot_load.py
+
+Load test harness for the discord bot. It drives the real commands.Bot from
+main.py with synthetic discord.Message objects dispatched the same way the
+gateway dispatches them, at a fixed rate and in a mix of $play, $queue,
+$skip and $chest commands and outplayed.tv links. Everything that leaves the
+process is stubbed: the discord HTTP API, voice connections and audio,
+fetch_song (or only yt_dlp underneath it with --fetch-mode yt_dlp), the Riot
+web page and the stages of the clip jobs. Reports the
+latency percentiles of every command, the errors they raised and the lag of
+the event loop.
+
+Usage:
+    python -m benchmarks.bench_bot_load [--rate 2000] [--seconds 5]
+        [--guilds 1] [--users 50] [--fetch-mode stub] [--output results.json]
+
+Attributes:
+    TAQUITOBOT_FOLDER (str): The folder main.py is run from, its packages
+        are imported relative to it.
+    COMMAND_MIX (dict[str, float]): The share of the messages sent of every
+        kind.
+    CHEST_PAGE (str): The championmastery.gg page served to $chest.
+    LAG_INTERVAL (float): How often in seconds the event loop lag is sampled.
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+import discord
+
+TAQUITOBOT_FOLDER = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "taquitobot")
+COMMAND_MIX = {"play": 0.3, "queue": 0.3, "skip": 0.15, "chest": 0.15,
+               "outplayed": 0.1}
+CHEST_PAGE = "<table><tr><td>Ahri</td><td class='chest notEarned'></td></tr>" \
+             "</table>"
+LAG_INTERVAL = 0.005
+
+sys.path.insert(0, TAQUITOBOT_FOLDER)
+import main as bot_main  # noqa: E402
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """
+    Summarises samples in milliseconds with the nearest rank percentiles.
+    """
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    summary = {"count": len(ordered)}
+    for quantile in (0.5, 0.95, 0.99):
+        rank = max(1, math.ceil(quantile * len(ordered)))
+        summary[f"p{round(quantile * 100)}_ms"] = ordered[rank - 1] * 1000
+    summary["max_ms"] = ordered[-1] * 1000
+    return summary
+
+
+class FakeVoiceClient:
+    """
+    Stands in for a discord.VoiceClient with the same public methods. Audio
+    "plays" for song_length seconds before the after callback is called.
+    """
+
+    def __init__(self, channel: discord.VoiceChannel,
+                 song_length: float) -> None:
+        self.channel = channel
+        self.guild = channel.guild
+        self._song_length = song_length
+        self._playing = None
+        self._after = None
+        self._paused = False
+
+    def is_playing(self) -> bool:
+        return self._playing is not None and not self._paused
+
+    def is_paused(self) -> bool:
+        return self._playing is not None and self._paused
+
+    def play(self, source, *, after=None) -> None:
+        if self._playing is not None:
+            raise discord.ClientException("Already playing audio.")
+        self._paused = False
+        self._after = after
+        self._playing = asyncio.get_running_loop().call_later(
+            self._song_length, self._finish)
+
+    def pause(self) -> None:
+        self._paused = True
+
+    def resume(self) -> None:
+        self._paused = False
+
+    def stop(self) -> None:
+        if self._playing is not None:
+            self._playing.cancel()
+            self._finish()
+
+    def _finish(self) -> None:
+        self._playing = None
+        if self._after is not None:
+            self._after(None)
+
+    async def move_to(self, channel) -> None:
+        self.channel = channel
+
+    async def disconnect(self, *, force: bool = False) -> None:
+        self.guild._state._remove_voice_client(self.guild.id)
+
+
+class FakeDiscord:
+    """
+    Builds real discord.py guilds, channels, members and messages on the
+    bot's connection state, and stubs the HTTP API and voice connections.
+    """
+
+    def __init__(self, bot, guilds: int, users: int,
+                 song_length: float) -> None:
+        self.bot = bot
+        self.state = bot._connection
+        self.song_length = song_length
+        self.next_id = 10_000
+        self.state.user = discord.ClientUser(state=self.state, data={
+            "id": "1", "username": "taquitobot", "discriminator": "0",
+            "avatar": None, "bot": True})
+        self.channels = {}
+        self.members = []
+        self.messages_sent = 0
+        for _ in range(guilds):
+            guild = discord.Guild(state=self.state, data={
+                "id": self._snowflake(), "name": "guild"})
+            self.state._add_guild(guild)
+            text_channel = discord.TextChannel(
+                state=self.state, guild=guild, data={
+                    "id": self._snowflake(), "type": 0, "name": "general",
+                    "position": 0, "guild_id": str(guild.id)})
+            voice_channel = discord.VoiceChannel(
+                state=self.state, guild=guild, data={
+                    "id": self._snowflake(), "type": 2, "name": "voice",
+                    "position": 0, "guild_id": str(guild.id),
+                    "bitrate": 64000, "user_limit": 0})
+            self.channels[text_channel.id] = text_channel
+            for _ in range(max(1, users // guilds)):
+                user_id = self._snowflake()
+                guild._voice_states[int(user_id)] = discord.VoiceState(
+                    channel=voice_channel, data={
+                        "session_id": "session", "channel_id":
+                        str(voice_channel.id), "user_id": user_id,
+                        "deaf": False, "mute": False, "self_deaf": False,
+                        "self_mute": False, "self_video": False,
+                        "suppress": False,
+                        "request_to_speak_timestamp": None})
+                self.members.append((text_channel, {
+                    "id": user_id, "username": f"user{user_id}",
+                    "discriminator": "0", "avatar": None,
+                    "global_name": None}))
+
+    def make_message(self, content: str,
+                     rng: random.Random) -> discord.Message:
+        channel, author = rng.choice(self.members)
+        return discord.Message(state=self.state, channel=channel,
+                               data=self._message_payload(channel, author,
+                                                          content))
+
+    async def send_message(self, channel_id: int, *, params) -> dict:
+        self.messages_sent += 1
+        channel = self.channels[int(channel_id)]
+        author = self.state.user._to_minimal_user_json()
+        return self._message_payload(channel, author,
+                                     params.payload.get("content") or "")
+
+    async def connect(self, voice_channel: discord.VoiceChannel,
+                      **kwargs) -> FakeVoiceClient:
+        voice_client = FakeVoiceClient(voice_channel, self.song_length)
+        self.state._add_voice_client(voice_channel.guild.id, voice_client)
+        return voice_client
+
+    def _message_payload(self, channel: discord.TextChannel, author: dict,
+                         content: str) -> dict:
+        return {"id": self._snowflake(), "channel_id": str(channel.id),
+                "guild_id": str(channel.guild.id), "author": dict(author),
+                "member": {"roles": [], "joined_at": None, "deaf": False,
+                           "mute": False, "flags": 0},
+                "content": content,
+                "timestamp": "2026-10-18T00:00:00+00:00",
+                "edited_timestamp": None, "tts": False,
+                "mention_everyone": False, "mentions": [],
+                "mention_roles": [], "attachments": [], "embeds": [],
+                "pinned": False, "type": 0}
+
+    def _snowflake(self) -> str:
+        self.next_id += 1
+        return str(self.next_id)
+
+
+class LoadTest:
+    """
+    Sends the synthetic messages and records when each one is handled.
+    """
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.started = {}
+        self.latencies = {kind: [] for kind in COMMAND_MIX}
+        self.job_latencies = []
+        self.errors = {}
+        self.lags = []
+        self.sent = 0
+
+    async def run(self) -> dict:
+        bot = bot_main.bot
+        async with bot:
+            await bot_main.load()
+            fake = FakeDiscord(bot, guilds=self.args.guilds,
+                               users=self.args.users,
+                               song_length=self.args.song_length)
+            bot.add_listener(self.on_command_completion)
+            bot.add_listener(self.on_command_error)
+            with self._stubs(bot, fake):
+                monitor = asyncio.create_task(self._monitor_lag())
+                start = time.perf_counter()
+                await self._send_messages(fake)
+                send_time = time.perf_counter() - start
+                await self._drain()
+                monitor.cancel()
+                bot_main.clip_jobs.shutdown(wait=False)
+
+        return {"config": vars(self.args), "sent": self.sent,
+                "send_seconds": send_time,
+                "achieved_rate": self.sent / send_time,
+                "replies_sent": fake.messages_sent,
+                "unfinished": len(self.started),
+                "latency": {kind: percentiles(samples)
+                            for kind, samples in self.latencies.items()},
+                "clip_job_latency": percentiles(self.job_latencies),
+                "errors": self.errors,
+                "loop_lag": percentiles(self.lags)}
+
+    async def on_command_completion(self, ctx) -> None:
+        self._finish(ctx.message.id)
+
+    async def on_command_error(self, ctx, error) -> None:
+        name = type(getattr(error, "original", error)).__name__
+        key = f"{ctx.command.name if ctx.command else 'unknown'}: {name}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+        self._finish(ctx.message.id)
+
+    def _finish(self, message_id: int) -> None:
+        kind, start = self.started.pop(message_id, (None, None))
+        if kind is not None:
+            self.latencies[kind].append(time.perf_counter() - start)
+
+    async def _send_messages(self, fake: FakeDiscord) -> None:
+        """
+        Dispatches the messages open loop in ticks of a hundredth of a
+        second, so a slow bot does not slow the load down.
+        """
+        ticks = int(self.args.seconds * 100)
+        per_tick = self.args.rate / 100
+        kinds, weights = zip(*COMMAND_MIX.items())
+        owed = 0.0
+        start = time.perf_counter()
+        for tick in range(ticks):
+            owed += per_tick
+            while owed >= 1:
+                owed -= 1
+                kind = self.rng.choices(kinds, weights)[0]
+                message = fake.make_message(self._content(kind), self.rng)
+                self.sent += 1
+                if kind == "outplayed":
+                    self.started[message.content.lower()] = \
+                        (kind, time.perf_counter())
+                else:
+                    self.started[message.id] = (kind, time.perf_counter())
+                bot_main.bot.dispatch("message", message)
+            delay = start + (tick + 1) / 100 - time.perf_counter()
+            await asyncio.sleep(max(0, delay))
+
+    async def _drain(self) -> None:
+        deadline = time.perf_counter() + self.args.drain_seconds
+        while (self.started or bot_main.clip_jobs.jobs_in_flight()) and \
+                time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+
+    def _content(self, kind: str) -> str:
+        number = self.rng.randrange(1_000_000)
+        return {"play": f"$play song {number}",
+                "queue": "$queue",
+                "skip": "$skip",
+                "chest": "$chest user Ahri",
+                "outplayed": f"https://outplayed.tv/media/{number}x clip"
+                             f" {number}"}[kind]
+
+    async def _monitor_lag(self) -> None:
+        while True:
+            expected = time.perf_counter() + LAG_INTERVAL
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(max(0.0, time.perf_counter() - expected))
+
+    @contextlib.contextmanager
+    def _stubs(self, bot, fake: FakeDiscord):
+        """
+        Stubs everything that would leave the process.
+        """
+        args = self.args
+        music_commands = sys.modules["music_commands.music_commands"]
+        riot_requests = sys.modules["riot.riot_requests"]
+        clip_job_executor = sys.modules[
+            "clip_commands.clip_jobs.clip_job_executor"]
+
+        async def fetch_song(song_name):
+            await asyncio.sleep(args.fetch_latency)
+            return {"entries": [{"title": song_name,
+                                 "url": f"https://cdn.test/{song_name}"}]}
+
+        class YoutubeDL:
+            """
+            Stands in for yt_dlp.YoutubeDL, the search blocks like the real
+            one does while it waits on YouTube.
+            """
+
+            def __init__(self, *_, **__) -> None:
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info) -> None:
+                pass
+
+            def extract_info(self, query, **_) -> dict:
+                time.sleep(args.fetch_latency)
+                song_name = query.split(":", 1)[1]
+                return {"entries": [{"title": song_name,
+                                     "url": f"https://cdn.test/{song_name}"}]}
+
+        if args.fetch_mode == "stub":
+            fetch_stub = patch.object(music_commands, "fetch_song",
+                                      fetch_song)
+        else:
+            fetch_stub = patch.object(
+                sys.modules["music_commands.my_youtube.youtube_requests"]
+                .yt_dlp, "YoutubeDL", YoutubeDL)
+
+        def get_page(url, *_, **__):
+            time.sleep(args.http_latency)
+            return SimpleNamespace(text=CHEST_PAGE)
+
+        def clip_stage(result):
+            def stage(*_):
+                time.sleep(args.stage_latency)
+                return result
+            return stage
+
+        jobs = clip_job_executor.ClipJobExecutor(
+            process_pool=ThreadPoolExecutor(4),
+            thread_pool=ThreadPoolExecutor(4))
+        submit = jobs.submit
+
+        def timed_submit(discord_message, channel):
+            kind, start = self.started.pop(discord_message, (None, None))
+            job = submit(discord_message, channel)
+            if kind is not None:
+                self.latencies[kind].append(time.perf_counter() - start)
+                job.add_done_callback(lambda _: self.job_latencies.append(
+                    time.perf_counter() - start))
+            return job
+
+        jobs.submit = timed_submit
+        old_jobs = bot_main.clip_jobs
+        bot_main.clip_jobs = jobs
+        try:
+            with patch.object(bot.http, "send_message", fake.send_message), \
+                 patch.object(bot, "get_channel", fake.channels.get), \
+                 patch.object(discord.VoiceChannel, "connect",
+                              lambda channel, **kwargs:
+                              fake.connect(channel, **kwargs)), \
+                 patch.object(discord, "FFmpegOpusAudio",
+                              lambda *_, **__: None), \
+                 fetch_stub, \
+                 patch.object(riot_requests.requests, "get", get_page), \
+                 patch.object(clip_job_executor, "_download_clip",
+                              clip_stage(("clip.mp4", "valorant", "title"))), \
+                 patch.object(clip_job_executor, "_prepare_and_edit_clip",
+                              clip_stage(("", "valorant"))), \
+                 patch.object(clip_job_executor, "upload_clip",
+                              clip_stage("https://youtube.com/shorts/x")):
+                yield
+        finally:
+            bot_main.clip_jobs = old_jobs
+            old_jobs.shutdown(wait=False)
+
+
+def print_report(results: dict) -> None:
+    print(f"sent {results['sent']} messages in "
+          f"{results['send_seconds']:.2f} s "
+          f"({results['achieved_rate']:.0f}/s), "
+          f"{results['replies_sent']} replies, "
+          f"{results['unfinished']} unfinished")
+    for kind, summary in list(results["latency"].items()) + \
+            [("clip job", results["clip_job_latency"]),
+             ("loop lag", results["loop_lag"])]:
+        if summary["count"] == 0:
+            continue
+        print(f"{kind:>10}: {summary['count']:6d} "
+              f"p50 {summary['p50_ms']:8.2f} ms  "
+              f"p95 {summary['p95_ms']:8.2f} ms  "
+              f"p99 {summary['p99_ms']:8.2f} ms  "
+              f"max {summary['max_ms']:8.2f} ms")
+    for error, count in sorted(results["errors"].items()):
+        print(f"{'error':>10}: {count:6d} {error}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--rate", type=float, default=2000,
+                        help="messages dispatched per second")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--guilds", type=int, default=1)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--song-length", type=float, default=2.0)
+    parser.add_argument("--fetch-latency", type=float, default=0.02,
+                        help="seconds the stubbed fetch_song takes")
+    parser.add_argument("--fetch-mode", choices=("stub", "yt_dlp"),
+                        default="stub",
+                        help="stub fetch_song, or only the blocking yt_dlp "
+                             "search it runs")
+    parser.add_argument("--http-latency", type=float, default=0.0,
+                        help="seconds the stubbed Riot page request blocks")
+    parser.add_argument("--stage-latency", type=float, default=0.01,
+                        help="seconds each stubbed clip job stage takes")
+    parser.add_argument("--drain-seconds", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="path to write the results JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(LoadTest(args).run())
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+bench_detectors.py
+
+Benchmark of the highlight detectors without the decode. The HUD regions of
+synthetic clips are decoded once, then fed to a DetectorSearch per game and
+mode, the dense search that runs the full test on every frame and the coarse
+to fine search, with the ROI prefilter off so every test runs and on as the
+bot runs it. Reports the frames searched per second and the highlights
+found.
+
+Usage:
+    python -m benchmarks.bench_detectors [--duration 60] [--repeat 5]
+
+Attributes:
+    HIGHLIGHTS (list[float]): The times the marker appears in the clips.
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import argparse
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from benchmarks.synthetic_clips import make_synthetic_clip
+from taquitobot.clip_commands.clip_editor import clip_prep
+from taquitobot.clip_commands.clip_editor.clip_prep import (
+    COARSE_INTERVAL,
+    REFINE_WINDOW,
+    SAMPLE_INTERVAL,
+    DetectorSearch
+)
+from taquitobot.clip_commands.clip_editor.frame_sampler import FrameSampler
+from taquitobot.clip_commands.clip_editor.game_detectors import get_detector
+from taquitobot.clip_commands.clip_editor.roi_prefilter import BATCH_SIZE, RoiPrefilter
+
+HIGHLIGHTS = [4.1, 11.0, 19.6, 26.3, 33.0, 41.4, 48.2, 55.5]
+
+
+def search(detector, frames, coarse: bool) -> list[float]:
+    """
+    Feeds the decoded regions to a search a batch at a time, the way
+    ClipPrepAbstract._hits does, and returns the hits.
+    """
+    detector_search = DetectorSearch(
+        detector=detector,
+        coarse_interval=COARSE_INTERVAL if coarse else None,
+        fine_interval=SAMPLE_INTERVAL, refine_window=REFINE_WINDOW,
+        start=0.0, spacing=detector.get_spacing())
+    hits = []
+    for offset in range(0, len(frames), BATCH_SIZE):
+        for frame in detector_search.sign(frames[offset:offset + BATCH_SIZE]):
+            hits += detector_search.feed(frame)
+    return hits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for game in ("leagueoflegends", "valorant"):
+            detector = get_detector(game)
+            clip = make_synthetic_clip(
+                os.path.join(directory, f"{game}.mp4"), game,
+                [t for t in HIGHLIGHTS if t < args.duration],
+                duration=args.duration)
+            frames = [(frame_time, region.copy()) for frame_time, region in
+                      FrameSampler(file=clip, interval=SAMPLE_INTERVAL,
+                                   crop=detector.get_crop())]
+            for prefilter in (False, True):
+                for coarse in (False, True):
+                    threshold = {} if prefilter else {"threshold": None}
+                    with patch.object(clip_prep, "RoiPrefilter",
+                                      lambda: RoiPrefilter(**threshold)):
+                        start = time.perf_counter()
+                        for _ in range(args.repeat):
+                            hits = search(detector, frames, coarse)
+                        seconds = time.perf_counter() - start
+                    mode = "coarse to fine" if coarse else "dense"
+                    print(f"{game:>15} {mode:>14}, prefilter "
+                          f"{'on ' if prefilter else 'off'}: "
+                          f"{len(frames) * args.repeat / seconds:8.0f} "
+                          f"frames/s, hits {hits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+bench_frame_sampler.py
+
+Benchmark comparing the frames per second of sampling a clip every 0.25
+seconds with moviepy get_frame seeks against the single pass FrameSampler,
+cropping in Python and cropping inside the ffmpeg filter graph.
+
+Usage:
+    python -m benchmarks.bench_frame_sampler [--duration 20] [--fps 60]
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import argparse
+import os
+import tempfile
+import moviepy.editor
+from benchmarks.bench_utils import make_test_clip, time_call
+from taquitobot.clip_commands.clip_editor.clip_prep import SAMPLE_INTERVAL
+from taquitobot.clip_commands.clip_editor.frame_sampler import FrameSampler
+
+# The Valorant HUD region used by ClipPrepValorant.
+LEFT, TOP, RIGHT, BOTTOM = 905, 805, 1015, 920
+
+
+def sample_with_moviepy(file_name: str) -> int:
+    video_clip = moviepy.editor.VideoFileClip(file_name).crop(LEFT, TOP,
+                                                              RIGHT, BOTTOM)
+    frames = 0
+    time_interval = 0
+    while time_interval < video_clip.duration:
+        video_clip.get_frame(time_interval)
+        frames += 1
+        time_interval += SAMPLE_INTERVAL
+    video_clip.close()
+    return frames
+
+
+def sample_with_frame_sampler(file_name: str) -> int:
+    frames = 0
+    for _, frame in FrameSampler(file=file_name, interval=SAMPLE_INTERVAL):
+        frame[TOP:BOTTOM, LEFT:RIGHT]
+        frames += 1
+    return frames
+
+
+def sample_region_with_frame_sampler(file_name: str) -> int:
+    frames = 0
+    for _, region in FrameSampler(file=file_name, interval=SAMPLE_INTERVAL,
+                                  crop=(LEFT, TOP, RIGHT, BOTTOM)):
+        frames += 1
+    return frames
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--fps", type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        clip = make_test_clip(os.path.join(directory, "clip.mp4"),
+                              duration=args.duration, fps=args.fps)
+        full_frame = 1920 * 1080 * 3
+        region = (RIGHT - LEFT) * (BOTTOM - TOP) * 3
+        for name, function, frame_bytes in (
+                ("moviepy get_frame", sample_with_moviepy, full_frame),
+                ("FrameSampler", sample_with_frame_sampler, full_frame),
+                ("FrameSampler ROI", sample_region_with_frame_sampler,
+                 region)):
+            frames, wall, cpu = time_call(function, clip)
+            print(f"{name:>18}: {frames} frames in {wall:.2f} s "
+                  f"({frames / wall:.1f} frames/s, cpu {cpu:.2f} s, "
+                  f"{frame_bytes / 1024:.0f} KiB piped per frame)")
+
+
+if __name__ == "__main__":
+    main()
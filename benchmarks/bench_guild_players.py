@@ -0,0 +1,82 @@
+"""
+bench_guild_players.py
+
+Benchmark of the memory the music cog holds per guild. A GuildPlayer is
+created for every guild through the same lookup the commands use and a
+number of songs is queued in each, then the players are left idle and
+collected. Reports the bytes allocated per guild with tracemalloc, and what
+is left once the idle players have been collected.
+
+Usage:
+    python -m benchmarks.bench_guild_players [--guilds 1000] [--songs 5]
+
+Attributes:
+    TAQUITOBOT_FOLDER (str): The folder main.py is run from, its packages
+        are imported relative to it.
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+TAQUITOBOT_FOLDER = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "taquitobot")
+
+sys.path.insert(0, TAQUITOBOT_FOLDER)
+from music_commands.guild_player import IDLE_TIMEOUT  # noqa: E402
+from music_commands.music_commands import MusicPlayer  # noqa: E402
+
+
+def allocated() -> int:
+    """
+    Returns the bytes tracemalloc currently sees allocated.
+    """
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--guilds", type=int, default=1000)
+    parser.add_argument("--songs", type=int, default=5,
+                        help="songs queued in every guild")
+    args = parser.parse_args()
+
+    music_player = MusicPlayer(Mock())
+    contexts = [SimpleNamespace(guild=SimpleNamespace(id=guild_id))
+                for guild_id in range(args.guilds)]
+    tracemalloc.start()
+    start = allocated()
+    for ctx in contexts:
+        player = music_player._player(ctx)
+        for song in range(args.songs):
+            player.add_song(f"song {ctx.guild.id} {song}",
+                            f"https://cdn.test/{ctx.guild.id}/{song}")
+    loaded = allocated()
+
+    for ctx in contexts:
+        player = music_player.get_player(ctx.guild.id)
+        player.clear()
+        player._last_active -= IDLE_TIMEOUT
+    music_player._collect_idle_players()
+    collected = allocated()
+    tracemalloc.stop()
+
+    print(f"{args.guilds} guilds, {args.songs} songs queued in each: "
+          f"{(loaded - start) / args.guilds:.0f} bytes per guild, "
+          f"{(loaded - start) / 1024:.0f} KiB in total")
+    print(f"after collecting the idle players: "
+          f"{music_player.get_player_count()} players, "
+          f"{max(0, collected - start) / 1024:.0f} KiB left")
+
+
+if __name__ == "__main__":
+    main()
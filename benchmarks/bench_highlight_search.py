@@ -0,0 +1,89 @@
+"""
+bench_highlight_search.py
+
+Benchmark comparing the dense highlight search (every 0.25 seconds) with the
+coarse to fine search, in one process and split into segments across the
+cores, on synthetic clips. Reports the frames the full test was run on, the
+frames screened by the cheap coarse test, the share of the tests skipped by
+the ROI prefilter, the time taken and whether every search found the same
+highlights. The identify mode runs every registered detector on one decode
+without the title of the game and reports the game the clip was identified
+as.
+
+Usage:
+    python -m benchmarks.bench_highlight_search [--duration 30]
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import argparse
+import os
+import tempfile
+from unittest.mock import patch
+from benchmarks.bench_utils import time_call
+from benchmarks.synthetic_clips import make_synthetic_clip
+from taquitobot.clip_commands.clip_editor.clip_prep import (
+    ClipPrepAbstract,
+    ClipPrepAuto,
+    ClipPrepLeagueOfLegends,
+    ClipPrepValorant
+)
+
+HIGHLIGHTS = [4.1, 11.0, 19.6, 26.3]
+
+
+def run_detector(clip_prep_class, file_name: str, dense: bool,
+                 parallel: bool = False):
+    """
+    Runs a detector on a clip with a facecam so every highlight is searched
+    for, optionally forcing the dense search or searching in parallel.
+    """
+    class Detector(clip_prep_class):
+        def _find_highlight_time(self, file):
+            self._coarse_interval = None
+            return super()._find_highlight_time(file)
+
+    # Only module level classes can be sent to the process pool.
+    detector = Detector if dense else clip_prep_class
+
+    with patch.object(ClipPrepAbstract, "_choose_random_song",
+                      return_value=""), \
+         patch.object(ClipPrepAbstract, "_choose_random_facecam_clip",
+                      return_value="facecam.mp4"):
+        return detector(video_file=file_name, parallel=parallel)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for game, clip_prep_class in (("valorant", ClipPrepValorant),
+                                      ("leagueoflegends",
+                                       ClipPrepLeagueOfLegends)):
+            clip = make_synthetic_clip(
+                os.path.join(directory, f"{game}.mp4"), game,
+                [t for t in HIGHLIGHTS if t < args.duration],
+                duration=args.duration)
+            results = {}
+            for mode in ("dense", "coarse to fine", "parallel", "identify"):
+                prep, wall, cpu = time_call(
+                    run_detector,
+                    ClipPrepAuto if mode == "identify" else clip_prep_class,
+                    clip, mode == "dense", mode == "parallel")
+                results[mode] = prep._highlight_time
+                print(f"{game:>15} {mode:>14}: "
+                      f"{prep.get_frames_analysed():4d} frames analysed "
+                      f"({prep.get_frames_screened():3d} screened, "
+                      f"{prep.get_skip_rate():4.0%} skipped) in "
+                      f"{wall:.2f} s, {prep.get_game_title()} highlights "
+                      f"{prep._highlight_time}")
+            print(f"{game:>15} {'match':>14}: "
+                  f"{len(set(map(tuple, results.values()))) == 1}")
+
+
+if __name__ == "__main__":
+    main()
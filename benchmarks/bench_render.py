@@ -0,0 +1,104 @@
+"""
+bench_render.py
+
+Benchmark comparing rendering the edited short with moviepy against the
+single ffmpeg filter graph, without the asset caches and with cold and warm
+song and facecam caches. Reports the wall clock time, the CPU time including the ffmpeg
+processes and how closely the renders match as the PSNR of the ffmpeg render
+against the moviepy one.
+
+Usage:
+    python -m benchmarks.bench_render [--duration 20] [--fps 60]
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import argparse
+import os
+import re
+import subprocess
+import tempfile
+import time
+from types import SimpleNamespace
+from benchmarks.bench_utils import FFMPEG_BINARY, make_test_clip, make_test_song
+from taquitobot.clip_commands.clip_cache.facecam_cache import FacecamCache
+from taquitobot.clip_commands.clip_cache.song_cache import SongCache
+from taquitobot.clip_commands.clip_editor.clip_editor import ClipEditor
+
+
+def render(mode: str, clip_prep, clip: str, directory: str, audio: bool,
+           **caches) -> tuple[str, float, float]:
+    """
+    Renders the short with a backend, timing it with the CPU time of every
+    process it started.
+    """
+    backend = mode.split()[0]
+    video_title = os.path.join(directory, mode.replace(" ", "_"))
+    game_title = "Valorant" if audio else "LethalCompany"
+    start = os.times()
+    wall_start = time.perf_counter()
+    file_name = ClipEditor(clip_prep=clip_prep, backend=backend, **caches) \
+        .edit_and_save_video(clip_file=clip, game_title=game_title,
+                             video_title=video_title)
+    wall = time.perf_counter() - wall_start
+    end = os.times()
+    cpu = sum(end[:4]) - sum(start[:4])
+    return file_name, wall, cpu
+
+
+def psnr(reference: str, distorted: str) -> float:
+    """
+    Measures the average PSNR of a render against a reference with ffmpeg.
+    """
+    process = subprocess.run(
+        [FFMPEG_BINARY, "-i", distorted, "-i", reference,
+         "-lavfi", "psnr", "-f", "null", "-"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return float(re.search(r"average:(\S+)", process.stderr).group(1))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--fps", type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        clip = make_test_clip(os.path.join(directory, "clip.mp4"),
+                              duration=args.duration, fps=args.fps, audio=True)
+        facecam = make_test_clip(os.path.join(directory, "facecam.mp4"),
+                                 duration=args.duration / 2, fps=60,
+                                 width=1280, height=720, audio=True)
+        song = make_test_song(os.path.join(directory, "song.mp3"),
+                              duration=180)
+
+        for label, audio, facecam_clip in (("song", True, facecam),
+                                           ("song only", True, ""),
+                                           ("clip audio", False, facecam)):
+            clip_prep = SimpleNamespace(
+                _song_name=song, _song_start_time=92.5,
+                _highlight_time=[2.0, args.duration / 2],
+                _facecam_clip=facecam_clip, _face_cam_start_time=1.5)
+            cache_folder = os.path.join(directory, label + " cache")
+            caches = {"song_cache": SongCache(
+                          cache_folder=os.path.join(cache_folder, "songs")),
+                      "facecam_cache": FacecamCache(
+                          cache_folder=os.path.join(cache_folder, "facecam"))}
+            renders = {}
+            for mode in ("moviepy", "ffmpeg", "ffmpeg cold cache",
+                         "ffmpeg warm cache"):
+                file_name, wall, cpu = render(
+                    mode, clip_prep, clip, directory, audio,
+                    **(caches if "cache" in mode else {}))
+                renders[mode] = file_name
+                print(f"{label:>10} {mode:>17}: {wall:6.2f} s wall, "
+                      f"{cpu:6.2f} s CPU")
+            for mode in ("ffmpeg", "ffmpeg warm cache"):
+                print(f"{label:>10} {mode + ' PSNR':>22}: "
+                      f"{psnr(renders['moviepy'], renders[mode]):.2f} dB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+bench_streaming.py
+
+Benchmark comparing the sequential clip pipeline, which downloads the whole
+clip before searching it, with the streaming pipeline, which searches the
+clip as it downloads. Synthetic Valorant clips, one with its index at the
+start (faststart) and one with it at the end, are served from a local server
+at a fixed bandwidth. Reports the time until the first highlight and until
+every highlight is found, and the time until the prep is done, which waits
+for the whole download in both pipelines.
+
+Usage:
+    python -m benchmarks.bench_streaming [--duration 30] [--bandwidth 1]
+
+Attributes:
+    HIGHLIGHTS (list[float]): The times the marker appears in the clips.
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from benchmarks.synthetic_clips import make_synthetic_clip
+from taquitobot.clip_commands.clip_downloader.clip_downloader_link import ClipDownloaderLink
+from taquitobot.clip_commands.clip_editor.clip_prep import ClipPrepAbstract, ClipPrepValorant
+
+HIGHLIGHTS = [4.1, 11.0, 19.6, 26.3]
+
+
+class ThrottledServer:
+    """
+    Serves the files of a folder with Range support at a fixed bandwidth.
+    """
+
+    def __init__(self, folder: str, bandwidth: float) -> None:
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                with open(os.path.join(folder, self.path.lstrip("/")),
+                          "rb") as f:
+                    body = f.read()
+                start, end = 0, len(body) - 1
+                range_header = self.headers.get("Range")
+                if range_header:
+                    first, _, last = range_header.removeprefix(
+                        "bytes=").partition("-")
+                    start, end = int(first), int(last) if last else end
+                    self.send_response(206)
+                    self.send_header("Content-Range",
+                                     f"bytes {start}-{end}/{len(body)}")
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Length", str(end + 1 - start))
+                self.end_headers()
+                chunk_size = 64 * 1024
+                try:
+                    for offset in range(start, end + 1, chunk_size):
+                        self.wfile.write(body[offset:min(offset + chunk_size,
+                                                         end + 1)])
+                        time.sleep(chunk_size / bandwidth)
+                except OSError:
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever,
+                         daemon=True).start()
+
+    def get_url(self, file_name: str) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/{file_name}"
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class TimedDetector(ClipPrepValorant):
+    """
+    Records when the highlight search returns.
+    """
+
+    def _find_highlight_time(self, file):
+        highlight_time = super()._find_highlight_time(file)
+        self.search_done = time.perf_counter()
+        return highlight_time
+
+
+def run_pipeline(url: str, folder: str, streaming: bool,
+                 facecam: str) -> tuple[float, float, list[float]]:
+    """
+    Downloads and preps a clip, returning the seconds until the highlights
+    were found and until the prep was done, and the highlights.
+    """
+    downloader = ClipDownloaderLink(web_link=url, game_title="valorant",
+                                    video_title="", download_folder=folder)
+    with patch.object(ClipPrepAbstract, "_choose_random_song",
+                      return_value=""), \
+         patch.object(ClipPrepAbstract, "_choose_random_facecam_clip",
+                      return_value=facecam):
+        start = time.perf_counter()
+        if streaming:
+            video_stream = downloader.stream_video()
+            prep = TimedDetector(video_file=video_stream.get_file_name(),
+                                 video_stream=video_stream)
+        else:
+            prep = TimedDetector(video_file=downloader.download_video())
+        done = time.perf_counter()
+    os.remove(downloader._get_download_path())
+    return prep.search_done - start, done - start, prep._highlight_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--bandwidth", type=float, default=1,
+                        help="MiB per second the clips are served at")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        served = os.path.join(directory, "served")
+        downloads = os.path.join(directory, "downloads")
+        os.makedirs(served)
+        os.makedirs(downloads)
+        for faststart in (True, False):
+            make_synthetic_clip(
+                os.path.join(served, f"faststart_{faststart}.mp4"),
+                "valorant", HIGHLIGHTS, duration=args.duration,
+                faststart=faststart)
+        server = ThrottledServer(folder=served,
+                                 bandwidth=args.bandwidth * 1024 * 1024)
+        try:
+            for faststart in (True, False):
+                url = server.get_url(f"faststart_{faststart}.mp4")
+                size = os.path.getsize(
+                    os.path.join(served, f"faststart_{faststart}.mp4"))
+                print(f"{'faststart' if faststart else 'index at end'} "
+                      f"clip, {size / 1024 / 1024:.1f} MiB:")
+                for target, facecam in (("first highlight", ""),
+                                        ("every highlight", "facecam.mp4")):
+                    results = {}
+                    for streaming in (False, True):
+                        results[streaming] = run_pipeline(
+                            url=url, folder=downloads, streaming=streaming,
+                            facecam=facecam)
+                    (sequential, _, expected), (streamed, _, found) = \
+                        results[False], results[True]
+                    print(f"  {target:>16}: sequential {sequential:6.2f} s, "
+                          f"streaming {streamed:6.2f} s "
+                          f"({sequential / streamed:4.1f}x), prep done "
+                          f"{results[False][1]:6.2f} s vs "
+                          f"{results[True][1]:6.2f} s, "
+                          f"{'same' if found == expected else 'DIFFERENT'}"
+                          f" highlights")
+        finally:
+            server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+bench_suite.py
+
+Benchmark suite for the clip path. Deterministic synthetic 1080p Valorant and
+League of Legends clips are generated with the HUD marker at known times, the
+detectors are run on them to measure their throughput and accuracy against
+the ground truth, and the edited short is rendered to measure the render
+frame rate. The results are written to JSON and can be compared against the
+results of another commit.
+
+Usage:
+    python -m benchmarks.bench_suite [--clips 2] [--duration 30]
+        [--output results.json] [--compare baseline.json]
+
+Attributes:
+    GAMES (dict[str, type]): The detector of every synthetic game.
+    MATCH_TOLERANCE (float): How far in seconds a detection may be from a
+        ground truth highlight to count as finding it.
+    HIGHLIGHT_GAP (float): The least time in seconds between two ground
+        truth highlights, more than the highlight spacing of any detector.
+    LOWER_IS_BETTER (tuple[str, ...]): The suffixes of the metrics that
+        regress when they go up, every other metric regresses when it goes
+        down.
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from benchmarks.bench_highlight_search import run_detector
+from benchmarks.bench_utils import make_test_song, time_call
+from benchmarks.synthetic_clips import make_synthetic_clip
+from taquitobot.clip_commands.clip_editor.clip_editor import ClipEditor
+from taquitobot.clip_commands.clip_editor.clip_prep import (
+    ClipPrepLeagueOfLegends,
+    ClipPrepValorant
+)
+from taquitobot.clip_commands.clip_editor.ffmpeg_renderer import OUTPUT_FPS
+
+GAMES = {"valorant": ClipPrepValorant,
+         "leagueoflegends": ClipPrepLeagueOfLegends}
+MATCH_TOLERANCE = 0.5
+HIGHLIGHT_GAP = 6.0
+LOWER_IS_BETTER = ("seconds", "error", "frames_analysed")
+
+
+def ground_truth(seed: int, duration: float) -> list[float]:
+    """
+    Picks between one and five highlight times for a clip, at least
+    HIGHLIGHT_GAP seconds apart and clear of the ends of the clip.
+    """
+    rng = random.Random(seed)
+    times = []
+    for _ in range(rng.randint(1, 5)):
+        candidate = round(rng.uniform(1, duration - 2), 2)
+        if all(abs(candidate - t) >= HIGHLIGHT_GAP for t in times):
+            times.append(candidate)
+    return sorted(times)
+
+
+def score(detected: list[float], truth: list[float]) -> dict[str, float]:
+    """
+    Matches every detection to the nearest unmatched ground truth highlight
+    within MATCH_TOLERANCE and scores the detections.
+    """
+    unmatched = list(truth)
+    errors = []
+    for detection in detected:
+        nearest = min(unmatched, key=lambda t: abs(t - detection),
+                      default=None)
+        if nearest is not None and abs(nearest - detection) <= \
+                MATCH_TOLERANCE:
+            unmatched.remove(nearest)
+            errors.append(abs(nearest - detection))
+    return {"true_positives": len(errors),
+            "false_positives": len(detected) - len(errors),
+            "false_negatives": len(unmatched),
+            "error_sum": sum(errors)}
+
+
+def bench_detection(clip_prep_class, clips: list[tuple[str, list[float]]],
+                    duration: float, fps: int,
+                    parallel: bool) -> dict[str, float]:
+    """
+    Runs a detector over the clips of its game and reports its throughput in
+    frames analysed and clip frames covered per second, the share of the
+    tests skipped by the ROI prefilter, its precision and recall and the mean
+    error of its detections.
+    """
+    totals = {"true_positives": 0, "false_positives": 0,
+              "false_negatives": 0, "error_sum": 0.0}
+    wall_total = 0.0
+    frames_analysed = 0
+    frames_tested = 0
+    frames_skipped = 0
+    for clip, truth in clips:
+        prep, wall, _ = time_call(run_detector, clip_prep_class, clip, False,
+                                  parallel)
+        wall_total += wall
+        frames_analysed += prep.get_frames_analysed()
+        frames_tested += prep.get_frames_analysed() + \
+            prep.get_frames_screened()
+        frames_skipped += prep.get_frames_skipped()
+        # The detectors report the time shifted by their offset, undo it to
+        # compare against when the marker appeared.
+        detected = [t - prep.get_detector().get_offset()
+                    for t in prep._highlight_time]
+        for key, value in score(detected, truth).items():
+            totals[key] += value
+
+    found = totals["true_positives"]
+    return {
+        "seconds": wall_total,
+        "frames_analysed": frames_analysed,
+        "analysed_frames_per_second": frames_analysed / wall_total,
+        "clip_frames_per_second": len(clips) * duration * fps / wall_total,
+        "prefilter_skip_rate": frames_skipped / max(1, frames_tested),
+        "precision": found / max(1, found + totals["false_positives"]),
+        "recall": found / max(1, found + totals["false_negatives"]),
+        "mean_error": totals["error_sum"] / max(1, found)}
+
+
+def bench_render(backend: str, clip: str, truth: list[float], song: str,
+                 duration: float, directory: str) -> dict[str, float]:
+    """
+    Renders the short of a clip and reports the render frame rate.
+    """
+    clip_prep = SimpleNamespace(
+        _song_name=song, _song_start_time=60.0, _highlight_time=truth,
+        _facecam_clip="", _face_cam_start_time=0)
+    editor = ClipEditor(clip_prep=clip_prep, backend=backend)
+    _, wall, _ = time_call(editor.edit_and_save_video, clip_file=clip,
+                           game_title="valorant",
+                           video_title=os.path.join(directory, backend))
+    return {"seconds": wall,
+            "frames_per_second": duration * OUTPUT_FPS / wall}
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    """
+    Flattens the nested numeric results into dotted metric names.
+    """
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Prints the change of every metric against a baseline and returns the
+    metrics that got worse by more than the tolerance.
+    """
+    current = flatten({"detection": results["detection"],
+                       "render": results["render"]})
+    previous = flatten({"detection": baseline["detection"],
+                        "render": baseline["render"]})
+    regressions = []
+    print(f"\ncompared with {baseline.get('commit', 'baseline')}:")
+    for name in sorted(current.keys() & previous.keys()):
+        before, after = previous[name], current[name]
+        change = (after - before) / before if before else 0.0
+        worse = -change if not name.endswith(LOWER_IS_BETTER) else change
+        flag = ""
+        if worse > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:>58}: {before:10.3f} -> {after:10.3f} "
+              f"({change:+.1%}){flag}")
+    return regressions
+
+
+def git_commit() -> str | None:
+    """
+    Gets the commit the benchmark was run on, None outside a git checkout.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--clips", type=int, default=2,
+                        help="clips generated per game")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--parallel", action="store_true",
+                        help="search the clips in parallel segments")
+    parser.add_argument("--moviepy", action="store_true",
+                        help="also render with the slow moviepy backend")
+    parser.add_argument("--output", default="bench_suite.json")
+    parser.add_argument("--compare", help="results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    results = {"commit": git_commit(),
+               "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "machine": {"platform": platform.platform(),
+                           "python": platform.python_version(),
+                           "cpu_count": os.cpu_count()},
+               "config": {"clips": args.clips, "duration": args.duration,
+                          "fps": args.fps, "parallel": args.parallel},
+               "detection": {}, "render": {}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        song = make_test_song(os.path.join(directory, "song.mp3"),
+                              duration=args.duration + 90)
+        for game, clip_prep_class in GAMES.items():
+            clips = []
+            for seed in range(args.clips):
+                truth = ground_truth(seed=seed, duration=args.duration)
+                clip = make_synthetic_clip(
+                    os.path.join(directory, f"{game}_{seed}.mp4"), game,
+                    truth, duration=args.duration, fps=args.fps, seed=seed)
+                clips.append((clip, truth))
+            detection = bench_detection(clip_prep_class, clips,
+                                        args.duration, args.fps,
+                                        args.parallel)
+            results["detection"][game] = detection
+            print(f"{game:>15} detection: "
+                  f"{detection['analysed_frames_per_second']:7.1f} frames/s "
+                  f"analysed, {detection['clip_frames_per_second']:7.1f} "
+                  f"clip frames/s, {detection['prefilter_skip_rate']:.0%} "
+                  f"skipped, precision {detection['precision']:.2f}, "
+                  f"recall {detection['recall']:.2f}, mean error "
+                  f"{detection['mean_error']:.2f} s")
+
+        clip, truth = clips[0]
+        for backend in ("ffmpeg", "moviepy") if args.moviepy else \
+                ("ffmpeg",):
+            render = bench_render(backend, clip, truth, song, args.duration,
+                                  directory)
+            results["render"][backend] = render
+            print(f"{backend:>15} render: {render['frames_per_second']:7.1f} "
+                  f"frames/s ({render['seconds']:.2f} s)")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
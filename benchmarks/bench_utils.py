@@ -0,0 +1,79 @@
+"""
+bench_utils.py
+
+Shared helpers for the benchmark scripts. Benchmarks are run from the root of
+the repository as modules, e.g. python -m benchmarks.bench_frame_sampler.
+
+Attributes:
+    FFMPEG_BINARY (str): The ffmpeg binary moviepy is configured with.
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import subprocess
+import time
+from moviepy.config import get_setting
+
+FFMPEG_BINARY = get_setting("FFMPEG_BINARY")
+
+
+def make_test_clip(file_name: str, duration: float = 20, fps: int = 60,
+                   width: int = 1920, height: int = 1080,
+                   audio: bool = False) -> str:
+    """
+    Generates a deterministic test pattern clip with ffmpeg.
+
+    Args:
+        file_name (str): The path to write the clip to.
+        duration (float): The length of the clip in seconds.
+        fps (int): The frame rate of the clip.
+        width (int): The width of the clip in pixels.
+        height (int): The height of the clip in pixels.
+        audio (bool): If the clip should have a sine tone audio track.
+    Returns:
+        (str): The path to the clip.
+    """
+    command = [FFMPEG_BINARY, "-y", "-loglevel", "error", "-f", "lavfi",
+               "-i", f"testsrc2=size={width}x{height}:rate={fps}"]
+    if audio:
+        command += ["-f", "lavfi", "-i", "sine=frequency=220:sample_rate=44100",
+                    "-c:a", "aac"]
+    command += ["-t", str(duration), "-c:v", "libx264", "-preset", "ultrafast",
+                "-pix_fmt", "yuv420p", file_name]
+    subprocess.run(command, check=True)
+    return file_name
+
+
+def make_test_song(file_name: str, duration: float = 60) -> str:
+    """
+    Generates a deterministic sine tone mp3 with ffmpeg.
+
+    Args:
+        file_name (str): The path to write the song to.
+        duration (float): The length of the song in seconds.
+    Returns:
+        (str): The path to the song.
+    """
+    subprocess.run([FFMPEG_BINARY, "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", "sine=frequency=440:sample_rate=44100",
+                    "-t", str(duration), "-ac", "2", file_name], check=True)
+    return file_name
+
+
+def time_call(function, *args, **kwargs) -> tuple[object, float, float]:
+    """
+    Runs a function and measures the wall clock and CPU time it took.
+
+    Args:
+        function (callable): The function to run.
+    Returns:
+        (tuple[object, float, float]): The return value of the function, the
+            wall clock time and the CPU time of this process in seconds.
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = function(*args, **kwargs)
+    return (result, time.perf_counter() - wall_start,
+            time.process_time() - cpu_start)
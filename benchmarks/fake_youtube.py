@@ -0,0 +1,151 @@
+"""
+fake_youtube.py
+
+A local stand-in for the YouTube Data API resumable upload and OAuth token
+endpoints, used by the tests and benchmarks of the YouTubeApiUploader. It
+keeps the bytes of every upload in memory and can be told to fail requests,
+to store only part of a chunk or to expire every session, to exercise
+retries and resumes.
+
+Attributes:
+    SESSION_PATH (str): The path upload sessions are created under.
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SESSION_PATH = "/upload/youtube/v3/videos"
+
+
+class FakeYouTubeServer:
+    """
+    A FakeYouTubeServer runs the stand-in endpoints on a free local port in
+    a background thread.
+
+    Args:
+        bandwidth (float | None): The bytes per second chunks are received
+            at, None for as fast as possible. Defaults to None.
+    """
+
+    def __init__(self, bandwidth: float | None = None) -> None:
+        self.bandwidth = bandwidth
+        self.uploads = {}
+        self.videos = {}
+        self.requests_seen = []
+        self.fail_next = []
+        self.truncate_next = []
+        self.expire_sessions = False
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                           self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+
+    def __enter__(self) -> "FakeYouTubeServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def get_upload_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}{SESSION_PATH}"
+
+    def get_token_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/token"
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length",
+                                                             0)))
+                with server.lock:
+                    server.requests_seen.append(("POST", self.path, None))
+                if self.path == "/token":
+                    self._send(200, {"access_token": "token",
+                                     "expires_in": 3600})
+                    return
+                if self._injected_failure():
+                    return
+                upload_id = uuid.uuid4().hex
+                with server.lock:
+                    server.uploads[upload_id] = {
+                        "size": int(self.headers["X-Upload-Content-Length"]),
+                        "data": bytearray(),
+                        "metadata": json.loads(body)}
+                self.send_response(200)
+                self.send_header("Location", f"{server.get_upload_url()}"
+                                             f"?upload_id={upload_id}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_PUT(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = bytearray()
+                while len(body) < length:
+                    body += self.rfile.read(min(64 * 1024,
+                                                length - len(body)))
+                    if server.bandwidth:
+                        threading.Event().wait(
+                            min(64 * 1024, length) / server.bandwidth)
+                content_range = self.headers["Content-Range"]
+                with server.lock:
+                    server.requests_seen.append(("PUT", self.path,
+                                                 content_range))
+                upload = server.uploads.get(self.path.rpartition("=")[2])
+                if upload is None or server.expire_sessions:
+                    self._send(404, {"error": "unknown session"})
+                    return
+                if self._injected_failure():
+                    return
+
+                if not content_range.startswith("bytes */"):
+                    first = int(content_range.split()[1].partition("-")[0])
+                    with server.lock:
+                        if server.truncate_next:
+                            body = body[:server.truncate_next.pop(0)]
+                    if first == len(upload["data"]):
+                        upload["data"] += body
+                if len(upload["data"]) == upload["size"]:
+                    video_id = upload.setdefault("id", uuid.uuid4().hex[:11])
+                    server.videos[video_id] = upload
+                    self._send(200, {"id": video_id})
+                    return
+                self.send_response(308)
+                if upload["data"]:
+                    self.send_header("Range",
+                                     f"bytes=0-{len(upload['data']) - 1}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _injected_failure(self) -> bool:
+                with server.lock:
+                    status = server.fail_next.pop(0) \
+                        if server.fail_next else None
+                if status is None:
+                    return False
+                self._send(status, {"error": "injected"})
+                return True
+
+            def _send(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,113 @@
+"""
+synthetic_clips.py
+
+Generates deterministic synthetic 1080p clips with NumPy and ffmpeg for the
+benchmarks. Valorant style clips get a ring in the ClipPrepValorant region
+of rings that HoughCircles detects and League of Legends style clips get a yellow
+square in the ClipPrepLeagueOfLegends region, shown at known timestamps.
+
+Attributes:
+    VALORANT_REGION (tuple[int, int, int, int]): The (left, top, right,
+        bottom) region searched by ClipPrepValorant.
+    LEAGUE_REGION (tuple[int, int, int, int]): The (left, top, right,
+        bottom) region searched by ClipPrepLeagueOfLegends.
+    HIGHLIGHT_VISIBLE_FOR (float): How long the HUD marker stays on screen
+        in seconds.
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+"""
+import subprocess
+import cv2
+import numpy as np
+from benchmarks.bench_utils import FFMPEG_BINARY
+
+VALORANT_REGION = (905, 805, 1015, 920)
+LEAGUE_REGION = (1785, 243, 1840, 450)
+HIGHLIGHT_VISIBLE_FOR = 1.0
+
+
+def _background(width: int, height: int, seed: int) -> np.ndarray:
+    """
+    Builds a static, dark, noisy background frame.
+    """
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(10, 60, size=(height, width, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(frame, (9, 9), 0)
+
+
+def _draw_marker(frame: np.ndarray, game: str) -> np.ndarray:
+    """
+    Draws the HUD marker the detector for the game looks for.
+    """
+    frame = frame.copy()
+    if game == "valorant":
+        left, top, right, bottom = VALORANT_REGION
+        centre = ((left + right) // 2, (top + bottom) // 2)
+        # The kill banner is two concentric rings, a single thin ring does
+        # not collect enough votes for the default HoughCircles threshold.
+        for radius in (44, 52):
+            cv2.circle(frame, centre, radius, (235, 235, 235), thickness=3)
+    else:
+        left, top, right, bottom = LEAGUE_REGION
+        centre_y = (top + bottom) // 2
+        cv2.rectangle(frame, (left + 5, centre_y - 22),
+                      (right - 5, centre_y + 22), (250, 210, 20),
+                      thickness=-1)
+    return frame
+
+
+def make_synthetic_clip(file_name: str, game: str,
+                        highlight_times: list[float], duration: float = 10,
+                        fps: int = 30, width: int = 1920, height: int = 1080,
+                        seed: int = 0, faststart: bool = False) -> str:
+    """
+    Writes a synthetic clip where the HUD marker of the game is shown for
+    HIGHLIGHT_VISIBLE_FOR seconds from every highlight time. A bar sweeps
+    across the top of the frame so the clip is not completely static.
+
+    Args:
+        file_name (str): The path to write the clip to.
+        game (str): Either "valorant" or "leagueoflegends".
+        highlight_times (list[float]): The times the marker appears.
+        duration (float): The length of the clip in seconds.
+        fps (int): The frame rate of the clip.
+        width (int): The width of the clip, the marker is drawn at 1080p and
+            the frame is resized when this differs.
+        height (int): The height of the clip.
+        seed (int): Seed for the background noise.
+        faststart (bool): If the index of the MP4 should be moved to the
+            start of the file so it can be decoded as it downloads.
+    Returns:
+        (str): The path to the clip.
+    """
+    background = _background(1920, 1080, seed)
+    highlight = _draw_marker(background, game)
+    process = subprocess.Popen(
+        [FFMPEG_BINARY, "-y", "-loglevel", "error", "-f", "rawvideo",
+         "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+         "-i", "-", "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo",
+         "-t", str(duration), "-c:v", "libx264", "-preset", "ultrafast",
+         "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest"] +
+        (["-movflags", "+faststart"] if faststart else []) + [file_name],
+        stdin=subprocess.PIPE)
+    try:
+        for index in range(int(round(duration * fps))):
+            frame_time = index / fps
+            visible = any(start <= frame_time < start + HIGHLIGHT_VISIBLE_FOR
+                          for start in highlight_times)
+            frame = (highlight if visible else background).copy()
+            bar = int(frame_time * 400) % (1920 - 100)
+            frame[40:80, bar:bar + 100] = 200
+            if (width, height) != (1920, 1080):
+                frame = cv2.resize(frame, (width, height),
+                                   interpolation=cv2.INTER_AREA)
+            process.stdin.write(frame.tobytes())
+    finally:
+        process.stdin.close()
+        process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to write {file_name}")
+    return file_name
@@ -0,0 +1,22 @@
+"""
+clip_batch.py
+
+Control script to edit a backlog of local clips into shorts without the
+discord bot, see clip_commands/clip_jobs/clip_batch.py for the options.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    Run from the root of the repository with
+    python taquitobot/clip_batch.py CLIPS, the same way as main.py.
+"""
+from clip_commands.clip_jobs.clip_batch import main
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,430 @@
+"""
+artifact_store.py
+
+Class implementation for a content addressed store of the artifacts produced
+by the clip pipeline, so a clip that is posted again short-circuits every
+stage. Downloaded clips are stored under the sha256 of their bytes and mapped
+from the url they were downloaded from, the highlight times found by the
+detectors and the rendered shorts are keyed by the hash of the clip they were
+made from.
+
+Attributes:
+    ARTIFACT_FOLDER (str): The path to the folder the artifacts are kept in.
+    ARTIFACT_STORE_BYTES (int): The default size in bytes the stored clips
+        and renders may take up.
+    STAGES (tuple[str, ...]): The pipeline stages hits and misses are
+        counted for.
+    MANIFEST_SECTIONS (tuple[str, ...]): The sections of the manifest.
+    MAX_HIGHLIGHTS (int): The number of highlight times kept, the least
+        recently used are dropped past it.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The pipeline stages run in different processes, so the manifest, along
+    with the hit and miss counters, is read and written under a file lock
+    on every operation (see locked_manifest). Lookups that change nothing
+    only take a shared lock and do not write it back.
+
+    A stored file can be evicted by another job as soon as the lock is let
+    go, so jobs pass their job folder and get a hard link to the file in it
+    (a copy when the store is on another file system), which stays usable
+    after the file is evicted.
+
+    Highlight times are kept in the order they were last used, JSON objects
+    keep their order, so the least recently used are the first ones.
+"""
+import contextlib
+import hashlib
+import os
+import shutil
+import time
+from .asset_cache import CACHE_FOLDER
+from .locked_manifest import locked_manifest
+
+ARTIFACT_FOLDER = os.path.join(CACHE_FOLDER, "artifacts/")
+ARTIFACT_STORE_BYTES = 4 * 1024 * 1024 * 1024
+STAGES = ("download", "detection", "render")
+MANIFEST_SECTIONS = ("urls", "files", "highlights", "renders", "render_games",
+                     "stats")
+MAX_HIGHLIGHTS = 10000
+
+
+class ArtifactStore:
+    """
+    An ArtifactStore keeps the downloaded clips, highlight times and rendered
+    shorts of the clip pipeline.
+
+    Args:
+        store_folder (str): The folder the artifacts are kept in. Defaults to
+            ARTIFACT_FOLDER.
+        max_bytes (int): The size in bytes the stored files may take up
+            before the least recently used are evicted. Defaults to
+            ARTIFACT_STORE_BYTES.
+    """
+    """
+    Private Attributes:
+        _manifest_file (str): The path to the JSON manifest. It maps urls to
+            clip hashes, clip hashes and detectors to highlight times, render
+            keys to the hashes of the renders and the games they are titled
+            with, and the hash of every stored
+            file to its name, size and the time it was last used. It also
+            holds the hit and miss counters of every stage.
+        _clip_hashes (dict[tuple[str, float, int], str]): The hashes of the
+            clips hashed by this store, keyed by path, mtime and size.
+    """
+
+    def __init__(self, store_folder: str = ARTIFACT_FOLDER,
+                 max_bytes: int = ARTIFACT_STORE_BYTES) -> None:
+        self._store_folder = store_folder
+        self._max_bytes = max_bytes
+        self._manifest_file = os.path.join(store_folder, "manifest.json")
+        self._clip_hashes = {}
+        os.makedirs(store_folder, exist_ok=True)
+
+    def get_hits(self, stage: str) -> int:
+        """
+        Method to access the number of lookups of a stage that were served
+        from the store, across every process using the store folder.
+
+        Args:
+            stage (str): One of STAGES.
+        Returns:
+            (int): The number of hits.
+        """
+        with self._manifest(write=False) as manifest:
+            return manifest["stats"].get(stage, {}).get("hits", 0)
+
+    def get_misses(self, stage: str) -> int:
+        """
+        Method to access the number of lookups of a stage that missed.
+
+        Args:
+            stage (str): One of STAGES.
+        Returns:
+            (int): The number of misses.
+        """
+        with self._manifest(write=False) as manifest:
+            return manifest["stats"].get(stage, {}).get("misses", 0)
+
+    def get_clip_hash(self, file_name: str) -> str:
+        """
+        Method to get the sha256 of a clip, a clip that has not changed since
+        it was last hashed by this store is not read again.
+
+        Args:
+            file_name (str): The path to the clip.
+        Returns:
+            (str): The hex digest of the clip.
+        """
+        stat = os.stat(file_name)
+        key = (os.path.abspath(file_name), stat.st_mtime, stat.st_size)
+        if key not in self._clip_hashes:
+            digest = hashlib.sha256()
+            with open(file_name, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            self._clip_hashes[key] = digest.hexdigest()
+        return self._clip_hashes[key]
+
+    def get_clip(self, url: str, job_folder: str | None = None) -> str | None:
+        """
+        Method to get the stored clip downloaded from a url.
+
+        Args:
+            url (str): The link the clip is downloaded from.
+            job_folder (str | None): The folder of the job using the clip,
+                the clip is linked into it so it is not lost if it is
+                evicted. None to use the clip in the store. Defaults to None.
+        Returns:
+            (str | None): The path to the clip, None if the clip is not in
+                the store.
+        """
+        with self._manifest() as manifest:
+            clip_hash = manifest["urls"].get(url)
+            return self._use(manifest=manifest, stage="download",
+                             content_hash=clip_hash, job_folder=job_folder)
+
+    def put_clip(self, url: str, file_name: str, keep: bool = False) -> str:
+        """
+        Method to move a downloaded clip into the store.
+
+        Args:
+            url (str): The link the clip was downloaded from.
+            file_name (str): The path to the downloaded clip, it is moved
+                into the store.
+            keep (bool): True to leave the downloaded clip where it is and
+                link it into the store, for a job that goes on using it.
+                Defaults to False.
+        Returns:
+            (str): The path to the stored clip, the downloaded clip if it is
+                kept.
+        """
+        clip_hash = self.get_clip_hash(file_name)
+        with self._manifest() as manifest:
+            stored_clip = self._add(manifest=manifest, content_hash=clip_hash,
+                                    file_name=file_name, move=not keep)
+            manifest["urls"][url] = clip_hash
+            return file_name if keep else stored_clip
+
+    def get_highlights(self, clip_hash: str,
+                       detector: str) -> list[float] | None:
+        """
+        Method to get the highlight times a detector found in a clip.
+
+        Args:
+            clip_hash (str): The hash of the clip.
+            detector (str): The name of the detector and any settings that
+                change its result.
+        Returns:
+            (list[float] | None): The highlight times, None if the clip has
+                not been searched by the detector.
+        """
+        stored = self.find_highlights(clip_hash=clip_hash,
+                                      detectors=[detector])
+        return None if stored is None else stored[1]
+
+    def find_highlights(self, clip_hash: str, detectors: list[str]
+                        ) -> tuple[str, list[float]] | None:
+        """
+        Method to get the highlight times of the first of several detectors
+        that has searched a clip, counted as a single lookup.
+
+        Args:
+            clip_hash (str): The hash of the clip.
+            detectors (list[str]): The names of the detectors in order of
+                preference.
+        Returns:
+            (tuple[str, list[float]] | None): The name of the detector and
+                its highlight times, None if none of the detectors has
+                searched the clip.
+        """
+        with self._manifest() as manifest:
+            for detector in detectors:
+                highlight_time = manifest["highlights"].pop(
+                    f"{clip_hash}:{detector}", None)
+                if highlight_time is not None:
+                    manifest["highlights"][f"{clip_hash}:{detector}"] = \
+                        highlight_time
+                    self._count(manifest=manifest, stage="detection",
+                                hit=True)
+                    return detector, highlight_time
+            self._count(manifest=manifest, stage="detection", hit=False)
+            return None
+
+    def put_highlights(self, clip_hash: str, detector: str,
+                       highlight_time: list[float]) -> None:
+        """
+        Method to store the highlight times a detector found in a clip,
+        dropping the least recently used past MAX_HIGHLIGHTS.
+
+        Args:
+            clip_hash (str): The hash of the clip.
+            detector (str): The name of the detector and any settings that
+                change its result.
+            highlight_time (list[float]): The highlight times.
+        """
+        with self._manifest() as manifest:
+            highlights = manifest["highlights"]
+            highlights.pop(f"{clip_hash}:{detector}", None)
+            highlights[f"{clip_hash}:{detector}"] = list(highlight_time)
+            for key in list(highlights)[:-MAX_HIGHLIGHTS]:
+                del highlights[key]
+
+    def get_render(self, render_key: str,
+                   job_folder: str | None = None) -> str | None:
+        """
+        Method to get a stored render.
+
+        Args:
+            render_key (str): The key of the render, made from the hash of
+                the clip and everything that changes the edit.
+            job_folder (str | None): The folder of the job using the render,
+                the render is linked into it so it is not lost if it is
+                evicted. None to use the render in the store. Defaults to
+                None.
+        Returns:
+            (str | None): The path to the render, None if it is not in the
+                store.
+        """
+        with self._manifest() as manifest:
+            render_hash = manifest["renders"].get(render_key)
+            return self._use(manifest=manifest, stage="render",
+                             content_hash=render_hash, job_folder=job_folder)
+
+    def get_render_game(self, render_key: str) -> str | None:
+        """
+        Method to get the game a stored render was titled with.
+
+        Args:
+            render_key (str): The key of the render.
+        Returns:
+            (str | None): The title of the game, None if the render was
+                stored without one.
+        """
+        with self._manifest(write=False) as manifest:
+            return manifest["render_games"].get(render_key)
+
+    def put_render(self, render_key: str, file_name: str,
+                   game_title: str | None = None) -> str:
+        """
+        Method to copy a render into the store, the render itself is left
+        where it is.
+
+        Args:
+            render_key (str): The key of the render.
+            file_name (str): The path to the render.
+            game_title (str | None): The game the render is titled with, None
+                to not record it. Defaults to None.
+        Returns:
+            (str): The path to the stored render.
+        """
+        render_hash = self.get_clip_hash(file_name)
+        with self._manifest() as manifest:
+            stored_render = self._add(manifest=manifest,
+                                      content_hash=render_hash,
+                                      file_name=file_name, move=False)
+            manifest["renders"][render_key] = render_hash
+            if game_title is not None:
+                manifest["render_games"][render_key] = game_title
+            return stored_render
+
+    def _use(self, manifest: dict, stage: str, content_hash: str | None,
+             job_folder: str | None) -> str | None:
+        """
+        Helper method to look up a stored file, counting the hit or miss and
+        marking the file as used.
+
+        Args:
+            manifest (dict): The manifest, updated in place.
+            stage (str): The stage the lookup is for.
+            content_hash (str | None): The hash of the file.
+            job_folder (str | None): The folder the file is linked into, None
+                to not link it.
+        Returns:
+            (str | None): The path to the file, None if it is not stored.
+        """
+        entry = manifest["files"].get(content_hash)
+        if entry is not None and not os.path.exists(
+                os.path.join(self._store_folder, entry["file"])):
+            self._remove(manifest=manifest, content_hash=content_hash)
+            entry = None
+        self._count(manifest=manifest, stage=stage, hit=entry is not None)
+        if entry is None:
+            return None
+        entry["last_used"] = time.time()
+        stored_file = os.path.join(self._store_folder, entry["file"])
+        if job_folder is None:
+            return stored_file
+        job_file = os.path.join(job_folder, entry["file"])
+        self._link(file_name=stored_file, destination=job_file)
+        return job_file
+
+    def _add(self, manifest: dict, content_hash: str, file_name: str,
+             move: bool) -> str:
+        """
+        Helper method to add a file to the store under its hash and evict the
+        least recently used files that do not fit in the budget.
+
+        Args:
+            manifest (dict): The manifest, updated in place.
+            content_hash (str): The hash of the file.
+            file_name (str): The path to the file.
+            move (bool): True to move the file into the store, False to link
+                it.
+        Returns:
+            (str): The path to the stored file.
+        """
+        stored_name = content_hash + os.path.splitext(file_name)[1]
+        stored_file = os.path.join(self._store_folder, stored_name)
+        if os.path.exists(stored_file):
+            if move:
+                os.remove(file_name)
+        elif move:
+            shutil.move(file_name, stored_file)
+        else:
+            self._link(file_name=file_name, destination=stored_file)
+        manifest["files"][content_hash] = {
+            "file": stored_name, "bytes": os.path.getsize(stored_file),
+            "last_used": time.time()}
+
+        total = sum(entry["bytes"] for entry in manifest["files"].values())
+        for evict_hash in sorted(
+                manifest["files"],
+                key=lambda h: manifest["files"][h]["last_used"]):
+            if total <= self._max_bytes:
+                break
+            if evict_hash != content_hash:
+                total -= manifest["files"][evict_hash]["bytes"]
+                self._remove(manifest=manifest, content_hash=evict_hash)
+        return stored_file
+
+    def _link(self, file_name: str, destination: str) -> None:
+        """
+        Helper method to hard link a file to a new path, or copy it when the
+        path is on another file system. The new path only appears once it is
+        complete.
+
+        Args:
+            file_name (str): The path to the file.
+            destination (str): The path to link the file to.
+        """
+        temporary_file = f"{destination}.{os.getpid()}.tmp"
+        try:
+            os.link(file_name, temporary_file)
+        except OSError:
+            shutil.copyfile(file_name, temporary_file)
+        os.replace(temporary_file, destination)
+
+    def _remove(self, manifest: dict, content_hash: str) -> None:
+        """
+        Helper method to remove a stored file and every url and render that
+        points to it. Highlight times stay valid if the clip is downloaded
+        again, so they are kept until they fall past MAX_HIGHLIGHTS.
+
+        Args:
+            manifest (dict): The manifest, updated in place.
+            content_hash (str): The hash of the file.
+        """
+        entry = manifest["files"].pop(content_hash)
+        stored_file = os.path.join(self._store_folder, entry["file"])
+        if os.path.exists(stored_file):
+            os.remove(stored_file)
+        for mapping in (manifest["urls"], manifest["renders"]):
+            for key in [key for key, value in mapping.items()
+                        if value == content_hash]:
+                del mapping[key]
+                manifest["render_games"].pop(key, None)
+
+    def _count(self, manifest: dict, stage: str, hit: bool) -> None:
+        """
+        Helper method to count a hit or a miss for a stage.
+
+        Args:
+            manifest (dict): The manifest, updated in place.
+            stage (str): The stage the lookup was for.
+            hit (bool): True for a hit, False for a miss.
+        """
+        counters = manifest["stats"].setdefault(stage,
+                                                {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += 1
+
+    def _manifest(self, write: bool = True
+                  ) -> contextlib.AbstractContextManager[dict]:
+        """
+        Helper method to open the manifest under its lock, see
+        locked_manifest.
+
+        Args:
+            write (bool): False to only read the manifest. Defaults to True.
+        Returns:
+            (contextlib.AbstractContextManager[dict]): The context manager
+                yielding the manifest.
+        """
+        return locked_manifest(manifest_file=self._manifest_file,
+                               sections=MANIFEST_SECTIONS, write=write)
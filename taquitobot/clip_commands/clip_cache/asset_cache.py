@@ -0,0 +1,183 @@
+"""
+asset_cache.py
+
+Class implementation for a size bounded on-disk cache of files derived from
+the assets the clip editor reuses, such as the songs in the music folder. A
+derived file is built once and reused until its source file changes, and the
+least recently used files are evicted when the cache grows past its budget.
+
+Attributes:
+    CACHE_FOLDER (str): The path to the folder the cached files are kept in.
+    MANIFEST_NAME (str): The name of the JSON manifest describing the cached
+        files.
+    IN_USE_SECONDS (float): The default time in seconds after a file is
+        looked up during which it is not evicted, as a render may still be
+        using it.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    Clip jobs run in separate processes, so the manifest is read and written
+    under a file lock on every lookup (see locked_manifest), and files are
+    always written to a temporary name and renamed, a reader never sees a
+    half written file.
+"""
+import contextlib
+import hashlib
+import os
+import time
+from collections.abc import Callable
+from .locked_manifest import locked_manifest
+
+CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "cache/")
+MANIFEST_NAME = "manifest.json"
+IN_USE_SECONDS = 600.0
+
+
+class AssetCache:
+    """
+    An AssetCache maps a source file and a variant describing how it was
+    processed to a derived file in the cache folder.
+
+    Args:
+        cache_folder (str): The folder the derived files are kept in.
+        max_bytes (int): The total size in bytes the derived files may take
+            up before the least recently used are evicted.
+        in_use_seconds (float): The time after a lookup during which the
+            file is not evicted. Defaults to IN_USE_SECONDS.
+    """
+    """
+    Private Attributes:
+        _in_use_seconds (float): The time after a lookup during which the
+            file is not evicted.
+        _manifest_file (str): The path to the JSON manifest, keyed by cache
+            key with the source, its mtime and size, the derived file, its
+            size and the time it was last used.
+        _hits (int): The number of lookups served from the cache.
+        _misses (int): The number of lookups that had to build the file.
+    """
+
+    def __init__(self, cache_folder: str, max_bytes: int,
+                 in_use_seconds: float = IN_USE_SECONDS) -> None:
+        self._cache_folder = cache_folder
+        self._max_bytes = max_bytes
+        self._in_use_seconds = in_use_seconds
+        self._manifest_file = os.path.join(cache_folder, MANIFEST_NAME)
+        self._hits = 0
+        self._misses = 0
+        os.makedirs(cache_folder, exist_ok=True)
+
+    def get_hits(self) -> int:
+        """
+        Method to access the number of lookups served from the cache.
+
+        Returns:
+            (int): The number of cache hits.
+        """
+        return self._hits
+
+    def get_misses(self) -> int:
+        """
+        Method to access the number of lookups that built the file.
+
+        Returns:
+            (int): The number of cache misses.
+        """
+        return self._misses
+
+    def get(self, source: str, variant: str, extension: str,
+            build: Callable[[str, str], None]) -> str:
+        """
+        Method to get the derived file for a source, building it if it is not
+        in the cache or the source has changed since it was built.
+
+        Args:
+            source (str): The path to the source file.
+            variant (str): A description of how the file is derived, part of
+                the cache key so different variants of a source are kept
+                apart.
+            extension (str): The file extension of the derived file.
+            build (Callable[[str, str], None]): Called with the source and
+                the path to write the derived file to on a miss.
+        Returns:
+            (str): The path to the derived file.
+        """
+        source = os.path.abspath(source)
+        stat = os.stat(source)
+        key = hashlib.sha1(f"{source}\n{variant}".encode()).hexdigest()
+        with self._manifest() as manifest:
+            entry = manifest.get(key)
+            if entry is not None and entry["mtime"] == stat.st_mtime and \
+                    entry["size"] == stat.st_size and os.path.exists(
+                        os.path.join(self._cache_folder, entry["file"])):
+                self._hits += 1
+                entry["last_used"] = time.time()
+                return os.path.join(self._cache_folder, entry["file"])
+
+        # Built outside the lock so other lookups are not held up, two
+        # processes missing at once both build and the last one wins.
+        self._misses += 1
+        stem = os.path.splitext(os.path.basename(source))[0]
+        file = f"{stem}-{key[:12]}{extension}"
+        temporary_file = os.path.join(self._cache_folder,
+                                      f"{key}.{os.getpid()}.tmp{extension}")
+        try:
+            build(source, temporary_file)
+            with self._manifest() as manifest:
+                os.replace(temporary_file,
+                           os.path.join(self._cache_folder, file))
+                manifest[key] = {
+                    "source": source, "mtime": stat.st_mtime,
+                    "size": stat.st_size, "file": file,
+                    "bytes": os.path.getsize(
+                        os.path.join(self._cache_folder, file)),
+                    "last_used": time.time()}
+                self._evict(manifest=manifest, keep=key)
+        finally:
+            if os.path.exists(temporary_file):
+                os.remove(temporary_file)
+        return os.path.join(self._cache_folder, file)
+
+    def _evict(self, manifest: dict, keep: str) -> None:
+        """
+        Helper method to remove the least recently used files until the cache
+        is within its budget. The file that was just looked up is never
+        evicted even if it is larger than the budget on its own, and neither
+        is a file looked up in the last _in_use_seconds, since a render in
+        another process may be about to open it, so the cache can go over
+        its budget for a while.
+
+        Args:
+            manifest (dict): The manifest, updated in place.
+            keep (str): The cache key that must stay in the cache.
+        """
+        total = sum(entry["bytes"] for entry in manifest.values())
+        in_use_since = time.time() - self._in_use_seconds
+        for key in sorted(manifest, key=lambda k: manifest[k]["last_used"]):
+            if total <= self._max_bytes or \
+                    manifest[key]["last_used"] > in_use_since:
+                break
+            if key == keep:
+                continue
+            entry = manifest.pop(key)
+            total -= entry["bytes"]
+            file = os.path.join(self._cache_folder, entry["file"])
+            if os.path.exists(file):
+                os.remove(file)
+
+    def _manifest(self) -> contextlib.AbstractContextManager[dict]:
+        """
+        Helper method to open the manifest under its lock, see
+        locked_manifest.
+
+        Returns:
+            (contextlib.AbstractContextManager[dict]): The context manager
+                yielding the manifest.
+        """
+        return locked_manifest(manifest_file=self._manifest_file)
@@ -0,0 +1,103 @@
+"""
+facecam_cache.py
+
+Class implementation for a cache of the facecam clips prepared for the
+overlay. The facecam is overlaid at the centre top of the edited clip at its
+own size, so only the part that lands inside the frame is ever seen. Every
+facecam clip is transcoded once to that visible part at the output frame
+rate and pixel format, so renders no longer decode, convert and crop the
+full resolution facecam on every clip.
+
+Attributes:
+    FACECAM_CACHE_FOLDER (str): The path to the folder the prepared facecam
+        clips are kept in.
+    FACECAM_CACHE_BYTES (int): The default size in bytes the prepared facecam
+        clips may take up.
+    FACECAM_CRF (int): The x264 constant rate factor the facecam clips are
+        stored with, low enough that the extra generation is not visible.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+
+"""
+import os
+import subprocess
+from moviepy.config import get_setting
+from .asset_cache import AssetCache, CACHE_FOLDER
+from .song_cache import AUDIO_CODEC, AUDIO_FPS
+
+FACECAM_CACHE_FOLDER = os.path.join(CACHE_FOLDER, "facecam_clips/")
+FACECAM_CACHE_BYTES = 1024 * 1024 * 1024
+FACECAM_CRF = 12
+
+
+class FacecamCache:
+    """
+    A FacecamCache keeps a copy of every facecam clip that has been used,
+    prepared for the overlay.
+
+    Args:
+        cache_folder (str): The folder the prepared clips are kept in.
+            Defaults to FACECAM_CACHE_FOLDER.
+        max_bytes (int): The size in bytes the prepared clips may take up.
+            Defaults to FACECAM_CACHE_BYTES.
+    """
+    """
+    Private Attributes:
+        _asset_cache (AssetCache): The cache holding the prepared clips.
+    """
+
+    def __init__(self, cache_folder: str = FACECAM_CACHE_FOLDER,
+                 max_bytes: int = FACECAM_CACHE_BYTES) -> None:
+        self._asset_cache = AssetCache(cache_folder=cache_folder,
+                                       max_bytes=max_bytes)
+
+    def get_asset_cache(self) -> AssetCache:
+        """
+        Method to access the cache holding the prepared clips.
+
+        Returns:
+            (AssetCache): The asset cache.
+        """
+        return self._asset_cache
+
+    def get_clip(self, facecam_clip: str, width: int, height: int,
+                 fps: int) -> str:
+        """
+        Method to get the facecam clip prepared for an output, transcoding it
+        on the first use or when the facecam file has changed. The clip is
+        cropped to the part that is visible when it is overlaid at the
+        centre top of a frame of the given size.
+
+        Args:
+            facecam_clip (str): The path to the clip in the facecam folder.
+            width (int): The width of the output in pixels.
+            height (int): The height of the output in pixels.
+            fps (int): The frame rate of the output.
+        Returns:
+            (str): The path to the prepared clip.
+        """
+        def transcode(source: str, file_name: str) -> None:
+            subprocess.run([get_setting("FFMPEG_BINARY"), "-y",
+                            "-loglevel", "error", "-i", source,
+                            "-vf", f"crop=w='min(iw,{width})':"
+                                   f"h='min(ih,{height})':"
+                                   f"x='(iw-min(iw,{width}))/2':y=0,"
+                                   f"fps={fps},format=yuv420p",
+                            "-c:v", "libx264", "-preset", "veryfast",
+                            "-crf", str(FACECAM_CRF),
+                            "-c:a", AUDIO_CODEC, "-ar", str(AUDIO_FPS),
+                            file_name],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                           check=True)
+
+        return self._asset_cache.get(
+            source=facecam_clip,
+            variant=f"{width}x{height} {fps} yuv420p crf {FACECAM_CRF}",
+            extension=".mp4", build=transcode)
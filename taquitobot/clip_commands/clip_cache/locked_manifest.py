@@ -0,0 +1,73 @@
+"""
+locked_manifest.py
+
+Function implementation of the JSON manifest shared by the caches of the
+clip pipeline. The pipeline stages run in different processes, so the
+manifest is read under a file lock and written back atomically, and only
+when it has changed, so lookups that find nothing to update do not rewrite
+it.
+
+Attributes:
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The lock uses fcntl and is skipped where fcntl is not available. Reads
+    take a shared lock so any number of processes can read at once, writes
+    take an exclusive lock.
+"""
+import contextlib
+import json
+import os
+from collections.abc import Iterator
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextlib.contextmanager
+def locked_manifest(manifest_file: str, sections: tuple[str, ...] = (),
+                    write: bool = True) -> Iterator[dict]:
+    """
+    Context manager to read a JSON manifest under its lock and write it back
+    atomically when the block finishes without an error and the manifest
+    has changed. A missing or corrupt manifest is read as empty.
+
+    Args:
+        manifest_file (str): The path to the manifest.
+        sections (tuple[str, ...]): The keys of the manifest that hold a
+            dict, they are added when they are missing. Defaults to none.
+        write (bool): False to only read the manifest under a shared lock,
+            changes made to it are not saved. Defaults to True.
+    Yields:
+        (dict): The manifest.
+    """
+    with open(manifest_file + ".lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+        try:
+            with open(manifest_file, "r") as f:
+                saved = f.read()
+            manifest = json.loads(saved)
+        except (OSError, ValueError):
+            saved = ""
+            manifest = {}
+        for section in sections:
+            manifest.setdefault(section, {})
+
+        yield manifest
+
+        if write:
+            contents = json.dumps(manifest)
+            if contents != saved:
+                temporary_file = f"{manifest_file}.{os.getpid()}.tmp"
+                with open(temporary_file, "w") as f:
+                    f.write(contents)
+                os.replace(temporary_file, manifest_file)
@@ -0,0 +1,223 @@
+"""
+media_index.py
+
+Class implementation for a persistent index of a media folder, such as the
+music folder or the facecam folder. The index records the start timestamp
+parsed from the name of every file along with its duration, codec, mtime and
+size, so clips can be chosen without listing the folder, parsing names or
+opening the files. The index is kept in a compact JSON file and is updated
+incrementally, only new or changed files are probed.
+
+Attributes:
+    MEDIA_INDEX_FOLDER (str): The path to the folder the index files are
+        kept in.
+    TIMESTAMP_PATTERN (str): The regular expression matching the timestamp in
+        a file name, with the decimal replaced with a dollar sign ($).
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The folder is only scanned when its mtime changes, which happens when a
+    file is added, removed or renamed. A file that is overwritten in place
+    is picked up by calling refresh with force set.
+"""
+import bisect
+import json
+import os
+import random
+import re
+import subprocess
+from moviepy.config import get_setting
+from .asset_cache import CACHE_FOLDER
+
+MEDIA_INDEX_FOLDER = os.path.join(CACHE_FOLDER, "media_index/")
+TIMESTAMP_PATTERN = r'(\d+\$\d+)'
+
+
+class MediaIndex:
+    """
+    A MediaIndex keeps the metadata of every file in a media folder and
+    chooses files from it at random.
+
+    Args:
+        folder (str): The path to the media folder.
+        index_file (str): The path to the JSON index, None to keep it in
+            MEDIA_INDEX_FOLDER named after the folder. Defaults to None.
+    """
+    """
+    Private Attributes:
+        _folder_mtime (float): The mtime of the folder when it was last
+            scanned.
+        _entries (dict[str, dict]): The metadata of every file keyed by file
+            name, with the start time, duration, codec, mtime and size. The
+            start time and duration are None for a file without a timestamp
+            in its name or that is not media.
+        _choices (list[str]): The names of the files that can be chosen,
+            sorted by the time left in the file after its timestamp.
+        _tails (list[float]): The time left after the timestamp of every
+            file in _choices, in the same order.
+    """
+
+    def __init__(self, folder: str, index_file: str | None = None) -> None:
+        self._folder = folder
+        if index_file is None:
+            index_file = os.path.join(
+                MEDIA_INDEX_FOLDER,
+                os.path.basename(os.path.normpath(folder)) + ".json")
+        self._index_file = index_file
+        self._folder_mtime = None
+        self._entries = {}
+        self._choices = []
+        self._tails = []
+        self._load()
+        self.refresh()
+
+    def get_entries(self) -> dict[str, dict]:
+        """
+        Method to access the metadata of the files in the folder.
+
+        Returns:
+            (dict[str, dict]): The metadata keyed by file name.
+        """
+        return self._entries
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Method to bring the index up to date with the folder. Files that
+        were added or changed are probed and files that were removed are
+        dropped, the rest are kept as they are.
+
+        Args:
+            force (bool): Scan the folder even if its mtime has not changed.
+                Defaults to False.
+        Returns:
+            (bool): True if the index changed, False otherwise.
+        """
+        try:
+            folder_mtime = os.stat(self._folder).st_mtime
+        except FileNotFoundError:
+            folder_mtime = None
+        if folder_mtime == self._folder_mtime and not force:
+            return False
+
+        entries = {}
+        changed = False
+        if folder_mtime is not None:
+            with os.scandir(self._folder) as files:
+                for file in files:
+                    if not file.is_file():
+                        continue
+                    stat = file.stat()
+                    entry = self._entries.get(file.name)
+                    if entry is None or entry["mtime"] != stat.st_mtime or \
+                            entry["size"] != stat.st_size:
+                        entry = self._probe(file=file.path)
+                        entry.update(mtime=stat.st_mtime, size=stat.st_size)
+                        changed = True
+                    entries[file.name] = entry
+        changed = changed or entries.keys() != self._entries.keys()
+
+        self._entries = entries
+        self._folder_mtime = folder_mtime
+        self._sort_choices()
+        self._save()
+        return changed
+
+    def choose(self, min_length: float = 0.0) -> tuple[str, float] | None:
+        """
+        Method to choose a random file that has at least min_length seconds
+        after its timestamp. The files are kept sorted by that length, so the
+        files that are long enough are found with a binary search and no
+        file is opened.
+
+        Args:
+            min_length (float): The time in seconds that the file must run
+                for after its timestamp. Defaults to 0.
+        Returns:
+            (tuple[str, float] | None): The path to the file and its
+                timestamp in seconds, None if no file is long enough.
+        """
+        first = bisect.bisect_left(self._tails, min_length)
+        if first == len(self._choices):
+            return None
+        name = self._choices[random.randrange(first, len(self._choices))]
+        return (os.path.join(self._folder, name),
+                self._entries[name]["start_time"])
+
+    def _probe(self, file: str) -> dict:
+        """
+        Helper method to read the metadata of a file. The timestamp comes
+        from the file name and the duration and codec of the first stream
+        from ffmpeg.
+
+        Args:
+            file (str): The path to the file.
+        Returns:
+            (dict): The start time, duration and codec of the file.
+        """
+        timestamp = re.search(TIMESTAMP_PATTERN, os.path.basename(file))
+        start_time = None
+        if timestamp is not None:
+            start_time = float(timestamp.group(1).replace('$', '.'))
+
+        process = subprocess.run([get_setting("FFMPEG_BINARY"),
+                                  "-hide_banner", "-i", file],
+                                 stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, text=True,
+                                 errors="replace")
+        duration = re.search(r'Duration: (\d+):(\d+):(\d+\.\d+)',
+                             process.stderr)
+        codec = re.search(r'Stream #.*?: (?:Audio|Video): (\w+)',
+                          process.stderr)
+        if duration is not None:
+            hours, minutes, seconds = duration.groups()
+            duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        return {"start_time": start_time, "duration": duration,
+                "codec": codec.group(1) if codec is not None else None}
+
+    def _sort_choices(self) -> None:
+        """
+        Helper method to sort the files that can be chosen by the time left
+        after their timestamp.
+        """
+        choices = sorted(
+            (entry["duration"] - entry["start_time"], name)
+            for name, entry in self._entries.items()
+            if entry["start_time"] is not None and
+            entry["duration"] is not None)
+        self._tails = [tail for tail, _ in choices]
+        self._choices = [name for _, name in choices]
+
+    def _load(self) -> None:
+        """
+        Helper method to read the index, a missing or corrupt index is
+        rebuilt from the folder.
+        """
+        try:
+            with open(self._index_file, "r") as f:
+                index = json.load(f)
+            if index["folder"] == os.path.abspath(self._folder):
+                self._folder_mtime = index["folder_mtime"]
+                self._entries = index["entries"]
+                self._sort_choices()
+        except (OSError, ValueError, KeyError):
+            self._folder_mtime = None
+            self._entries = {}
+
+    def _save(self) -> None:
+        """
+        Helper method to atomically write the index.
+        """
+        os.makedirs(os.path.dirname(self._index_file), exist_ok=True)
+        temporary_file = f"{self._index_file}.{os.getpid()}.tmp"
+        with open(temporary_file, "w") as f:
+            json.dump({"folder": os.path.abspath(self._folder),
+                       "folder_mtime": self._folder_mtime,
+                       "entries": self._entries}, f,
+                      separators=(",", ":"))
+        os.replace(temporary_file, self._index_file)
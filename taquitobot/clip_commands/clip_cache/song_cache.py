@@ -0,0 +1,100 @@
+"""
+song_cache.py
+
+Class implementation for a cache of the songs in the music folder, stored in
+the codec and sample rate of the edited clips. Every song is decoded and
+encoded once, starting a fixed time before its beat drop, so a render can
+stream copy the window it needs from the cached copy.
+
+Attributes:
+    SONG_CACHE_FOLDER (str): The path to the folder the cached songs are kept
+        in.
+    SONG_CACHE_BYTES (int): The default size in bytes the cached songs may
+        take up.
+    SONG_PRE_ROLL (float): The time in seconds before the beat drop the
+        cached song starts, longer than the time a highlight can be into a
+        clip so the window can always be cut from the cached song.
+    AUDIO_CODEC (str): The codec the songs are stored in, the audio codec of
+        the edited clips.
+    AUDIO_FPS (int): The sample rate the songs are stored at.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    Mp3 frames can be cut on their own, so a stream copied window starts
+    within one frame (about 26 ms) of the beat drop alignment.
+"""
+import os
+import subprocess
+from moviepy.config import get_setting
+from .asset_cache import AssetCache, CACHE_FOLDER
+
+SONG_CACHE_FOLDER = os.path.join(CACHE_FOLDER, "songs/")
+SONG_CACHE_BYTES = 512 * 1024 * 1024
+SONG_PRE_ROLL = 60
+AUDIO_CODEC = "libmp3lame"
+AUDIO_FPS = 44100
+
+
+class SongCache:
+    """
+    A SongCache keeps an encoded copy of every song that has been used.
+
+    Args:
+        cache_folder (str): The folder the cached songs are kept in. Defaults
+            to SONG_CACHE_FOLDER.
+        max_bytes (int): The size in bytes the cached songs may take up.
+            Defaults to SONG_CACHE_BYTES.
+    """
+    """
+    Private Attributes:
+        _asset_cache (AssetCache): The cache holding the encoded songs.
+    """
+
+    def __init__(self, cache_folder: str = SONG_CACHE_FOLDER,
+                 max_bytes: int = SONG_CACHE_BYTES) -> None:
+        self._asset_cache = AssetCache(cache_folder=cache_folder,
+                                       max_bytes=max_bytes)
+
+    def get_asset_cache(self) -> AssetCache:
+        """
+        Method to access the cache holding the encoded songs.
+
+        Returns:
+            (AssetCache): The asset cache.
+        """
+        return self._asset_cache
+
+    def get_track(self, song_name: str, beat_drop: float) -> tuple[str, float]:
+        """
+        Method to get the cached copy of a song, encoding it on the first
+        use or when the song file has changed.
+
+        Args:
+            song_name (str): The path to the song in the music folder.
+            beat_drop (float): The time of the beat drop in the song in
+                seconds.
+        Returns:
+            (tuple[str, float]): The path to the cached song and the time in
+                the original song that the cached song starts at.
+        """
+        start = max(0.0, beat_drop - SONG_PRE_ROLL)
+
+        def encode(source: str, file_name: str) -> None:
+            subprocess.run([get_setting("FFMPEG_BINARY"), "-y",
+                            "-loglevel", "error", "-ss", f"{start:.3f}",
+                            "-i", source, "-vn", "-map_metadata", "-1",
+                            "-ac", "2", "-ar", str(AUDIO_FPS),
+                            "-c:a", AUDIO_CODEC, file_name],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                           check=True)
+
+        cached_song = self._asset_cache.get(
+            source=song_name, variant=f"{AUDIO_CODEC} {AUDIO_FPS} {start:.3f}",
+            extension=".mp3", build=encode)
+        return cached_song, start
@@ -18,10 +18,15 @@ Notes:
     of variables in the design process as well as to assist with remembering 
     for future updates.
 """
+import asyncio
 import os
-import requests
+import threading
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from typing import Protocol
+from ..clip_metrics.pipeline_metrics import get_metrics
+from .clip_stream import ClipStream
+from .stream_downloader import StreamDownloader
 
 class VideoDownloader(Protocol):
     """
@@ -56,6 +61,8 @@ class ClipDownloaderWebLinkAbstract(ABC, VideoDownloader):
     Args:
         link (str): The link to the file on the internet as a string. Defaults
             to an empty string.
+        download_folder (str): The folder the video is downloaded to.
+            Defaults to an empty string for the current directory.
     
     Attributes:
 
@@ -63,35 +70,120 @@ class ClipDownloaderWebLinkAbstract(ABC, VideoDownloader):
     """
     Private Attributes:
         _web_link (str): The link to the web page
+        _download_folder (str): The folder the video is downloaded to.
     """
-    def __init__(self, link="") -> None:
+    def __init__(self, link="", download_folder: str = "") -> None:
         self._file_name = ""
         self._web_link = link
+        self._download_folder = download_folder
         super.__init__()
 
     def download_video(self) -> str:
         """
         Overrides the method from parent class to download the video,
         downloads video from the given link from abstract method or link 
-        given in the constructor.
+        given in the constructor. Blocks until the download is complete, runs
+        the async download on its own event loop so it is safe to call from a
+        worker thread.
 
         Args:
 
         Returns:
             file_name (str): The name of the file as a string where the video
                 was downloaded to.
+
+        Raises:
+            DownloadException: If the video could not be downloaded.
+        """
+        return self._run_download()
+
+    def stream_video(self) -> ClipStream:
+        """
+        Method to start downloading the video in a background thread and
+        return at once, so the video can be read while it downloads.
+
+        Returns:
+            (ClipStream): The stream following the download, wait on it for
+                the name of the file the video was downloaded to.
         """
-        self._file_name = os.path.basename(self._web_link)
+        video_stream = ClipStream(file_name=self._get_download_path())
 
-        r = requests.get(self._web_link)
+        def download() -> None:
+            try:
+                self._run_download(progress=video_stream.progress)
+            except Exception as error:
+                video_stream.finish(error=error)
+            else:
+                video_stream.finish()
 
-        with open(self._file_name, 'wb') as f:
-            for chunk in r.iter_content(chunk_size=1024*1024):
-                if chunk:
-                    f.write(chunk)
+        threading.Thread(target=download, daemon=True).start()
+        return video_stream
+
+    async def download_video_async(
+            self, progress: Callable[[int], None] | None = None) -> str:
+        """
+        Streams the video from the given link straight to disk, resuming with
+        HTTP Range requests if the transfer is interrupted.
 
+        Args:
+            progress (Callable[[int], None]): Called with the number of bytes
+                on disk as the video downloads. Defaults to None.
+        Returns:
+            file_name (str): The name of the file as a string where the video
+                was downloaded to.
+
+        Raises:
+            DownloadException: If the video could not be downloaded.
+        """
+        self._file_name = self._get_download_path()
+        downloader = StreamDownloader(url=self._web_link,
+                                      file_name=self._file_name,
+                                      progress=progress)
+        await downloader.download()
         return self._file_name
 
+    def _run_download(
+            self, progress: Callable[[int], None] | None = None) -> str:
+        """
+        Helper method to run the async download on its own event loop and
+        record its time and size.
+
+        Args:
+            progress (Callable[[int], None]): Called with the number of bytes
+                on disk as the video downloads. Defaults to None.
+        Returns:
+            (str): The path the video was downloaded to.
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            with get_metrics().timer("download"):
+                file_name = loop.run_until_complete(
+                    self.download_video_async(progress=progress))
+        finally:
+            loop.close()
+        get_metrics().add(counter="bytes", stage="download",
+                          amount=os.path.getsize(file_name))
+        return file_name
+
+    def _get_download_path(self) -> str:
+        """
+        Helper method to get the path the video is downloaded to.
+
+        Returns:
+            (str): The path in the download folder named after the link.
+        """
+        return os.path.join(self._download_folder,
+                            os.path.basename(self._web_link))
+
+    def get_web_link(self) -> str:
+        """
+        Method to access the link the video is downloaded from.
+
+        Returns:
+            (str): The link to the video on the web.
+        """
+        return self._web_link
+
     def get_file_name(self) -> str:
         """
         Method to access the file name attribute.
@@ -21,9 +21,9 @@ Notes:
     for future updates.
 """
 import re
-import requests
-from bs4 import BeautifulSoup
+from ..clip_metrics.pipeline_metrics import get_metrics
 from .clip_downloader_abstract import ClipDownloaderWebLinkAbstract
+from .outplayed_resolver import get_resolver
 
 OUTPLAYED_PATTERN = r"https://outplayed\.tv/.*"
 
@@ -37,6 +37,8 @@ class ClipDownloaderDiscord(ClipDownloaderWebLinkAbstract):
     Args:
         discord_message (str): The discord message that was sent to trigger 
             this code as a string.
+        download_folder (str): The folder the video is downloaded to.
+            Defaults to an empty string for the current directory.
     """
     """
     Private Attributes:
@@ -46,11 +48,13 @@ class ClipDownloaderDiscord(ClipDownloaderWebLinkAbstract):
             posted url as a string.
         _web_link (str): The link to the video on the web.
     """
-    def __init__(self, discord_message: str) -> None:
+    def __init__(self, discord_message: str,
+                 download_folder: str = "") -> None:
         self._video_title = re.sub(OUTPLAYED_PATTERN, "", discord_message, 
                                   re.IGNORECASE).replace('\n', '')
         self._game_title = ""
         self._web_link = ""
+        self._download_folder = download_folder
         self._modify_web_link(discord_message)
     
     def get_game_title(self) -> str:
@@ -81,44 +85,6 @@ class ClipDownloaderDiscord(ClipDownloaderWebLinkAbstract):
             provoke this process.
         """
         video_url = re.search(OUTPLAYED_PATTERN, discord_message).group()
-        url_string = requests.get(video_url)
-        html = url_string.text
-        soup = BeautifulSoup(html, "html.parser")
-
-        video_tag = soup.find("video")
-        self._web_link = video_tag["src"]
-        title_tag = soup.find("title")
-        outplayed_tag = title_tag.get_text().split("|")
-        try:
-            self._game_title = outplayed_tag[0].split("#")[1].replace(" ", "")
-        except:
-            self._game_title = "Valorant"
-        return 
-    
-    def _get_mp4_link(self, soup: BeautifulSoup):
-        """
-        Helper function to get the mp4 link from the BeautifulSoup parsed 
-        html.
-
-        Args:
-            soup (BeautifulSoup): BeautifulSoup parsed html to find the video 
-                link from.
-        """
-        video_tag = soup.find("video")
-        self._web_link = video_tag["src"]
-        
-    def _get_game_title(self, soup: BeautifulSoup):
-        """
-        Helper function to get the game title from the BeautifulSoup parsed 
-        html.
-
-        Args:
-            soup (BeautifulSoup): BeautifulSoup parsed html to find the game 
-                title from.
-        """
-        title_tag = soup.find("title")
-        outplayed_tag = title_tag.get_text().split("|")
-        try:
-            self._game_title = outplayed_tag[0].split("#")[1].replace(" ", "")
-        except:
-            self._game_title = "Valorant"
+        with get_metrics().timer("page_fetch"):
+            self._web_link, self._game_title = \
+                get_resolver().resolve(video_url)
@@ -0,0 +1,22 @@
+# =============================================================================
+#
+# Title: clip_downloader_exceptions.py
+#
+# Author: Aidan
+#
+# Description: File to describe all exceptions related to downloading clips.
+#
+# =============================================================================
+
+# =============================================================================
+#
+#                                     Classes
+#
+# =============================================================================
+
+
+class DownloadException(Exception):
+    """
+    A DownloadException is a subclass of an Exception to describe an issue with downloading a clip from the web.
+    """
+    pass
@@ -0,0 +1,71 @@
+"""
+clip_downloader_link.py
+
+Class implementation for a ClipDownloaderLink to download a clip from a link
+to the video that has already been resolved, along with the titles found
+with it, so the outplayed.tv page does not have to be fetched again.
+
+Attributes:
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The clip job executor resolves the outplayed.tv link in its thread pool,
+    where the resolver cache and connection pool are shared, and hands the
+    link to the video to the process pool, which streams it with this class.
+"""
+from .clip_downloader_abstract import ClipDownloaderWebLinkAbstract
+
+
+class ClipDownloaderLink(ClipDownloaderWebLinkAbstract):
+    """
+    Class to download a clip straight from the link to the video.
+
+    Args:
+        web_link (str): The link to the video on the web.
+        game_title (str): The title of the game of the clip.
+        video_title (str): The title of the video set by the user.
+        download_folder (str): The folder the video is downloaded to.
+            Defaults to an empty string for the current directory.
+    """
+    """
+    Private Attributes:
+        _video_title (str): The title of the video set by the user.
+        _game_title (str): The title of the game of the clip.
+    """
+    def __init__(self, web_link: str, game_title: str, video_title: str,
+                 download_folder: str = "") -> None:
+        self._file_name = ""
+        self._web_link = web_link
+        self._game_title = game_title
+        self._video_title = video_title
+        self._download_folder = download_folder
+
+    def get_game_title(self) -> str:
+        """
+        Method to get the title of the game that is being clipped.
+
+        Returns:
+            (str): The title of the game as a string.
+        """
+        return self._game_title
+
+    def get_video_title(self) -> str:
+        """
+        Method to get the title of the video set by the user.
+
+        Returns:
+            (str): The title of the video as a string.
+        """
+        return self._video_title
+
+    def _modify_web_link(self) -> None:
+        """
+        Overrides the abstract method, the link is already resolved.
+        """
+        pass
@@ -0,0 +1,215 @@
+"""
+clip_stream.py
+
+Class implementation to read a clip while it is still downloading. The
+downloader writes the clip to disk as usual and reports how many bytes from
+the start of the file are on disk, the stream hands those bytes on in order
+so the decoder feeding the highlight detectors can run alongside the
+download.
+
+Attributes:
+    READ_SIZE (int): The most bytes handed on at a time.
+    STREAMABLE_BOXES (tuple[bytes, ...]): The MP4 boxes that, when they come
+        before the media data, let ffmpeg decode the clip from a pipe.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    An MP4 can only be decoded from a pipe when its index (the moov box) is
+    at the start of the file, a faststart MP4, or when the media is split
+    into fragments that each carry their own index (moof boxes). Anything
+    else has to be downloaded in full before it can be searched.
+"""
+import os
+import struct
+import threading
+from collections.abc import Iterator
+from .clip_downloader_exceptions import DownloadException
+
+READ_SIZE = 1024 * 1024
+STREAMABLE_BOXES = (b"moov", b"moof")
+
+
+class ClipStream:
+    """
+    A ClipStream follows a clip being downloaded to disk.
+
+    Args:
+        file_name (str): The path the clip is downloaded to, the partial
+            download is read from file_name + ".part" until it is renamed.
+    """
+    """
+    Private Attributes:
+        _available (int): The number of bytes from the start of the file that
+            are on disk.
+        _done (bool): If the download has finished, successfully or not.
+        _error (Exception | None): The error the download failed with.
+        _condition (threading.Condition): Condition the readers wait on for
+            more bytes or the end of the download.
+    """
+
+    def __init__(self, file_name: str) -> None:
+        self._file_name = file_name
+        self._available = 0
+        self._done = False
+        self._error = None
+        self._condition = threading.Condition()
+
+    def get_file_name(self) -> str:
+        """
+        Method to access the path the clip is downloaded to.
+
+        Returns:
+            (str): The path to the clip once the download has finished.
+        """
+        return self._file_name
+
+    def progress(self, available: int) -> None:
+        """
+        Method for the downloader to report the bytes written to disk.
+
+        Args:
+            available (int): The number of bytes from the start of the file
+                that are on disk.
+        """
+        with self._condition:
+            self._available = available
+            self._condition.notify_all()
+
+    def finish(self, error: Exception | None = None) -> None:
+        """
+        Method for the downloader to report the end of the download.
+
+        Args:
+            error (Exception | None): The error the download failed with,
+                None if it succeeded. Defaults to None.
+        """
+        with self._condition:
+            self._done = True
+            self._error = error
+            self._condition.notify_all()
+
+    def wait(self) -> str:
+        """
+        Method to block until the download has finished.
+
+        Returns:
+            (str): The path to the downloaded clip.
+
+        Raises:
+            DownloadException: If the download failed.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._done)
+        self._raise_error()
+        return self._file_name
+
+    def chunks(self) -> Iterator[bytes]:
+        """
+        Generator to read the clip from the start as it downloads. It waits
+        for every byte to land on disk and ends when the download finishes.
+
+        Yields:
+            (bytes): The next bytes of the clip, at most READ_SIZE at a time.
+
+        Raises:
+            DownloadException: If the download failed.
+        """
+        position = 0
+        with self._open() as f:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: self._done or self._available > position)
+                    done, available = self._done, self._available
+                self._raise_error()
+                if done and self._error is None:
+                    available = os.fstat(f.fileno()).st_size
+                if position >= available:
+                    return
+                f.seek(position)
+                chunk = f.read(min(READ_SIZE, available - position))
+                if not chunk:
+                    return
+                position += len(chunk)
+                yield chunk
+
+    def is_streamable(self) -> bool:
+        """
+        Method to check if the clip can be decoded as it downloads, by
+        walking the top level MP4 boxes until the index or the media data is
+        found. Waits for as many bytes as that takes.
+
+        Returns:
+            (bool): True if the index comes before the media data, False if
+                it comes after or the file is not an MP4.
+        """
+        offset = 0
+        while True:
+            header = self._read_at(offset=offset, size=16)
+            if len(header) < 8:
+                return False
+            size, box_type = struct.unpack(">I4s", header[:8])
+            if box_type in STREAMABLE_BOXES:
+                return True
+            if box_type == b"mdat" or offset == 0 and box_type != b"ftyp":
+                return False
+            if size == 1 and len(header) == 16:
+                size = struct.unpack(">Q", header[8:16])[0]
+            if size < 8:
+                return False
+            offset += size
+
+    def _read_at(self, offset: int, size: int) -> bytes:
+        """
+        Helper method to read bytes at an offset, waiting for them to be
+        downloaded.
+
+        Args:
+            offset (int): The offset of the first byte.
+            size (int): The number of bytes to read.
+        Returns:
+            (bytes): The bytes, fewer than size if the file ends first.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._done or self._available >= offset + size)
+        if self._error is not None:
+            return b""
+        with self._open() as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def _open(self):
+        """
+        Helper method to open the clip for reading, the partial download if
+        it has not been renamed yet and the finished clip otherwise.
+
+        Returns:
+            (BinaryIO): The open file.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._done or self._available > 0)
+        self._raise_error()
+        try:
+            return open(self._file_name + ".part", "rb")
+        except FileNotFoundError:
+            return open(self._file_name, "rb")
+
+    def _raise_error(self) -> None:
+        """
+        Helper method to raise the error the download failed with.
+
+        Raises:
+            DownloadException: If the download failed.
+        """
+        if self._error is not None:
+            raise DownloadException(
+                f"Download of {self._file_name} failed: {self._error}") \
+                from self._error
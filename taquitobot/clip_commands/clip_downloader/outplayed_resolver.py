@@ -0,0 +1,221 @@
+"""
+outplayed_resolver.py
+
+Class implementation to resolve an outplayed.tv page to the link of its mp4
+and the title of the game. Requests go through a pooled session so the
+connection to outplayed.tv is reused, the page is streamed through an
+incremental HTML parser that stops reading as soon as the video and title
+tags have been seen, and the results are kept in a TTL cache so reposts and
+retries do not make a request at all.
+
+Attributes:
+    RESOLVE_TTL (float): The time in seconds a resolved page is cached for.
+    POOL_SIZE (int): The number of connections kept open per host.
+    READ_SIZE (int): The number of bytes of the page read at a time.
+    REQUEST_TIMEOUT (float): The time in seconds to wait for the page.
+    DEFAULT_GAME_TITLE (str): The game used when the title of the page does
+        not name one.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The resolver is shared by the download threads of the clip jobs, the
+    cache is guarded by a lock.
+"""
+import codecs
+import threading
+import time
+from collections.abc import Iterable
+from html.parser import HTMLParser
+import requests
+from requests.adapters import HTTPAdapter
+from .clip_downloader_exceptions import DownloadException
+
+RESOLVE_TTL = 15 * 60
+POOL_SIZE = 4
+READ_SIZE = 16 * 1024
+REQUEST_TIMEOUT = 10
+DEFAULT_GAME_TITLE = "Valorant"
+
+
+class _OutplayedPageParser(HTMLParser):
+    """
+    Incremental parser that records the src of the first video tag and the
+    text of the first title tag of a page.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.video_src = None
+        self.title = None
+        self._in_title = False
+        self._title_parts = []
+
+    def is_done(self) -> bool:
+        return self.video_src is not None and self.title is not None
+
+    def handle_starttag(self, tag, attrs) -> None:
+        if tag == "video" and self.video_src is None:
+            self.video_src = dict(attrs).get("src")
+        elif tag == "title" and self.title is None:
+            self._in_title = True
+
+    def handle_endtag(self, tag) -> None:
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.title = "".join(self._title_parts)
+
+    def handle_data(self, data) -> None:
+        if self._in_title:
+            self._title_parts.append(data)
+
+
+class OutplayedResolver:
+    """
+    An OutplayedResolver finds the mp4 link and the game title of outplayed.tv
+    pages.
+
+    Args:
+        ttl (float): The time in seconds a resolved page is cached for.
+            Defaults to RESOLVE_TTL.
+        session (requests.Session): The session to make the requests with.
+            Defaults to a new session with a pool of POOL_SIZE connections.
+    """
+    """
+    Private Attributes:
+        _cache (dict[str, tuple[float, str, str]]): The resolved pages keyed
+            by url, with the time they expire, the mp4 link and the game
+            title.
+        _lock (threading.Lock): Lock guarding the cache.
+        _requests_made (int): The number of pages that have been requested.
+    """
+
+    def __init__(self, ttl: float = RESOLVE_TTL,
+                 session: requests.Session | None = None) -> None:
+        self._ttl = ttl
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE,
+                                  pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self._session = session
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._requests_made = 0
+
+    def get_requests_made(self) -> int:
+        """
+        Method to access the number of pages that have been requested, pages
+        resolved from the cache are not counted.
+
+        Returns:
+            (int): The number of requests.
+        """
+        return self._requests_made
+
+    def resolve(self, url: str) -> tuple[str, str]:
+        """
+        Method to find the mp4 link and game title of an outplayed.tv page.
+
+        Args:
+            url (str): The link to the outplayed.tv page.
+        Returns:
+            (tuple[str, str]): The link to the mp4 of the clip and the title
+                of the game.
+        Raises:
+            DownloadException: If the page could not be read or has no video.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(url)
+            if cached is not None and cached[0] > now:
+                return cached[1], cached[2]
+
+        try:
+            with self._session.get(url, stream=True,
+                                   timeout=REQUEST_TIMEOUT) as response:
+                with self._lock:
+                    self._requests_made += 1
+                response.raise_for_status()
+                video_src, title = self._parse(
+                    chunks=response.iter_content(chunk_size=READ_SIZE),
+                    encoding=response.encoding or "utf-8")
+        except requests.RequestException as error:
+            raise DownloadException(f"Could not read {url}: {error}")
+        if video_src is None:
+            raise DownloadException(f"No video found on {url}")
+
+        game_title = self._parse_game_title(title=title or "")
+        with self._lock:
+            self._cache[url] = (time.monotonic() + self._ttl, video_src,
+                                game_title)
+            for expired in [key for key, value in self._cache.items()
+                            if value[0] <= now]:
+                del self._cache[expired]
+        return video_src, game_title
+
+    def _parse(self, chunks: Iterable[bytes],
+               encoding: str) -> tuple[str | None, str | None]:
+        """
+        Helper method to feed the page to the parser a chunk at a time and
+        stop as soon as both tags have been seen, the rest of the page is
+        never read.
+
+        Args:
+            chunks (Iterable[bytes]): The page as it arrives.
+            encoding (str): The character encoding of the page.
+        Returns:
+            (tuple[str | None, str | None]): The src of the video tag and the
+                text of the title tag, None for a tag that was not found.
+        """
+        parser = _OutplayedPageParser()
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for chunk in chunks:
+            parser.feed(decoder.decode(chunk))
+            if parser.is_done():
+                break
+        return parser.video_src, parser.title
+
+    def _parse_game_title(self, title: str) -> str:
+        """
+        Helper method to get the game from the title of an outplayed.tv page,
+        which looks like "Clip name #Game Name | Outplayed".
+
+        Args:
+            title (str): The title of the page.
+        Returns:
+            (str): The title of the game without spaces.
+        """
+        outplayed_tag = title.split("|")
+        try:
+            return outplayed_tag[0].split("#")[1].replace(" ", "")
+        except IndexError:
+            return DEFAULT_GAME_TITLE
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> OutplayedResolver:
+    """
+    Function to get the resolver shared by every download in the process, so
+    they share one connection pool and cache.
+
+    Returns:
+        (OutplayedResolver): The shared resolver.
+    """
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = OutplayedResolver()
+        return _resolver
@@ -0,0 +1,309 @@
+"""
+stream_downloader.py
+
+Class implementation for an async streaming downloader. Chunks are written
+straight to disk as they arrive so memory use does not grow with the size of
+the clip, broken transfers are resumed with HTTP Range requests and large
+files are split into ranged segments that are downloaded in parallel when the
+server supports it.
+
+Attributes:
+    CHUNK_SIZE (int): The number of bytes read from the network at a time.
+    SEGMENT_THRESHOLD (int): Files larger than this number of bytes are split
+        into parallel segments.
+    MAX_SEGMENTS (int): The maximum number of parallel segments for a file.
+    MAX_RETRIES (int): The number of times a segment is resumed after an
+        interruption before giving up.
+    RETRY_DELAY (float): The delay in seconds before the first retry, doubled
+        on every following retry.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    Progress is kept in a small JSON state file next to the partial download
+    so a download that is restarted later picks up where it stopped.
+"""
+import asyncio
+import json
+import os
+from collections.abc import Callable
+import aiohttp
+from .clip_downloader_exceptions import DownloadException
+
+CHUNK_SIZE = 1024 * 1024
+SEGMENT_THRESHOLD = 8 * 1024 * 1024
+MAX_SEGMENTS = 4
+MAX_RETRIES = 5
+RETRY_DELAY = 0.5
+
+
+class StreamDownloader:
+    """
+    A StreamDownloader downloads a single file from the web to disk.
+
+    Args:
+        url (str): The link to the file on the internet.
+        file_name (str): The path the file should be saved to.
+        chunk_size (int): The number of bytes read at a time. Defaults to
+            CHUNK_SIZE.
+        segment_threshold (int): Files larger than this are split into
+            segments. Defaults to SEGMENT_THRESHOLD.
+        max_segments (int): The maximum number of parallel segments. Defaults
+            to MAX_SEGMENTS.
+        max_retries (int): The number of resumes allowed per segment. Defaults
+            to MAX_RETRIES.
+        progress (Callable[[int], None]): Called with the number of bytes on
+            disk from the start of the file every time a chunk is written,
+            so the file can be read while it downloads. The file is then
+            downloaded in a single segment. Defaults to None.
+    """
+    """
+    Private Attributes:
+        _part_file (str): The path of the partial download, renamed to the
+            file name once it has been verified.
+        _state_file (str): The path of the JSON file holding the progress of
+            every segment.
+        _segments (list[list[int]]): The [start, end, downloaded] byte counts
+            of every segment, end is inclusive and None if the size of the
+            file is not known.
+        _size (int): The size of the file in bytes, None if unknown.
+        _progress (Callable[[int], None] | None): The progress callback.
+    """
+
+    def __init__(self, url: str, file_name: str,
+                 chunk_size: int = CHUNK_SIZE,
+                 segment_threshold: int = SEGMENT_THRESHOLD,
+                 max_segments: int = MAX_SEGMENTS,
+                 max_retries: int = MAX_RETRIES,
+                 progress: Callable[[int], None] | None = None) -> None:
+        self._url = url
+        self._file_name = file_name
+        self._chunk_size = chunk_size
+        self._segment_threshold = segment_threshold
+        self._max_segments = 1 if progress else max(1, max_segments)
+        self._max_retries = max_retries
+        self._part_file = file_name + ".part"
+        self._state_file = file_name + ".part.json"
+        self._segments = []
+        self._size = None
+        self._progress = progress
+
+    async def download(self) -> str:
+        """
+        Downloads the file, resuming a previous partial download of the same
+        url if one exists.
+
+        Returns:
+            (str): The path to the downloaded file.
+
+        Raises:
+            DownloadException: If the file could not be downloaded or did not
+                pass verification.
+        """
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=60)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            supports_ranges = await self._probe(session)
+            resumed = self._load_state()
+            if not resumed:
+                self._plan_segments(supports_ranges)
+            self._prepare_part_file(resumed)
+            await asyncio.gather(*[
+                self._download_segment(session, segment, supports_ranges)
+                for segment in self._segments])
+
+        self._verify()
+        os.replace(self._part_file, self._file_name)
+        if os.path.exists(self._state_file):
+            os.remove(self._state_file)
+        return self._file_name
+
+    async def _probe(self, session: aiohttp.ClientSession) -> bool:
+        """
+        Helper method to request the first byte of the file to find its size
+        and whether the server accepts Range requests.
+
+        Args:
+            session (aiohttp.ClientSession): The session to make the request
+                with.
+        Returns:
+            (bool): True if the server supports Range requests.
+        """
+        headers = {"Range": "bytes=0-0"}
+        try:
+            async with session.get(self._url, headers=headers) as response:
+                if response.status == 206:
+                    content_range = response.headers.get("Content-Range", "")
+                    total = content_range.rpartition("/")[2]
+                    self._size = int(total) if total.isdigit() else None
+                    return True
+                response.raise_for_status()
+                self._size = response.content_length
+                return False
+        except aiohttp.ClientError as error:
+            raise DownloadException(
+                f"Unable to reach {self._url}: {error}") from error
+
+    def _plan_segments(self, supports_ranges: bool) -> None:
+        """
+        Helper method to split the file into segments, a single segment is
+        used if the file is small or cannot be requested in ranges.
+
+        Args:
+            supports_ranges (bool): If the server supports Range requests.
+        """
+        if not supports_ranges or self._size is None or \
+                self._size < self._segment_threshold:
+            end = self._size - 1 if self._size else None
+            self._segments = [[0, end, 0]]
+            return
+
+        segment_count = min(self._max_segments,
+                            -(-self._size // self._segment_threshold))
+        segment_size = -(-self._size // segment_count)
+        self._segments = [
+            [start, min(start + segment_size, self._size) - 1, 0]
+            for start in range(0, self._size, segment_size)]
+
+    def _load_state(self) -> bool:
+        """
+        Helper method to load the progress of an earlier download of the same
+        url.
+
+        Returns:
+            (bool): True if a matching partial download was found.
+        """
+        if not (os.path.exists(self._state_file) and
+                os.path.exists(self._part_file)):
+            return False
+        try:
+            with open(self._state_file, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("url") != self._url or state.get("size") != self._size:
+            return False
+        self._segments = state["segments"]
+        return True
+
+    def _save_state(self) -> None:
+        """
+        Helper method to write the progress of every segment to disk.
+        """
+        with open(self._state_file, "w") as f:
+            json.dump({"url": self._url, "size": self._size,
+                       "segments": self._segments}, f)
+
+    def _prepare_part_file(self, resumed: bool) -> None:
+        """
+        Helper method to create the partial file, sized up front when the
+        size is known so segments can be written at their offsets.
+
+        Args:
+            resumed (bool): If an earlier partial download is being resumed,
+                otherwise any leftover partial file is replaced.
+        """
+        if not resumed:
+            with open(self._part_file, "wb") as f:
+                if self._size and len(self._segments) > 1:
+                    f.truncate(self._size)
+        self._save_state()
+
+    async def _download_segment(self, session: aiohttp.ClientSession,
+                                segment: list, supports_ranges: bool) -> None:
+        """
+        Helper method to download one segment of the file, resuming from the
+        last byte written whenever the transfer is interrupted.
+
+        Args:
+            session (aiohttp.ClientSession): The session to make the requests
+                with.
+            segment (list): The [start, end, downloaded] of the segment.
+            supports_ranges (bool): If the server supports Range requests.
+
+        Raises:
+            DownloadException: If the segment is still incomplete after the
+                maximum number of retries.
+        """
+        attempt = 0
+        while True:
+            start, end, downloaded = segment
+            if end is not None and start + downloaded > end:
+                return
+            try:
+                await self._stream_range(session, segment, supports_ranges)
+                if end is None or start + segment[2] > end:
+                    return
+                error = DownloadException("Connection closed early.")
+            except aiohttp.ClientResponseError as exc:
+                if exc.status < 500 and exc.status not in (408, 429):
+                    raise DownloadException(
+                        f"Unable to download {self._url}: {exc}") from exc
+                error = exc
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = exc
+
+            attempt += 1
+            if attempt > self._max_retries:
+                raise DownloadException(
+                    f"Download of {self._url} failed after "
+                    f"{self._max_retries} retries: {error}") from error
+            await asyncio.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+
+    async def _stream_range(self, session: aiohttp.ClientSession,
+                            segment: list, supports_ranges: bool) -> None:
+        """
+        Helper method to make a single request for the rest of a segment and
+        write the body to disk chunk by chunk.
+
+        Args:
+            session (aiohttp.ClientSession): The session to make the request
+                with.
+            segment (list): The [start, end, downloaded] of the segment,
+                downloaded is updated as chunks are written.
+            supports_ranges (bool): If the server supports Range requests.
+        """
+        start, end, downloaded = segment
+        headers = {}
+        if supports_ranges:
+            headers["Range"] = f"bytes={start + downloaded}-" + \
+                               ("" if end is None else str(end))
+        elif downloaded:
+            # The server cannot resume so the segment starts over.
+            segment[2] = downloaded = 0
+
+        async with session.get(self._url, headers=headers) as response:
+            response.raise_for_status()
+            if supports_ranges and response.status != 206:
+                raise DownloadException("Server ignored the Range request.")
+            with open(self._part_file, "r+b") as f:
+                f.seek(start + downloaded)
+                if not downloaded and not supports_ranges:
+                    f.truncate()
+                async for chunk in response.content.iter_chunked(
+                        self._chunk_size):
+                    if end is not None:
+                        chunk = chunk[:end + 1 - (start + segment[2])]
+                    f.write(chunk)
+                    segment[2] += len(chunk)
+                    self._save_state()
+                    if self._progress is not None:
+                        f.flush()
+                        self._progress(start + segment[2])
+
+    def _verify(self) -> None:
+        """
+        Helper method to check the size of the finished download against the
+        size the server gave, outplayed.tv gives no checksum to check.
+
+        Raises:
+            DownloadException: If the file does not match.
+        """
+        file_size = os.path.getsize(self._part_file)
+        if self._size is not None and file_size != self._size:
+            raise DownloadException(
+                f"Expected {self._size} bytes, downloaded {file_size}.")
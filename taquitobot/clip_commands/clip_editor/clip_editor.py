@@ -5,6 +5,7 @@ Implementation for editing the clip with the specified audio and video file, as
 well as syncing to the highlight depending on the game.
 
 Attributes:
+    BACKENDS (tuple[str, ...]): The renderers a ClipEditor can save with.
 
 TODO:
 
@@ -18,14 +19,31 @@ Notes:
 """
 import os
 import moviepy.editor
+from ..clip_cache.facecam_cache import FacecamCache
+from ..clip_cache.song_cache import SongCache
+from ..clip_metrics.pipeline_metrics import get_metrics
+from .clip_editor_exceptions import RenderException
+from .ffmpeg_renderer import FfmpegRenderer
+
+BACKENDS = ("ffmpeg", "moviepy")
 
 class ClipEditor:
     """
     A ClipEditor is a class to handle editing and saving the video footage that
-    has been prepared by the ClipPrep object. 
-
-    Attributes:
+    has been prepared by the ClipPrep object. The edit is rendered by ffmpeg
+    in a single filter graph, moviepy is kept as a fallback for when ffmpeg
+    fails to render the clip.
 
+    Args:
+        clip_prep (ClipPrepAbstract): The clip prep object that contains 
+            information about how the clip should be edited.
+        backend (str): The renderer to save with, one of BACKENDS. Defaults
+            to "ffmpeg".
+        song_cache (SongCache): The cache the ffmpeg renderer reads the songs
+            from, None to read them from the music folder. Defaults to None.
+        facecam_cache (FacecamCache): The cache the ffmpeg renderer reads the
+            facecam clips prepared for the overlay from, None to read them
+            from the facecam folder. Defaults to None.
     """
     """
     Private Attributes:
@@ -33,33 +51,84 @@ class ClipEditor:
             information about how the clip should be edited.
         _horizontal_crop (int): The amount to crop horizontally for the video
             in order to change the aspect ratio in pixels.
+        _backend (str): The renderer the clip is saved with.
+        _song_cache (SongCache): The cache the songs are read from.
+        _facecam_cache (FacecamCache): The cache the facecam clips are read
+            from.
     """
 
-    def __init__(self, clip_prep: "ClipPrepAbstract") -> None:
+    def __init__(self, clip_prep: "ClipPrepAbstract",
+                 backend: str = "ffmpeg",
+                 song_cache: SongCache | None = None,
+                 facecam_cache: FacecamCache | None = None) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend}, expected one of "
+                             f"{BACKENDS}")
         self._clip_prep = clip_prep
         self._horizontal_crop = 270
+        self._backend = backend
+        self._song_cache = song_cache
+        self._facecam_cache = facecam_cache
 
 
     def edit_and_save_video(self, clip_file: str, game_title: str, 
-                            video_title: str) -> str:
+                            video_title: str, output_folder: str = "") -> str:
         """
-        Method to edit and save the video clip to the device at the root of
-        the directory. Returns the path to the edited clip.
+        Method to edit and save the video clip to the device, at the root of
+        the directory unless an output folder is given. Returns the path to
+        the edited clip.
 
         Args:
             clip_file (str): The path to the clip that is being edited.
             game_title (str): The title of the game as a string.
             video_title (str): The title of the video set by the user as a 
                 string.
+            output_folder (str): The folder the edited clip is saved to.
+                Defaults to an empty string for the current directory.
         Returns:
             (str): The path to the file as a string.
         """
-        if game_title == "LethalCompany":
-            edited_clip = self._edit_clip(clip_file=clip_file, audio=False)
-        else:
-            edited_clip = self._edit_clip(clip_file=clip_file, audio=True)
-        file_name = video_title + " " + game_title + " tiktok_youtube_shorts.mp4"
-        
+        with get_metrics().timer("render"):
+            file_name = self._render(clip_file=clip_file,
+                                     game_title=game_title,
+                                     video_title=video_title,
+                                     output_folder=output_folder)
+        if file_name != "":
+            get_metrics().add(counter="bytes", stage="render",
+                              amount=os.path.getsize(file_name))
+        return file_name
+
+    def _render(self, clip_file: str, game_title: str, video_title: str,
+                output_folder: str) -> str:
+        """
+        Helper method to render the edited clip with the backend, falling
+        back to moviepy when ffmpeg fails.
+
+        Args:
+            clip_file (str): The path to the clip that is being edited.
+            game_title (str): The title of the game as a string.
+            video_title (str): The title of the video set by the user as a
+                string.
+            output_folder (str): The folder the edited clip is saved to.
+        Returns:
+            (str): The path to the file as a string, empty string if the
+                video could not be rendered.
+        """
+        audio = game_title != "LethalCompany"
+        file_name = self.get_edited_file_name(video_title=video_title,
+                                              game_title=game_title,
+                                              output_folder=output_folder)
+        if self._backend == "ffmpeg":
+            try:
+                renderer = FfmpegRenderer(clip_prep=self._clip_prep,
+                                          song_cache=self._song_cache,
+                                          facecam_cache=self._facecam_cache)
+                return renderer.render(clip_file=clip_file,
+                                       file_name=file_name, audio=audio)
+            except RenderException as error:
+                print(f"{error}, falling back to moviepy")
+
+        edited_clip = self._edit_clip(clip_file=clip_file, audio=audio)
         try:
             edited_clip.write_videofile(filename=file_name,
                                         fps=30,
@@ -72,6 +141,24 @@ class ClipEditor:
 
         return file_name
     
+    @staticmethod
+    def get_edited_file_name(video_title: str, game_title: str,
+                             output_folder: str = "") -> str:
+        """
+        Method to get the path the edited clip is saved to.
+
+        Args:
+            video_title (str): The title of the video set by the user as a 
+                string.
+            game_title (str): The title of the game as a string.
+            output_folder (str): The folder the edited clip is saved to.
+                Defaults to an empty string for the current directory.
+        Returns:
+            (str): The path to the edited clip as a string.
+        """
+        return os.path.join(output_folder, video_title + " " + game_title +
+                            " tiktok_youtube_shorts.mp4")
+
     def _edit_clip(self, clip_file: str, audio: bool) -> moviepy.editor.VideoFileClip:
         """
         Helper method to handle all the editing for the clip.
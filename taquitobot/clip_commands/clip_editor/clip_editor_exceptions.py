@@ -0,0 +1,22 @@
+# =============================================================================
+#
+# Title: clip_editor_exceptions.py
+#
+# Author: Aidan
+#
+# Description: File to describe all exceptions related to editing clips.
+#
+# =============================================================================
+
+# =============================================================================
+#
+#                                     Classes
+#
+# =============================================================================
+
+
+class RenderException(Exception):
+    """
+    A RenderException is a subclass of an Exception to describe an issue with rendering an edited clip.
+    """
+    pass
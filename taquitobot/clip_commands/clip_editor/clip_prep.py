@@ -8,6 +8,18 @@ This class will contain all the information required for editing the video.
 Attributes:
     MUSIC_FOLDER (str): The path to the folder containing the songs as a 
         string.
+    FACECAM_FOLDER (str): The path to the folder containing the facecam 
+        clips as a string.
+    SAMPLE_INTERVAL (float): The time between the frames that are checked for
+        a highlight in seconds, the accuracy of the highlight times.
+    MIN_SEGMENT_LENGTH (float): The shortest segment in seconds the parallel
+        search splits a clip into.
+    COARSE_INTERVAL (float): The time between the frames the coarse pass
+        checks in seconds. The HUD markers are on screen for over a second,
+        so a coarse pass every second with a refine window of a second finds
+        every highlight.
+    REFINE_WINDOW (float): The time either side of a coarse candidate that
+        is checked frame by frame in seconds.
 
 TODO:
 
@@ -19,17 +31,228 @@ Versioning:
 Notes:
     
 """
-import moviepy.editor
-import cv2
+import math
 import os
 import random
-import re
 import numpy as np
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from ..clip_cache.artifact_store import ArtifactStore
+from ..clip_cache.media_index import MediaIndex
+from ..clip_downloader.clip_stream import ClipStream
+from ..clip_metrics.pipeline_metrics import get_metrics
+from .frame_sampler import FrameSampler
+from .game_detectors import DetectorSpec, get_detector, get_detectors
+from .roi_prefilter import BATCH_SIZE, RoiPrefilter
 
 MUSIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                             "music/")
 FACECAM_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                               "facecam_clips/")
+SAMPLE_INTERVAL = 0.25
+MIN_SEGMENT_LENGTH = 5
+COARSE_INTERVAL = 1.0
+REFINE_WINDOW = 1.0
+
+
+def _search_segment(clip_prep: "ClipPrepAbstract", file: str, start: float,
+                    end: float,
+                    overlap: float
+                    ) -> tuple[list[tuple[int, float]], int, int, int]:
+    """
+    Searches one segment of the clip in a worker process for the parallel
+    search. The segment is decoded with an overlap either side so candidates
+    near its edges are refined the same way as in a single pass.
+
+    Args:
+        clip_prep (ClipPrepAbstract): The clip prep that is searching.
+        file (str): The clip that is being edited.
+        start (float): The start of the segment in seconds.
+        end (float): The end of the segment in seconds.
+        overlap (float): The extra time decoded either side of the segment.
+    Returns:
+        (tuple[list[tuple[int, float]], int, int, int]): The index of the
+            detector and the time of every frame in the segment that passed
+            its full test, the frames analysed, the frames screened and the
+            tests skipped by the prefilter.
+    """
+    search_start = max(0.0, start - overlap)
+    hits = [(index, hit) for index, hit in clip_prep._hits(
+                file=file, start=search_start,
+                duration=end + overlap - search_start, spacing=0)
+            if start <= hit < end]
+    return (hits, clip_prep._frames_analysed, clip_prep._frames_screened,
+            clip_prep._frames_skipped)
+
+
+class DetectorSearch:
+    """
+    A DetectorSearch follows the sampled frames of a clip for one detector
+    and finds the frames that show its marker, coarse to fine unless the
+    coarse interval is None. Every detector of a clip prep has its own search
+    so they can all be fed from one decode of the clip.
+
+    Args:
+        detector (DetectorSpec): The detector to run.
+        coarse_interval (float): The time between the frames checked with
+            the cheap test in seconds, None to check every frame with the
+            full test.
+        fine_interval (float): The time between the sampled frames in
+            seconds.
+        refine_window (float): The time either side of a coarse candidate
+            that is checked with the full test in seconds.
+        start (float): The time of the first frame in seconds.
+        spacing (float): The minimum time between hits in seconds.
+    """
+    """
+    Private Attributes:
+        _coarse_step (int | None): The number of frames between the frames
+            checked with the cheap test, None for the dense search.
+        _earlier_frames (deque): The frames since the last coarse frame, so
+            a candidate can be refined without decoding them again.
+        _not_before (float): The time before which a frame cannot be a hit.
+        _refine_until (float): The end of the window of the last candidate,
+            every frame before it is checked with the full test.
+        _index (int): The number of frames fed so far.
+        _prefilter (RoiPrefilter): The prefilter that skips the tests on
+            frames whose region of interest has not changed.
+    """
+
+    def __init__(self, detector: DetectorSpec, coarse_interval: float | None,
+                 fine_interval: float, refine_window: float, start: float,
+                 spacing: float) -> None:
+        self._detector = detector
+        self._coarse_step = None
+        if coarse_interval is not None:
+            self._coarse_step = max(1, round(coarse_interval / fine_interval))
+        self._refine_window = refine_window
+        self._earlier_frames = deque(
+            maxlen=max(1, round(refine_window / fine_interval)))
+        self._spacing = spacing
+        self._not_before = start
+        self._refine_until = -1.0
+        self._index = 0
+        self._prefilter = RoiPrefilter()
+        self._frames_analysed = 0
+        self._frames_screened = 0
+
+    def get_frames_analysed(self) -> int:
+        """
+        Method to access the number of frames the full test was run on.
+
+        Returns:
+            (int): The number of frames analysed.
+        """
+        return self._frames_analysed
+
+    def get_frames_screened(self) -> int:
+        """
+        Method to access the number of frames the cheap test was run on.
+
+        Returns:
+            (int): The number of frames screened.
+        """
+        return self._frames_screened
+
+    def get_frames_skipped(self) -> int:
+        """
+        Method to access the number of tests the prefilter answered from an
+        earlier frame.
+
+        Returns:
+            (int): The number of tests skipped.
+        """
+        return self._prefilter.get_frames_skipped()
+
+    def sign(self, frames: list[tuple[float, np.ndarray]]
+             ) -> list[tuple[float, np.ndarray, np.ndarray, int]]:
+        """
+        Method to prepare a batch of frames for the search. The regions are
+        stacked once and the image the detector tests, the number of pixels
+        set in it and the prefilter signature are computed for the whole
+        batch in a few vectorised operations.
+
+        Args:
+            frames (list[tuple[float, np.ndarray]]): The times and regions of
+                interest of the frames.
+        Returns:
+            (list[tuple[float, np.ndarray, np.ndarray, int]]): The time,
+                image, signature and pixel count of every frame.
+        """
+        if not frames:
+            return []
+        regions = np.stack([region for _, region in frames])
+        images, pixels = self._detector.measure(regions)
+        signatures = self._prefilter.signatures(regions)
+        return list(zip([frame_time for frame_time, _ in frames], images,
+                        signatures, pixels))
+
+    def feed(self, frame: tuple[float, np.ndarray, np.ndarray, int]
+             ) -> list[float]:
+        """
+        Method to search the next frame. In the coarse to fine search only
+        every coarse frame is checked with the cheap test and the frames
+        since the last coarse frame are kept, so a candidate is refined by
+        checking the kept frames before it and the frames after it up to the
+        end of its window. Both tests fail without running on frames with
+        fewer pixels than the detector needs, and are skipped on frames the
+        prefilter finds unchanged.
+
+        Args:
+            frame (tuple[float, np.ndarray, np.ndarray, int]): The time,
+                image, signature and pixel count of the frame from sign.
+        Returns:
+            (list[float]): The times of the frames that passed the full test
+                and are at least the spacing apart, usually empty.
+        """
+        frame_time = frame[0]
+        index = self._index
+        self._index += 1
+        if self._coarse_step is None or frame_time < self._refine_until:
+            refine = [frame]
+        elif index % self._coarse_step == 0 and \
+                frame_time + self._refine_window > self._not_before:
+            self._frames_screened += 1
+            if not self._passes(self._detector.is_candidate, frame):
+                self._earlier_frames.append(frame)
+                return []
+            refine = list(self._earlier_frames) + [frame]
+            self._earlier_frames.clear()
+            self._refine_until = frame_time + self._refine_window
+        else:
+            self._earlier_frames.append(frame)
+            return []
+
+        hits = []
+        for refine_frame in refine:
+            if refine_frame[0] < self._not_before:
+                continue
+            self._frames_analysed += 1
+            if self._passes(self._detector.is_highlight, refine_frame):
+                hits.append(refine_frame[0])
+                self._not_before = refine_frame[0] + self._spacing
+        return hits
+
+    def _passes(self, test: Callable[[np.ndarray], bool],
+                frame: tuple[float, np.ndarray, np.ndarray, int]) -> bool:
+        """
+        Helper method to run a test of the detector on a frame, unless the
+        frame has too few pixels or the prefilter has the result.
+
+        Args:
+            test (Callable[[np.ndarray], bool]): The test of the detector.
+            frame (tuple[float, np.ndarray, np.ndarray, int]): The time,
+                image, signature and pixel count of the frame.
+        Returns:
+            (bool): The result of the test.
+        """
+        _, image, signature, pixels = frame
+        if pixels < self._detector.get_min_pixels():
+            return False
+        return self._prefilter.check(test, image, signature)
+
 
 class ClipPrepAbstract:
     """
@@ -37,34 +260,97 @@ class ClipPrepAbstract:
     the video clip to be uploaded to YouTube. This involves choosing the song
     and finding the time of the highlight. The songs that are in the folder 
     should have the format with the timestamp of the beat drop in the title, 
-    with the decimal replaced with a dollar sign ($).
+    with the decimal replaced with a dollar sign ($). The highlights are
+    found by the detectors the subclass sets in _detectors before calling
+    this constructor, which all run on one decode of the clip.
+
+    Args:
+        video_file (str): The path to the clip that is being edited.
+        parallel (bool): If the highlights should be searched for in
+            segments across all the cores. Defaults to False.
+        artifact_store (ArtifactStore): The store to read the highlight times
+            of a clip that has been searched before from, and to save the
+            highlight times to. Defaults to None.
+        video_stream (ClipStream): The stream of the clip while it downloads
+            to video_file. When the clip can be decoded from a pipe the
+            highlights are searched as it downloads, otherwise the search
+            waits for the download. Defaults to None for a clip that is
+            already on disk.
+    """
+    """
+    Private Attributes:
+        _detectors (list[DetectorSpec]): The detectors to search the clip
+            with, set by the subclass.
+        _trusted_detectors (int): The number of detectors at the front of
+            _detectors that are trusted to be the game of the clip, set by
+            the subclass. The search stops once one of them reaches its
+            highlight limit and their highlights are used whenever they find
+            any.
+        _detector (DetectorSpec): The detector whose highlights were used.
     """
 
-    def __init__(self, video_file: str) -> None:
+    def __init__(self, video_file: str, parallel: bool = False,
+                 artifact_store: ArtifactStore | None = None,
+                 video_stream: ClipStream | None = None) -> None:
+        self._parallel = parallel
+        self._coarse_interval = COARSE_INTERVAL
+        self._fine_interval = SAMPLE_INTERVAL
+        self._refine_window = REFINE_WINDOW
+        self._detector = self._detectors[0]
+        self._frames_analysed = 0
+        self._frames_screened = 0
+        self._frames_skipped = 0
         self._face_cam_start_time = 0
         self._song_start_time = 0
-        self._song_name = self._choose_random_song(music_folder=MUSIC_FOLDER)
         self._facecam_clip = self._choose_random_facecam_clip(
             facecam_folder=FACECAM_FOLDER)
-        self._highlight_time = self._find_highlight_time(file=video_file)
-        if len(self._highlight_time) == 0:
-            self._highlight_time.append(3)
+        stored = None
+        if video_stream is None:
+            stored = self._stored_highlight_time(
+                file=video_file, artifact_store=artifact_store)
+        if stored is not None:
+            self._detector, self._highlight_time = stored
+        else:
+            self._highlight_time = self._search_highlight_time(
+                video_file=video_file, video_stream=video_stream)
+            if len(self._highlight_time) == 0:
+                self._highlight_time.append(3)
+            if artifact_store is not None:
+                artifact_store.put_highlights(
+                    clip_hash=artifact_store.get_clip_hash(video_file),
+                    detector=self._detector_name(detector=self._detector),
+                    highlight_time=self._highlight_time)
+        # The song has to play from the first highlight to the end of the
+        # clip once its beat drop is lined up with the highlight.
+        self._song_name = self._choose_random_song(
+            music_folder=MUSIC_FOLDER,
+            min_length=ffmpeg_parse_infos(video_file)["duration"] -
+                       self._highlight_time[0])
     
-    def _choose_random_song(self, music_folder: str) -> str:
+    def _choose_random_song(self, music_folder: str,
+                            min_length: float = 0.0) -> str:
         """
-        Helper function to get a random song form the specified folder.
+        Helper function to get a random song form the specified folder. Songs
+        are chosen from the media index of the folder, songs that run for
+        less than min_length after their beat drop are only chosen if there
+        is no song long enough.
 
         Args:
             music_folder (str): Path to the folder containing music to randomly
                 select from.
+            min_length (float): The time in seconds the song must run for
+                after the beat drop. Defaults to 0.
         Returns:
             (str): The title of the song
         """
-        song_name = os.path.join(music_folder,
-                                 random.choice(os.listdir(music_folder)))
-        self._song_start_time = float(
-            re.search(r'(\d+\$\d+)', song_name).group(1).replace('$', '.'))
-        return os.path.join(MUSIC_FOLDER, song_name)
+        media_index = MediaIndex(folder=music_folder)
+        song = media_index.choose(min_length=min_length) or \
+               media_index.choose()
+        if song is None:
+            raise FileNotFoundError(f"No songs with a beat drop timestamp in "
+                                    f"{music_folder}")
+        song_name, self._song_start_time = song
+        return song_name
 
     def _choose_random_facecam_clip(self, facecam_folder: str) -> str:
         """
@@ -79,13 +365,155 @@ class ClipPrepAbstract:
                 string.
         """
         if random.randint(1, 6) == 3:
-            face_cam_name = random.choice(os.listdir(facecam_folder))
-            self._face_cam_start_time = float(
-                        re.search(r'(\d+\$\d+)', 
-                        face_cam_name).group(1).replace('$', '.'))
-            return os.path.join(FACECAM_FOLDER, face_cam_name)
-        else:
-            return ""
+            face_cam = MediaIndex(folder=facecam_folder).choose()
+            if face_cam is not None:
+                face_cam_name, self._face_cam_start_time = face_cam
+                return face_cam_name
+        return ""
+
+    def _detector_name(self, detector: DetectorSpec) -> str:
+        """
+        Helper method to get the name the highlight times of a detector are
+        stored under, including the highlight limit since it changes how many
+        highlights are found. The game is casefolded like the registry keys.
+
+        Args:
+            detector (DetectorSpec): The detector.
+        Returns:
+            (str): The name of the detector.
+        """
+        limit = detector.get_highlight_limit(facecam=self._facecam_clip != "")
+        return f"{detector.get_game().casefold()}:{limit}"
+
+    def _stored_highlight_time(
+            self, file: str, artifact_store: ArtifactStore | None
+    ) -> tuple[DetectorSpec, list[float]] | None:
+        """
+        Helper method to get the highlight times of a clip that has already
+        been searched by one of the detectors, the first of them in order
+        that has.
+
+        Args:
+            file (str): The clip that is being edited.
+            artifact_store (ArtifactStore): The store holding the highlight
+                times, None if there is no store.
+        Returns:
+            (tuple[DetectorSpec, list[float]] | None): The detector that
+                found the highlights and the highlight times, None if the
+                clip has not been searched before.
+        """
+        if artifact_store is None:
+            return None
+        names = {self._detector_name(detector=detector): detector
+                 for detector in self._detectors}
+        stored = artifact_store.find_highlights(
+            clip_hash=artifact_store.get_clip_hash(file),
+            detectors=list(names))
+        if stored is None:
+            return None
+        name, highlight_time = stored
+        return names[name], highlight_time
+
+    def _search_highlight_time(
+            self, video_file: str,
+            video_stream: ClipStream | None) -> list[float]:
+        """
+        Helper method to search the clip for highlights, as it downloads
+        when it has a stream that ffmpeg can decode from a pipe. The search
+        falls back to the downloaded file when the stream is not streamable
+        or no frame could be decoded from it. Returns once the clip is fully
+        downloaded.
+
+        Args:
+            video_file (str): The path to the clip.
+            video_stream (ClipStream | None): The stream of the clip while it
+                downloads, None if it is already on disk.
+        Returns:
+            (list[float]): The times of the highlights in seconds.
+
+        Raises:
+            DownloadException: If the download of the stream failed.
+        """
+        if video_stream is not None and video_stream.is_streamable():
+            highlight_time = self._find_highlight_time(file=video_stream)
+            video_stream.wait()
+            if self._frames_screened + self._frames_analysed > 0:
+                return highlight_time
+            print(f"could not decode {video_file} while downloading, "
+                  f"searching the downloaded file")
+        elif video_stream is not None:
+            video_stream.wait()
+        return self._find_highlight_time(file=video_file)
+
+    def get_game_title(self) -> str:
+        """
+        Method to access the game of the detector whose highlights were used,
+        the game the clip was identified as.
+
+        Returns:
+            (str): The title of the game.
+        """
+        return self._detector.get_game()
+
+    def get_detector(self) -> DetectorSpec:
+        """
+        Method to access the detector whose highlights were used.
+
+        Returns:
+            (DetectorSpec): The detector.
+        """
+        return self._detector
+
+    def get_highlight_time(self) -> list[float]:
+        """
+        Method to access the times of the highlights found in the clip.
+
+        Returns:
+            (list[float]): The times of the highlights in seconds, in order.
+        """
+        return self._highlight_time
+
+    def get_frames_analysed(self) -> int:
+        """
+        Method to access the number of frames the full highlight test was run
+        on while finding the highlights.
+
+        Returns:
+            (int): The number of frames analysed.
+        """
+        return self._frames_analysed
+
+    def get_frames_screened(self) -> int:
+        """
+        Method to access the number of frames the cheap coarse test was run
+        on while finding the highlights.
+
+        Returns:
+            (int): The number of frames screened.
+        """
+        return self._frames_screened
+
+    def get_frames_skipped(self) -> int:
+        """
+        Method to access the number of coarse and full tests the prefilter
+        answered from an earlier frame with the same region of interest. They
+        are included in the frames screened and analysed.
+
+        Returns:
+            (int): The number of tests skipped.
+        """
+        return self._frames_skipped
+
+    def get_skip_rate(self) -> float:
+        """
+        Method to access the share of the tests the prefilter skipped.
+
+        Returns:
+            (float): The tests skipped over the frames screened and analysed,
+                0 if no frame was tested.
+        """
+        tested = self._frames_screened + self._frames_analysed
+        return self._frames_skipped / tested if tested else 0.0
 
     def _find_highlight_time(self, file: str) -> list[float]:
         """
@@ -93,114 +521,287 @@ class ClipPrepAbstract:
         report the time(s) of the highlights as a list float in seconds. The
         list is in chronological order.
 
+        Every detector searches the same decode of the clip, coarse to fine:
+        a coarse pass checks a frame every _coarse_interval seconds with the
+        cheap test of the detector, then the frames every _fine_interval
+        seconds within _refine_window seconds either side of a candidate are
+        checked with its full test. A highlight that is on screen for less
+        than the coarse interval can be missed, setting _coarse_interval to
+        None searches every fine frame instead. In parallel mode the
+        timeline is split into segments that are searched in a process pool,
+        a clip that is still downloading is always searched in a single
+        pass. The highlights of the detector the clip is identified with are
+        returned, see _identify_game.
+
         Args:
-            file (str): The clip that is being edited. 
+            file (str | ClipStream): The clip that is being edited, or its
+                stream while it downloads.
 
         Returns:
-            (list[float]): The times of the highlights in seconds, they will 
+            (list[float]): The times of the highlights in seconds, they will
                 be in ascending order from lowest to highest and at least
-                2 seconds apart.
+                the spacing of the detector apart.
+        """
+        self._frames_analysed = 0
+        self._frames_screened = 0
+        self._frames_skipped = 0
+        highlights = [[] for _ in self._detectors]
+        limits = [detector.get_highlight_limit(
+                      facecam=self._facecam_clip != "")
+                  for detector in self._detectors]
+        with get_metrics().timer("highlight_search"):
+            if self._parallel and not isinstance(file, ClipStream):
+                hits = iter(self._parallel_hits(file=file))
+            else:
+                hits = self._hits(file=file)
+            try:
+                for index, hit in hits:
+                    highlights[index].append(
+                        hit + self._detectors[index].get_offset())
+                    if index < self._trusted_detectors and \
+                            limits[index] is not None and \
+                            len(highlights[index]) >= limits[index]:
+                        break
+            finally:
+                if hasattr(hits, "close"):
+                    hits.close()
+        get_metrics().add(counter="frames", stage="highlight_search",
+                          amount=self._frames_analysed)
+        get_metrics().add(counter="frames", stage="highlight_skipped",
+                          amount=self._frames_skipped)
+        self._detector = self._detectors[self._identify_game(
+            highlights=highlights)]
+        return highlights[self._detectors.index(self._detector)]
+
+    def _identify_game(self, highlights: list[list[float]]) -> int:
+        """
+        Helper method to choose the detector whose highlights are used. A
+        trusted detector that found highlights wins, otherwise the HUD of
+        the clip decides and the detector that found the most highlights
+        wins. Ties go to the detector that comes first.
+
+        Args:
+            highlights (list[list[float]]): The highlights every detector
+                found.
+        Returns:
+            (int): The index of the detector.
+        """
+        candidates = range(self._trusted_detectors)
+        if not any(highlights[index] for index in candidates):
+            candidates = range(len(highlights))
+        return max(candidates, key=lambda index: len(highlights[index]))
+
+    def _hits(self, file: str, start: float = 0.0,
+              duration: float | None = None,
+              spacing: float | None = None) -> Iterator[tuple[int, float]]:
+        """
+        Helper generator to search part of the clip with every detector. The
+        regions of interest of all the detectors are cut out of a single
+        decode and fed to a DetectorSearch per detector, a batch of frames at
+        a time so the prefilter signatures are computed together. A frame
+        within spacing seconds after the last hit of a detector is skipped,
+        so with the default spacing every time yielded is a highlight and
+        with a spacing of 0 every frame that passes the full test is yielded.
+
+        Args:
+            file (str): The clip that is being edited.
+            start (float): The time to start searching from, a multiple of
+                the coarse interval. Defaults to 0.
+            duration (float): The length of time to search, None for the
+                rest of the clip. Defaults to None.
+            spacing (float): The minimum time between hits, None for the
+                spacing of every detector. Defaults to None.
+        Yields:
+            (tuple[int, float]): The index of the detector and the time of
+                the hit on the fine grid, in order of time.
+        """
+        searches = [DetectorSearch(
+                        detector=detector,
+                        coarse_interval=self._coarse_interval,
+                        fine_interval=self._fine_interval,
+                        refine_window=self._refine_window, start=start,
+                        spacing=detector.get_spacing() if spacing is None
+                        else spacing)
+                    for detector in self._detectors]
+        frame_sampler = FrameSampler(
+            file=file, interval=self._fine_interval, start=start,
+            duration=duration,
+            crops=[detector.get_crop() for detector in self._detectors])
+        frames = frame_sampler.frames()
+        try:
+            batch = []
+            for frame in frames:
+                batch.append(frame)
+                if len(batch) == BATCH_SIZE:
+                    yield from self._search_batch(searches=searches,
+                                                  batch=batch)
+                    batch = []
+            yield from self._search_batch(searches=searches, batch=batch)
+        finally:
+            frames.close()
+            for search in searches:
+                self._frames_analysed += search.get_frames_analysed()
+                self._frames_screened += search.get_frames_screened()
+                self._frames_skipped += search.get_frames_skipped()
+
+    def _search_batch(self, searches: list[DetectorSearch],
+                      batch: list[tuple[float, list[np.ndarray]]]
+                      ) -> Iterator[tuple[int, float]]:
         """
-        ...
+        Helper generator to feed a batch of frames to every detector search.
+
+        Args:
+            searches (list[DetectorSearch]): The search of every detector.
+            batch (list[tuple[float, list[np.ndarray]]]): The times of the
+                frames and the region of interest of every detector.
+        Yields:
+            (tuple[int, float]): The index of the detector and the time of
+                the hit, in order of time.
+        """
+        signed = [search.sign([(frame_time, regions[index])
+                               for frame_time, regions in batch])
+                  for index, search in enumerate(searches)]
+        for position in range(len(batch)):
+            for index, search in enumerate(searches):
+                for hit in search.feed(signed[index][position]):
+                    yield index, hit
+
+    def _parallel_hits(self, file: str) -> list[tuple[int, float]]:
+        """
+        Helper method for the parallel search. The timeline is split into one
+        segment per core, every segment is searched with a spacing of 0 in a
+        process pool with an overlap of one refine window either side, and
+        the hits are merged with the spacing of every detector applied in
+        order. This gives the same highlights as searching the clip in one
+        pass.
+
+        Args:
+            file (str): The clip that is being edited.
+        Returns:
+            (list[tuple[int, float]]): The index of the detector and the time
+                of every highlight on the fine grid, in order of time.
+        """
+        duration = ffmpeg_parse_infos(file)["duration"]
+        grid = self._coarse_interval or self._fine_interval
+        overlap = 0.0
+        if self._coarse_interval is not None:
+            overlap = math.ceil(self._refine_window / grid) * grid
+        segment_count = max(1, min(os.cpu_count() or 1,
+                                   int(duration // MIN_SEGMENT_LENGTH)))
+        segment_length = math.ceil(duration / segment_count / grid) * grid
+        segments = [(index * segment_length,
+                     min((index + 1) * segment_length, duration))
+                    for index in range(segment_count)
+                    if index * segment_length < duration]
+
+        with ProcessPoolExecutor(max_workers=len(segments)) as pool:
+            results = list(pool.map(_search_segment,
+                                    [self] * len(segments),
+                                    [file] * len(segments),
+                                    [start for start, _ in segments],
+                                    [end for _, end in segments],
+                                    [overlap] * len(segments)))
+
+        hits = []
+        not_before = [0.0] * len(self._detectors)
+        for index, hit in sorted(set(hit for segment_hits, *_ in results
+                                     for hit in segment_hits),
+                                 key=lambda hit: (hit[1], hit[0])):
+            if hit >= not_before[index]:
+                hits.append((index, hit))
+                not_before[index] = hit + \
+                    self._detectors[index].get_spacing()
+        self._frames_analysed = sum(analysed for _, analysed, _, _ in results)
+        self._frames_screened = sum(screened for _, _, screened, _ in results)
+        self._frames_skipped = sum(skipped for *_, skipped in results)
+        return hits
 
 
 class ClipPrepValorant(ClipPrepAbstract):
     """
-    Specific clip prep for Valorant videos to find the time of the highlight. 
-    Has the same features as the Abstract parent class.
+    Specific clip prep for Valorant videos to find the time of the highlight.
+    Has the same features as the Abstract parent class, using the kill
+    circle detector registered for valorant.
     """
 
-    def __init__(self, video_file: str) -> None:
-        # Crop to make it easier to find the desired shape, crop is given in
-        # pixel coordinates.
-        self._left_crop = 905
-        self._right_crop = 1015
-        self._top_crop = 805
-        self._bottom_crop = 920
-    
-        super().__init__(video_file=video_file)
+    def __init__(self, video_file: str, parallel: bool = False,
+                 artifact_store: ArtifactStore | None = None,
+                 video_stream: ClipStream | None = None) -> None:
+        self._detectors = [get_detector("Valorant")]
+        self._trusted_detectors = 1
 
-    def _find_highlight_time(self, file: str) -> list[float]:
-        """
-        Overrides parent class method, uses the circle from the frame of the
-        kill to find the highlight time. The elements are separated by at least
-        a difference of two (2) seconds.
-        """
-        video_clip = moviepy.editor.VideoFileClip(file).crop(self._left_crop,
-                                                             self._top_crop,
-                                                             self._right_crop,
-                                                             self._bottom_crop)
-        highlights = []
-        time_interval = 0
-        while time_interval < video_clip.duration:
-            colour = cv2.cvtColor(video_clip.get_frame(time_interval),
-                                  cv2.COLOR_RGB2BGR)
-            grayscale = cv2.cvtColor(colour, cv2.COLOR_BGR2GRAY)
-            circles = cv2.HoughCircles(grayscale, cv2.HOUGH_GRADIENT, 1.5, 100,
-                                       minRadius=40, maxRadius=60)
-            
-            if circles is not None:
-                highlights.append(time_interval - 0.35)
-                time_interval += 2
-                
-                # If there is no facecam clip we dont need the last highlight.
-                if self._facecam_clip == "":
-                    return highlights
-            else:
-                time_interval += 0.25
-            
-            if len(highlights) >= 5:
-                break
+        super().__init__(video_file=video_file, parallel=parallel,
+                         artifact_store=artifact_store,
+                         video_stream=video_stream)
 
-        return highlights
 
 class ClipPrepLeagueOfLegends(ClipPrepAbstract):
     """
-    Specific clip prep for LoL videos to find the time of the highlight. 
-    Has the same features as the Abstract parent class.
+    Specific clip prep for LoL videos to find the time of the highlight.
+    Has the same features as the Abstract parent class, using the yellow
+    square detector registered for leagueoflegends.
     """
 
-    def __init__(self, video_file: str) -> None:
-        self._left_crop = 1785
-        self._top_crop = 243
-        self._right_crop = 1840
-        self._bottom_crop = 450
-        
+    def __init__(self, video_file: str, parallel: bool = False,
+                 artifact_store: ArtifactStore | None = None,
+                 video_stream: ClipStream | None = None) -> None:
+        self._detectors = [get_detector("LeagueofLegends")]
+        self._trusted_detectors = 1
 
-        super().__init__(video_file=video_file)
-    
-    def _find_highlight_time(self, file: str) -> list[float]:
+        super().__init__(video_file=video_file, parallel=parallel,
+                         artifact_store=artifact_store,
+                         video_stream=video_stream)
+
+
+class ClipPrepAuto(ClipPrepAbstract):
+    """
+    Clip prep that runs the detector of every registered game on the same
+    decode of the clip and identifies the game from the HUD. The detector of
+    the game outplayed.tv gives is trusted whenever it finds a highlight, so
+    the other detectors only decide the game when the title is missing or
+    wrong. A game outplayed.tv gives that has no registered detector, such
+    as LethalCompany, is kept as the title of the clip, since its HUD cannot
+    be told apart. Has the same features as the Abstract parent class.
+
+    Args:
+        video_file (str): The path to the clip that is being edited.
+        game_title (str): The title of the game given by outplayed.tv, empty
+            string if it is not known. Defaults to empty string.
+        parallel (bool): If the highlights should be searched for in
+            segments across all the cores. Defaults to False.
+        artifact_store (ArtifactStore): The store to read and save the
+            highlight times. Defaults to None.
+        video_stream (ClipStream): The stream of the clip while it
+            downloads. Defaults to None.
+    """
+    """
+    Private Attributes:
+        _game_title (str): The title of the game given by outplayed.tv.
+    """
+
+    def __init__(self, video_file: str, game_title: str = "",
+                 parallel: bool = False,
+                 artifact_store: ArtifactStore | None = None,
+                 video_stream: ClipStream | None = None) -> None:
+        self._game_title = game_title
+        self._detectors = get_detectors(preferred=game_title)
+        self._trusted_detectors = len(self._detectors)
+        if get_detector(game_title) is not None:
+            self._trusted_detectors = 1
+
+        super().__init__(video_file=video_file, parallel=parallel,
+                         artifact_store=artifact_store,
+                         video_stream=video_stream)
+
+    def get_game_title(self) -> str:
+        """
+        Method to access the title of the game of the clip, the game given by
+        outplayed.tv when it has no registered detector and the game the
+        clip was identified as otherwise.
+
+        Returns:
+            (str): The title of the game.
         """
-        Overrides parent class method, uses the yellow square from the frame
-        of the kill to find the highlight time. The elements are separated by
-        at least a difference of five (5) seconds.
-        """
-        video_clip = moviepy.editor.VideoFileClip(file).crop(self._left_crop,
-                                                             self._top_crop,
-                                                             self._right_crop,
-                                                             self._bottom_crop)
-        yellow_hsv_lower_bound = np.array([20, 100, 100])
-        yellow_hsv_upper_bound = np.array([40, 255, 255])
-        minimum_area = 1500
-        highlights = []
-        time_interval = 0
-        while time_interval < video_clip.duration:
-            hsv_frame = cv2.cvtColor(video_clip.get_frame(time_interval),
-                                     cv2.COLOR_RGB2HSV)
-            mask = cv2.inRange(hsv_frame, yellow_hsv_lower_bound,
-                               yellow_hsv_upper_bound)
-            contours = cv2.findContours(mask, cv2.RETR_EXTERNAL,
-                                        cv2.CHAIN_APPROX_NONE)[0]
-            for contour in contours:
-                epsilon = 0.02 * cv2.arcLength(contour, True)
-                approx = cv2.approxPolyDP(contour, epsilon, True)
-
-                # shape should have 4 verticies
-                if len(approx) == 4:
-                    area = cv2.contourArea(contour)
-                    if area > minimum_area:
-                        highlights.append(time_interval)
-                        time_interval += 4.75
-            time_interval += 0.25
-        
-        return highlights
\ No newline at end of file
+        if self._game_title and get_detector(self._game_title) is None:
+            return self._game_title
+        return super().get_game_title()
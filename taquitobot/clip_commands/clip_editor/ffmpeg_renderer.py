@@ -0,0 +1,295 @@
+"""
+ffmpeg_renderer.py
+
+Class implementation to render an edited clip with a single ffmpeg
+invocation. The edit ClipEditor makes with moviepy, resizing to the short
+height, cropping the centre, overlaying the facecam with a crossfade and
+syncing the song to the highlight, is described as one filter_complex so the
+frames never pass through Python.
+
+Attributes:
+    OUTPUT_WIDTH (int): The width of the edited clip in pixels.
+    OUTPUT_HEIGHT (int): The height of the edited clip in pixels.
+    OUTPUT_FPS (int): The frame rate of the edited clip.
+    CROSSFADE_DURATION (float): The time in seconds the facecam takes to fade
+        in.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The encoder settings are the ones moviepy's write_videofile uses for an
+    mp4, libx264 with yuv420p and libmp3lame audio, so both backends give the
+    same kind of file. The audio codec and sample rate are the ones the song
+    cache stores the songs in.
+"""
+import subprocess
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from ..clip_cache.facecam_cache import FacecamCache
+from ..clip_cache.song_cache import AUDIO_CODEC, AUDIO_FPS, SongCache
+from .clip_editor_exceptions import RenderException
+
+OUTPUT_WIDTH = 540
+OUTPUT_HEIGHT = 960
+OUTPUT_FPS = 30
+CROSSFADE_DURATION = 1
+
+
+class FfmpegRenderer:
+    """
+    A FfmpegRenderer renders the edit described by a ClipPrep object straight
+    to a file with ffmpeg.
+
+    Args:
+        clip_prep (ClipPrepAbstract): The clip prep object that contains
+            information about how the clip should be edited.
+        preset (str): The libx264 preset to encode with. Defaults to
+            "superfast".
+        song_cache (SongCache): The cache to read the songs from, None to
+            read the songs from the music folder. Defaults to None.
+        facecam_cache (FacecamCache): The cache to read the facecam clips
+            prepared for the overlay from, None to overlay the clips in the
+            facecam folder. Defaults to None.
+    """
+    """
+    Private Attributes:
+        _inputs (list[str]): The ffmpeg input arguments of the render being
+            built.
+        _input_count (int): The number of inputs added to the render being
+            built.
+    """
+
+    def __init__(self, clip_prep: "ClipPrepAbstract",
+                 preset: str = "superfast",
+                 song_cache: SongCache | None = None,
+                 facecam_cache: FacecamCache | None = None) -> None:
+        self._clip_prep = clip_prep
+        self._preset = preset
+        self._song_cache = song_cache
+        self._facecam_cache = facecam_cache
+        self._inputs = []
+        self._input_count = 0
+
+    def render(self, clip_file: str, file_name: str, audio: bool) -> str:
+        """
+        Method to render the edited clip to a file.
+
+        Args:
+            clip_file (str): The path to the clip that is being edited.
+            file_name (str): The path to write the edited clip to.
+            audio (bool): True to replace the clip's audio with the song,
+                False to keep the clip's own audio.
+        Returns:
+            (str): The path to the edited clip.
+        Raises:
+            RenderException: If ffmpeg could not render the clip.
+        """
+        try:
+            command = self._ffmpeg_command(clip_file=clip_file,
+                                           file_name=file_name, audio=audio)
+        except (IOError, KeyError, subprocess.CalledProcessError) as error:
+            raise RenderException(f"Could not read the inputs: {error}")
+        process = subprocess.run(command, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE)
+        if process.returncode != 0:
+            message = process.stderr.decode(errors="replace").strip()
+            raise RenderException(f"ffmpeg failed to render {file_name}: "
+                                  f"{message[-500:]}")
+        return file_name
+
+    def _add_input(self, file: str,
+                   arguments: list[str] | None = None) -> int:
+        """
+        Helper method to add an input file to the render.
+
+        Args:
+            file (str): The path to the input.
+            arguments (list[str]): The input options, such as a seek, that go
+                before the file. Defaults to None.
+        Returns:
+            (int): The index of the input in the filter graph.
+        """
+        self._inputs += (arguments or []) + ["-i", file]
+        self._input_count += 1
+        return self._input_count - 1
+
+    def _ffmpeg_command(self, clip_file: str, file_name: str,
+                        audio: bool) -> list[str]:
+        """
+        Helper method to build the ffmpeg command for the render.
+
+        Args:
+            clip_file (str): The path to the clip that is being edited.
+            file_name (str): The path to write the edited clip to.
+            audio (bool): True to replace the clip's audio with the song.
+        Returns:
+            (list[str]): The command and its arguments.
+        """
+        self._inputs = []
+        self._input_count = 0
+        clip_infos = ffmpeg_parse_infos(clip_file)
+        duration = clip_infos["duration"]
+        clip_input = self._add_input(clip_file)
+
+        filters = [self._video_filter(clip_input=clip_input,
+                                      clip_height=clip_infos["video_size"][1])]
+        video_label = "[base]"
+        facecam_audio = False
+        if self._clip_prep._facecam_clip != "":
+            facecam_filters, facecam_audio = self._facecam_filter()
+            filters += facecam_filters
+            video_label = "[composite]"
+        filters.append(f"{video_label}fps={OUTPUT_FPS},format=yuv420p[video]")
+
+        audio_labels = []
+        audio_codec = ["-c:a", AUDIO_CODEC, "-ar", str(AUDIO_FPS)]
+        if audio:
+            song_filters, song_label = self._song_filter(
+                duration=duration, stream_copy=not facecam_audio)
+            filters += song_filters
+            audio_labels.append(song_label)
+            if not song_filters:
+                audio_codec = ["-c:a", "copy"]
+        elif clip_infos["audio_found"]:
+            audio_labels.append(f"[{clip_input}:a]")
+        if facecam_audio:
+            audio_labels.append("[facecam_audio]")
+
+        output = ["-map", "[video]"]
+        if len(audio_labels) > 1:
+            # Summed like moviepy's CompositeAudioClip rather than averaged.
+            filters.append(f"{''.join(audio_labels)}amix=inputs="
+                           f"{len(audio_labels)}:duration=first:normalize=0"
+                           f"[audio]")
+            output += ["-map", "[audio]"]
+        elif audio_labels:
+            # Input streams are mapped without the brackets filter graph
+            # outputs need.
+            label = audio_labels[0]
+            output += ["-map", label.strip("[]") if ":" in label else label]
+
+        command = [get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error"]
+        command += self._inputs
+        command += ["-filter_complex", ";".join(filters)] + output
+        command += ["-t", f"{duration:.3f}", "-c:v", "libx264",
+                    "-preset", self._preset, "-pix_fmt", "yuv420p"]
+        if audio_labels:
+            command += audio_codec
+        command.append(file_name)
+        return command
+
+    def _video_filter(self, clip_input: int, clip_height: int) -> str:
+        """
+        Helper method to build the filter that resizes the clip to the output
+        height, keeping the aspect ratio, and crops the centre to the output
+        width. Downscaling uses area averaging and upscaling is bilinear, the
+        same as moviepy's resize with OpenCV.
+
+        Args:
+            clip_input (int): The index of the clip input.
+            clip_height (int): The height of the clip in pixels.
+        Returns:
+            (str): The filter, labelled [base].
+        """
+        flags = "area" if clip_height > OUTPUT_HEIGHT else "bilinear"
+        return (f"[{clip_input}:v]"
+                f"scale=w='trunc(iw*{OUTPUT_HEIGHT}/ih)':h={OUTPUT_HEIGHT}:"
+                f"flags={flags},"
+                f"crop=w={OUTPUT_WIDTH}:h={OUTPUT_HEIGHT}:"
+                f"x='trunc(iw/2)-{OUTPUT_WIDTH // 2}':y=0[base]")
+
+    def _song_filter(self, duration: float,
+                     stream_copy: bool) -> tuple[list[str], str]:
+        """
+        Helper method to add the song and build the filter that lines its
+        beat drop up with the first highlight. The song is cut to the same
+        length as the moviepy subclip and padded with silence to the end of
+        the clip. When the beat drop is earlier in the song than the
+        highlight is in the clip the song is delayed instead.
+
+        With a song cache the song is read from the cached copy, which is
+        already in the output codec and sample rate. If the song does not
+        need to be mixed or delayed the window is stream copied and no filter
+        is needed, the song then ends where the moviepy subclip does.
+
+        Args:
+            duration (float): The duration of the clip in seconds.
+            stream_copy (bool): If the song can be stream copied, False when
+                it is mixed with other audio.
+        Returns:
+            (tuple[list[str], str]): The filters, empty when the song is
+                stream copied, and the label of the song audio.
+        """
+        audio_start_time = self._clip_prep._song_start_time - \
+                           self._clip_prep._highlight_time[0]
+        song_length = int(duration + audio_start_time) - audio_start_time
+        song_name = self._clip_prep._song_name
+        seek = audio_start_time
+        if self._song_cache is not None:
+            song_name, cache_start = self._song_cache.get_track(
+                song_name=song_name,
+                beat_drop=self._clip_prep._song_start_time)
+            seek = audio_start_time - cache_start
+            if stream_copy and seek >= 0 and \
+                    ffmpeg_parse_infos(song_name)["duration"] >= \
+                    seek + song_length:
+                song_input = self._add_input(
+                    song_name, ["-ss", f"{seek:.3f}",
+                                "-t", f"{song_length:.3f}"])
+                return [], f"[{song_input}:a]"
+
+        arguments = ["-t", f"{song_length:.3f}"]
+        if seek > 0:
+            arguments = ["-ss", f"{seek:.3f}"] + arguments
+        song_input = self._add_input(song_name, arguments)
+
+        song_filters = [f"aresample={AUDIO_FPS}"]
+        if seek < 0:
+            song_filters.append(f"adelay=delays={round(-seek * 1000)}:all=1")
+        song_filters.append("apad")
+        return [f"[{song_input}:a]{','.join(song_filters)}[song]"], "[song]"
+
+    def _facecam_filter(self) -> tuple[list[str], bool]:
+        """
+        Helper method to add the facecam and build the filters that start it
+        at the last highlight, fade it in and overlay it at the centre top of
+        the clip. A facecam that starts before the clip is trimmed so the
+        part shown at the start is the same as moviepy's. With a facecam
+        cache the clip prepared for the overlay is used, it is already the
+        visible part at the output frame rate so it lands in the same place.
+
+        Returns:
+            (tuple[list[str], bool]): The filters, with the video labelled
+                [composite] and the audio labelled [facecam_audio], and
+                whether the facecam has audio.
+        """
+        face_cam_time = self._clip_prep._highlight_time[-1] - \
+                        self._clip_prep._face_cam_start_time
+        facecam_clip = self._clip_prep._facecam_clip
+        if self._facecam_cache is not None:
+            facecam_clip = self._facecam_cache.get_clip(
+                facecam_clip=facecam_clip, width=OUTPUT_WIDTH,
+                height=OUTPUT_HEIGHT, fps=OUTPUT_FPS)
+        facecam_infos = ffmpeg_parse_infos(facecam_clip)
+        facecam_input = self._add_input(facecam_clip)
+        trim = max(0.0, -face_cam_time)
+        delay = max(0.0, face_cam_time)
+
+        filters = [
+            f"[{facecam_input}:v]trim=start={trim:.3f},"
+            f"setpts=PTS-STARTPTS+{delay:.3f}/TB,format=yuva420p,"
+            f"fade=t=in:st={delay:.3f}:d={CROSSFADE_DURATION}:alpha=1[facecam]",
+            f"[base][facecam]overlay=x='(W-w)/2':y=0:eof_action=pass:"
+            f"enable='gte(t,{delay:.3f})'[composite]"
+        ]
+        if facecam_infos["audio_found"]:
+            filters.append(
+                f"[{facecam_input}:a]atrim=start={trim:.3f},"
+                f"asetpts=PTS-STARTPTS,aresample={AUDIO_FPS},"
+                f"adelay=delays={round(delay * 1000)}:all=1[facecam_audio]")
+        return filters, facecam_infos["audio_found"]
@@ -0,0 +1,304 @@
+"""
+frame_sampler.py
+
+Class implementation to decode a video file once, in order, through a single
+ffmpeg pipe. Frames are sampled at a fixed interval by the ffmpeg fps filter
+and handed to the highlight detectors as NumPy arrays from a generator, so
+finding the highlights costs a single decode of the clip rather than a seek
+for every timestamp. A region of interest can be given so the crop is done
+inside the ffmpeg filter graph and only the small region is sent through the
+pipe. Several regions can be cut out of the same decode, they are stacked
+side by side in the filter graph and split apart again after the pipe. The
+clip can also be read from a ClipStream while it downloads, it is then fed
+to ffmpeg through its stdin.
+
+Attributes:
+    REFERENCE_WIDTH (int): The width in pixels that region of interest
+        coordinates are given in.
+    REFERENCE_HEIGHT (int): The height in pixels that region of interest
+        coordinates are given in.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The ffmpeg binary is the one moviepy is configured with so the sampler
+    and the editor always agree on the decoder.
+"""
+import math
+import subprocess
+import threading
+from collections.abc import Iterator
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from ..clip_downloader.clip_stream import ClipStream
+
+REFERENCE_WIDTH = 1920
+REFERENCE_HEIGHT = 1080
+
+
+class FrameSampler:
+    """
+    A FrameSampler yields the frames of a video at a fixed interval together
+    with their timestamps.
+
+    Args:
+        file (str | ClipStream): The path to the video file, or the stream
+            of a video that is downloading.
+        interval (float): The time between sampled frames in seconds.
+        start (float): The time in seconds to start sampling from, snapped
+            to a multiple of the interval so windowed samples line up with
+            a full pass. Defaults to 0.
+        duration (float): The length of time in seconds to sample, None to
+            sample until the end of the clip. Defaults to None.
+        crop (tuple[int, int, int, int]): The (left, top, right, bottom)
+            pixel coordinates of the region of interest in a 1080p frame,
+            None for the full frame. Defaults to None.
+        crops (list[tuple[int, int, int, int]]): The regions of interest to
+            cut out of every frame instead of a single crop, the frames are
+            then yielded as a list of regions. Defaults to None.
+    """
+    """
+    Private Attributes:
+        _source_width (int): The width of the video in pixels, None when
+            streaming since the size is not known until ffmpeg reads it.
+        _source_height (int): The height of the video in pixels, None when
+            streaming.
+        _crops (list[tuple[int, int, int, int]] | None): The regions of
+            interest, None for the full frame.
+        _width (int): The width of the sampled frames in pixels, the regions
+            side by side.
+        _height (int): The height of the sampled frames in pixels, the height
+            of the tallest region.
+        _clip_duration (float): The duration of the whole clip in seconds,
+            infinite when streaming so every frame is read.
+        _frames_decoded (int): The number of frames read from the pipe so
+            far.
+    """
+
+    def __init__(self, file: str | ClipStream, interval: float,
+                 start: float = 0.0,
+                 duration: float | None = None,
+                 crop: tuple[int, int, int, int] | None = None,
+                 crops: list[tuple[int, int, int, int]] | None = None
+                 ) -> None:
+        self._file = file
+        self._interval = interval
+        self._start = round(start / interval) * interval
+        self._duration = duration
+        self._split = crops is not None
+        self._crops = crops if crops is not None else \
+            [crop] if crop is not None else None
+        # Seek one interval early so the frame shown at the start time, which
+        # may be before the start, is decoded. The extra samples are dropped.
+        self._seek = max(0.0, self._start - interval)
+        self._skip = round((self._start - self._seek) / interval)
+        if isinstance(file, ClipStream):
+            self._source_width = self._source_height = None
+            self._clip_duration = math.inf
+        else:
+            infos = ffmpeg_parse_infos(file)
+            self._source_width, self._source_height = infos["video_size"]
+            self._clip_duration = infos["duration"]
+        if self._crops is None:
+            self._width, self._height = self._source_width, self._source_height
+        else:
+            self._width = sum(right - left
+                              for left, _, right, _ in self._crops)
+            self._height = max(bottom - top
+                               for _, top, _, bottom in self._crops)
+        self._frames_decoded = 0
+
+    def __iter__(self) -> Iterator[tuple[float, np.ndarray]]:
+        return self.frames()
+
+    def get_duration(self) -> float:
+        """
+        Method to access the duration of the whole clip.
+
+        Returns:
+            (float): The duration of the clip in seconds.
+        """
+        return self._clip_duration
+
+    def get_frames_decoded(self) -> int:
+        """
+        Method to access the number of frames that have been sampled.
+
+        Returns:
+            (int): The number of frames read from ffmpeg.
+        """
+        return self._frames_decoded
+
+    def frames(self) -> Iterator[tuple[float, np.ndarray | list[np.ndarray]]]:
+        """
+        Generator that decodes the clip and yields every sampled frame. The
+        ffmpeg process is stopped as soon as the generator is closed, so the
+        consumer can stop early without decoding the rest of the clip.
+
+        Yields:
+            (tuple[float, np.ndarray | list[np.ndarray]]): The time of the
+                frame in seconds and the frame, or the region of interest
+                when a crop was given, as a height x width x 3 RGB array. A
+                list of the regions in order when crops were given.
+        """
+        frame_bytes = self._width * self._height * 3
+        end = self._clip_duration
+        if self._duration is not None:
+            end = min(end, self._start + self._duration)
+
+        streaming = isinstance(self._file, ClipStream)
+        process = subprocess.Popen(self._ffmpeg_command(),
+                                   stdin=subprocess.PIPE if streaming
+                                   else None,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL,
+                                   bufsize=frame_bytes)
+        if streaming:
+            threading.Thread(target=self._feed, args=(process,),
+                             daemon=True).start()
+        try:
+            for _ in range(self._skip):
+                process.stdout.read(frame_bytes)
+            index = 0
+            while True:
+                frame_time = self._start + index * self._interval
+                if frame_time >= end:
+                    break
+                buffer = process.stdout.read(frame_bytes)
+                if len(buffer) < frame_bytes:
+                    break
+                self._frames_decoded += 1
+                index += 1
+                frame = np.frombuffer(buffer, dtype=np.uint8).reshape(
+                    self._height, self._width, 3)
+                yield frame_time, self._split_regions(frame) \
+                    if self._split else frame
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+    def _feed(self, process: subprocess.Popen) -> None:
+        """
+        Helper method run in a thread to write the stream to the stdin of
+        ffmpeg as it downloads. Stops when ffmpeg exits, which happens when
+        the consumer stops early, and closes stdin at the end of the stream
+        or when the download fails so ffmpeg finishes the frames it has.
+
+        Args:
+            process (subprocess.Popen): The ffmpeg process.
+        """
+        try:
+            for chunk in self._file.chunks():
+                process.stdin.write(chunk)
+        except (OSError, ValueError):
+            pass
+        except Exception as error:
+            print(f"stream to the frame sampler stopped: {error}")
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    def _split_regions(self, frame: np.ndarray) -> list[np.ndarray]:
+        """
+        Helper method to cut the regions stacked side by side in a frame
+        apart again.
+
+        Args:
+            frame (np.ndarray): The stacked regions.
+        Returns:
+            (list[np.ndarray]): Every region in the order of the crops, as a
+                contiguous array.
+        """
+        regions = []
+        x = 0
+        for left, top, right, bottom in self._crops:
+            regions.append(np.ascontiguousarray(
+                frame[:bottom - top, x:x + right - left]))
+            x += right - left
+        return regions
+
+    def _ffmpeg_command(self) -> list[str]:
+        """
+        Helper method to build the ffmpeg command that decodes the clip and
+        writes the sampled frames to stdout as raw RGB.
+
+        Returns:
+            (list[str]): The command and its arguments.
+        """
+        command = [get_setting("FFMPEG_BINARY"), "-loglevel", "error"]
+        if self._seek > 0:
+            command += ["-ss", f"{self._seek:.3f}"]
+        if self._duration is not None:
+            command += ["-t",
+                        f"{self._start + self._duration - self._seek:.3f}"]
+        source = "pipe:0" if isinstance(self._file, ClipStream) \
+            else self._file
+        command += ["-i", source, "-an", "-sn",
+                    "-vf", self._filter_graph(),
+                    "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+        return command
+
+    def _filter_graph(self) -> str:
+        """
+        Helper method to build the video filter that samples the frames and
+        cuts out the regions of interest. Every sample is the last frame
+        shown at or before its timestamp, the same frame moviepy's get_frame
+        returns. The crop is scaled to the resolution
+        of the video and the result is scaled back to the size of the region
+        in a 1080p frame, so the detectors always see the same frame size.
+        Several regions are split off the sampled frame, padded to the same
+        height and stacked side by side.
+
+        Returns:
+            (str): The ffmpeg filter graph.
+        """
+        sample = f"fps=fps={1 / self._interval}:start_time=0:round=up"
+        if self._crops is None:
+            return sample
+        if len(self._crops) == 1:
+            return ",".join([sample] + self._crop_filters(self._crops[0]))
+
+        count = len(self._crops)
+        graph = [f"{sample},split={count}" +
+                 "".join(f"[sample{index}]" for index in range(count))]
+        for index, crop in enumerate(self._crops):
+            # Padding a region of odd height is only exact once the chroma
+            # is no longer subsampled.
+            filters = self._crop_filters(crop) + \
+                ["format=rgb24", f"pad=w=iw:h={self._height}:x=0:y=0"]
+            graph.append(f"[sample{index}]{','.join(filters)}[region{index}]")
+        graph.append("".join(f"[region{index}]" for index in range(count)) +
+                     f"hstack=inputs={count}")
+        return ";".join(graph)
+
+    def _crop_filters(self, crop: tuple[int, int, int, int]) -> list[str]:
+        """
+        Helper method to build the filters that cut one region of interest
+        out of a frame at the size it has in a 1080p frame.
+
+        Args:
+            crop (tuple[int, int, int, int]): The (left, top, right, bottom)
+                pixel coordinates of the region in a 1080p frame.
+        Returns:
+            (list[str]): The ffmpeg filters.
+        """
+        left, top, right, bottom = crop
+        width, height = right - left, bottom - top
+        if (self._source_width, self._source_height) == \
+                (REFERENCE_WIDTH, REFERENCE_HEIGHT):
+            return [f"crop=w={width}:h={height}:x={left}:y={top}:exact=1"]
+        return [f"crop=w=iw*{width}/{REFERENCE_WIDTH}:"
+                f"h=ih*{height}/{REFERENCE_HEIGHT}:"
+                f"x=iw*{left}/{REFERENCE_WIDTH}:"
+                f"y=ih*{top}/{REFERENCE_HEIGHT}:exact=1",
+                f"scale={width}:{height}"]
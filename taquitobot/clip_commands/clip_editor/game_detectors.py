@@ -0,0 +1,331 @@
+"""
+game_detectors.py
+
+Registry of the highlight detectors of every game the bot edits clips for. A
+detector is declared as a DetectorSpec, the region of the HUD it looks at,
+the colour of the marker, the shape of the marker and how far apart its
+highlights are, rather than as a ClipPrep subclass. Every registered
+detector runs on the same decoded frames, so a new game is added with a
+call to register_detector and does not decode the clip again.
+
+Attributes:
+    SHAPE_TESTS (dict[str, tuple[Callable, Callable]]): The cheap coarse test
+        and the full test for every marker shape a detector can look for.
+        Both take the image of the region (the colour mask, or grayscale
+        when the detector has no colour bounds) and the size of the shape.
+    SHAPE_MIN_PIXELS (dict[str, Callable]): The fewest pixels of the colour
+        mask the shapes that have a bound on it need, from the size of the
+        shape. Frames with fewer pixels fail both tests without running
+        them.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    Games are matched ignoring case, so the detector of "Valorant" as
+    outplayed.tv spells it is found for "valorant" too. The game of a
+    detector is spelled the way outplayed.tv spells it, since it titles the
+    edited videos. Detectors are registered when the module is imported, so
+    a detector registered at runtime is only known to worker processes that
+    are forked after the registration.
+"""
+import cv2
+import numpy as np
+
+
+def _circle_candidate(image: np.ndarray, size: dict[str, float]) -> bool:
+    """
+    Coarse test for a circle, HoughCircles needs at least 100 edge pixels
+    voting for a centre, so an image with fewer Canny edges than that (using
+    the thresholds HoughCircles uses internally) cannot contain the circle.
+    """
+    return cv2.countNonZero(cv2.Canny(image, 50, 100)) >= 100
+
+
+def _circle_found(image: np.ndarray, size: dict[str, float]) -> bool:
+    """
+    Full test for a circle with a radius between min_radius and max_radius.
+    """
+    circles = cv2.HoughCircles(image, cv2.HOUGH_GRADIENT, 1.5, 100,
+                               minRadius=size["min_radius"],
+                               maxRadius=size["max_radius"])
+    return circles is not None
+
+
+def _square_min_pixels(size: dict[str, float]) -> float:
+    """
+    A square with an area over min_area has a perimeter of at least
+    4 * sqrt(area), so the mask needs at least half that many pixels (less
+    the diagonal steps) to contain it.
+    """
+    return 2 * np.sqrt(size["min_area"])
+
+
+def _square_candidate(image: np.ndarray, size: dict[str, float]) -> bool:
+    """
+    Coarse test for a square, the mask has enough pixels to contain it.
+    """
+    return cv2.countNonZero(image) >= _square_min_pixels(size)
+
+
+def _square_found(image: np.ndarray, size: dict[str, float]) -> bool:
+    """
+    Full test for a four sided shape in the mask with an area over min_area.
+    """
+    contours = cv2.findContours(image, cv2.RETR_EXTERNAL,
+                                cv2.CHAIN_APPROX_NONE)[0]
+    for contour in contours:
+        epsilon = 0.02 * cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, epsilon, True)
+
+        # shape should have 4 verticies
+        if len(approx) == 4 and cv2.contourArea(contour) > size["min_area"]:
+            return True
+    return False
+
+
+SHAPE_TESTS = {"circle": (_circle_candidate, _circle_found),
+               "square": (_square_candidate, _square_found)}
+SHAPE_MIN_PIXELS = {"square": _square_min_pixels}
+
+
+class DetectorSpec:
+    """
+    A DetectorSpec declares how the highlights of one game are found.
+
+    Args:
+        game (str): The title of the game as outplayed.tv gives it, such as
+            "Valorant".
+        crop (tuple[int, int, int, int]): The (left, top, right, bottom)
+            pixel coordinates of the HUD region in a 1080p frame.
+        shape (str): The shape of the marker, a key of SHAPE_TESTS.
+        size (dict[str, float]): The size of the shape, min_radius and
+            max_radius for a circle and min_area for a square.
+        spacing (float): The minimum time in seconds between highlights.
+        colour_bounds (tuple[np.ndarray, np.ndarray]): The lower and upper
+            HSV bounds of the colour of the marker, None to look for the
+            shape in the grayscale region. Defaults to None.
+        offset (float): The time in seconds added to the frame the marker is
+            found on to get the highlight. Defaults to 0.
+        highlight_limit (int): The number of highlights after which the
+            search stops when there is no facecam clip, None for every
+            highlight. Defaults to None.
+        facecam_highlight_limit (int): The number of highlights after which
+            the search stops when there is a facecam clip, None for every
+            highlight. Defaults to None.
+
+    Raises:
+        ValueError: If the shape is not a key of SHAPE_TESTS.
+    """
+    """
+    Private Attributes:
+        _candidate_test (Callable): The coarse test of the shape.
+        _highlight_test (Callable): The full test of the shape.
+        _min_pixels (float): The fewest pixels in the colour mask of a frame
+            that can show the marker, 0 when there is no bound.
+    """
+
+    def __init__(self, game: str, crop: tuple[int, int, int, int],
+                 shape: str, size: dict[str, float], spacing: float,
+                 colour_bounds: tuple[np.ndarray, np.ndarray] | None = None,
+                 offset: float = 0,
+                 highlight_limit: int | None = None,
+                 facecam_highlight_limit: int | None = None) -> None:
+        if shape not in SHAPE_TESTS:
+            raise ValueError(f"Unknown detector shape {shape}, expected one "
+                             f"of {', '.join(SHAPE_TESTS)}")
+        self._game = game
+        self._crop = crop
+        self._shape = shape
+        self._size = size
+        self._spacing = spacing
+        self._colour_bounds = colour_bounds
+        self._offset = offset
+        self._highlight_limit = highlight_limit
+        self._facecam_highlight_limit = facecam_highlight_limit
+        self._candidate_test, self._highlight_test = SHAPE_TESTS[shape]
+        self._min_pixels = 0
+        if colour_bounds is not None and shape in SHAPE_MIN_PIXELS:
+            self._min_pixels = SHAPE_MIN_PIXELS[shape](size)
+
+    def get_game(self) -> str:
+        """
+        Method to access the title of the game the detector is for.
+
+        Returns:
+            (str): The title of the game.
+        """
+        return self._game
+
+    def get_crop(self) -> tuple[int, int, int, int]:
+        """
+        Method to access the region of the frame the detector looks at.
+
+        Returns:
+            (tuple[int, int, int, int]): The (left, top, right, bottom) crop
+                in pixel coordinates of a 1080p frame.
+        """
+        return self._crop
+
+    def get_spacing(self) -> float:
+        """
+        Method to access the minimum time between highlights.
+
+        Returns:
+            (float): The spacing in seconds.
+        """
+        return self._spacing
+
+    def get_offset(self) -> float:
+        """
+        Method to access the time added to the frame the marker is found on.
+
+        Returns:
+            (float): The offset in seconds.
+        """
+        return self._offset
+
+    def get_highlight_limit(self, facecam: bool) -> int | None:
+        """
+        Method to access the maximum number of highlights to look for.
+
+        Args:
+            facecam (bool): If a facecam clip is added to the video, which
+                shows the later highlights.
+        Returns:
+            (int | None): The number of highlights after which the search
+                stops, None to search the whole clip.
+        """
+        if facecam:
+            return self._facecam_highlight_limit
+        return self._highlight_limit
+
+    def get_min_pixels(self) -> float:
+        """
+        Method to access the fewest pixels the image of a frame needs to show
+        the marker.
+
+        Returns:
+            (float): The number of pixels, 0 if every frame is tested.
+        """
+        return self._min_pixels
+
+    def measure(self, regions: np.ndarray
+                ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Method to get the images the shape is looked for in for a batch of
+        frames, with the number of pixels set in each. The regions are
+        stacked on top of each other so the colour conversion and the mask
+        are a single OpenCV call for the whole batch.
+
+        Args:
+            regions (np.ndarray): The RGB regions of interest of the frames,
+                stacked on the first axis.
+        Returns:
+            (tuple[np.ndarray, np.ndarray]): The image of every frame, the
+                colour mask or grayscale without colour bounds, and the
+                number of pixels that are not 0 in each.
+        """
+        count, height, width, channels = regions.shape
+        images = self._image(np.ascontiguousarray(regions).reshape(
+            count * height, width, channels)).reshape(count, height, width)
+        return images, np.count_nonzero(images.reshape(count, -1), axis=1)
+
+    def is_candidate(self, image: np.ndarray) -> bool:
+        """
+        Method for the cheap test of the coarse pass, it passes on every
+        frame that passes is_highlight.
+
+        Args:
+            image (np.ndarray): The image of the frame from measure.
+        Returns:
+            (bool): True if the frames around this one should be checked.
+        """
+        return self._candidate_test(image, self._size)
+
+    def is_highlight(self, image: np.ndarray) -> bool:
+        """
+        Method to check if a frame shows the marker of a highlight.
+
+        Args:
+            image (np.ndarray): The image of the frame from measure.
+        Returns:
+            (bool): True if the frame shows a highlight.
+        """
+        return self._highlight_test(image, self._size)
+
+    def _image(self, region: np.ndarray) -> np.ndarray:
+        """
+        Helper method to get the image the shape is looked for in.
+
+        Args:
+            region (np.ndarray): The RGB region of interest of the frame, or
+                the regions of a batch stacked on top of each other.
+        Returns:
+            (np.ndarray): Mask that is 255 where the pixel is the colour of
+                the marker, or the grayscale region without colour bounds.
+        """
+        if self._colour_bounds is None:
+            return cv2.cvtColor(region, cv2.COLOR_RGB2GRAY)
+        hsv_frame = cv2.cvtColor(region, cv2.COLOR_RGB2HSV)
+        return cv2.inRange(hsv_frame, *self._colour_bounds)
+
+
+_detectors = {}
+
+
+def register_detector(detector: DetectorSpec) -> None:
+    """
+    Function to add a detector to the registry, replacing the detector of
+    the same game, in any case, if there is one.
+
+    Args:
+        detector (DetectorSpec): The detector to add.
+    """
+    _detectors[detector.get_game().casefold()] = detector
+
+
+def get_detector(game: str) -> DetectorSpec | None:
+    """
+    Function to get the detector of a game, ignoring the case of the title.
+
+    Args:
+        game (str): The title of the game.
+    Returns:
+        (DetectorSpec | None): The detector, None if the game has none.
+    """
+    return _detectors.get(game.casefold())
+
+
+def get_detectors(preferred: str = "") -> list[DetectorSpec]:
+    """
+    Function to get every registered detector in the order they were
+    registered, with the detector of the preferred game first.
+
+    Args:
+        preferred (str): The title of the game to put first. Defaults to
+            empty string.
+    Returns:
+        (list[DetectorSpec]): The detectors.
+    """
+    return sorted(_detectors.values(),
+                  key=lambda detector: detector.get_game().casefold() !=
+                  preferred.casefold())
+
+
+# The kill circle, an offset of -0.35 s lines the beat drop up with the shot
+# rather than the circle appearing. Only the first kill is needed without a
+# facecam clip.
+register_detector(DetectorSpec(
+    game="Valorant", crop=(905, 805, 1015, 920), shape="circle",
+    size={"min_radius": 40, "max_radius": 60}, spacing=2, offset=-0.35,
+    highlight_limit=1, facecam_highlight_limit=5))
+# The yellow square around the kill feed portrait.
+register_detector(DetectorSpec(
+    game="LeagueofLegends", crop=(1785, 243, 1840, 450), shape="square",
+    size={"min_area": 1500}, spacing=5,
+    colour_bounds=(np.array([20, 100, 100]), np.array([40, 255, 255]))))
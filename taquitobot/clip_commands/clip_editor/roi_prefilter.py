@@ -0,0 +1,138 @@
+"""
+roi_prefilter.py
+
+Class implementation of a cheap change detection step ahead of the highlight
+detectors. The HUD region the detectors look at is static for most of a
+clip, so every frame gets a small signature, the mean colour of a grid of
+blocks of the region, computed with NumPy for a batch of frames at once. A
+test is only run on a frame whose signature differs from the frame the test
+last ran on, every other frame reuses that result.
+
+Attributes:
+    SIGNATURE_GRID (int): The number of blocks along each side of the region
+        the signature is made of.
+    CHANGE_THRESHOLD (float): The largest difference in the mean of any
+        block and channel, out of 255, for the region to count as unchanged.
+    BATCH_SIZE (int): The number of frames the signatures are computed for
+        at a time.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The signature is compared against the frame the test last ran on rather
+    than the frame before, so a slow fade cannot creep past the threshold a
+    little at a time.
+"""
+from collections.abc import Callable
+import numpy as np
+
+SIGNATURE_GRID = 8
+CHANGE_THRESHOLD = 1.5
+BATCH_SIZE = 8
+
+
+class RoiPrefilter:
+    """
+    A RoiPrefilter answers the detector tests from the last result while the
+    region of interest stays the same.
+
+    Args:
+        threshold (float): The change in any block mean below which a frame
+            reuses the last result. Defaults to CHANGE_THRESHOLD, None turns
+            the prefilter off.
+        grid (int): The number of blocks along each side of the region.
+            Defaults to SIGNATURE_GRID.
+    """
+    """
+    Private Attributes:
+        _references (dict[str, tuple[np.ndarray, bool]]): The signature of
+            the frame every test last ran on and its result, keyed by the
+            name of the test.
+        _frames_checked (int): The number of tests that were run.
+        _frames_skipped (int): The number of tests answered from an earlier
+            result.
+    """
+
+    def __init__(self, threshold: float | None = CHANGE_THRESHOLD,
+                 grid: int = SIGNATURE_GRID) -> None:
+        self._threshold = threshold
+        self._grid = grid
+        self._references = {}
+        self._frames_checked = 0
+        self._frames_skipped = 0
+
+    def get_frames_checked(self) -> int:
+        """
+        Method to access the number of tests that were run.
+
+        Returns:
+            (int): The number of frames tested.
+        """
+        return self._frames_checked
+
+    def get_frames_skipped(self) -> int:
+        """
+        Method to access the number of tests that reused an earlier result.
+
+        Returns:
+            (int): The number of frames skipped.
+        """
+        return self._frames_skipped
+
+    def check(self, test: Callable[[np.ndarray], bool], region: np.ndarray,
+              signature: np.ndarray) -> bool:
+        """
+        Method to run a test on a frame, or to reuse its last result if the
+        region has not changed since.
+
+        Args:
+            test (Callable[[np.ndarray], bool]): The detector test.
+            region (np.ndarray): The region of interest of the frame, or the
+                image of it the test runs on.
+            signature (np.ndarray): The signature of the region.
+        Returns:
+            (bool): The result of the test.
+        """
+        reference = self._references.get(test.__name__)
+        if self._threshold is not None and reference is not None and \
+                np.abs(signature - reference[0]).max() < self._threshold:
+            self._frames_skipped += 1
+            return reference[1]
+        result = test(region)
+        self._references[test.__name__] = (signature, result)
+        self._frames_checked += 1
+        return result
+
+    def signatures(self, regions: np.ndarray) -> np.ndarray:
+        """
+        Method to compute the signatures of a stack of regions in one NumPy
+        operation. The region is split into a grid of blocks and the
+        signature is the mean of every channel of every block, rows and
+        columns that do not fill a block are left out. The blocks are summed
+        a row at a time and then a column at a time in integers, which is
+        exact and much faster than a mean over two axes at once.
+
+        Args:
+            regions (np.ndarray): The uint8 regions of the frames, stacked on
+                the first axis.
+        Returns:
+            (np.ndarray): The float32 signature of every region.
+        """
+        count, height, width, channels = regions.shape
+        grid_height = min(self._grid, height)
+        grid_width = min(self._grid, width)
+        block_height = height // grid_height
+        block_width = width // grid_width
+        rows = regions[:, :grid_height * block_height,
+                       :grid_width * block_width].reshape(
+            count, grid_height, block_height,
+            grid_width * block_width * channels)
+        rows = rows.sum(axis=2, dtype=np.uint32)
+        blocks = rows.reshape(count, grid_height, grid_width, block_width,
+                              channels).sum(axis=3)
+        return blocks / np.float32(block_height * block_width)
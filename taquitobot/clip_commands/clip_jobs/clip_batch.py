@@ -0,0 +1,280 @@
+"""
+clip_batch.py
+
+Command line entry point to turn a backlog of local clips into shorts
+without going through discord. Takes a folder of clips or a JSONL manifest,
+finds the highlights and renders every clip in a pool of worker processes,
+and appends a line per clip with its timings, highlights and output to a
+JSONL report. Clips that already have an edited video in the output folder
+are skipped, and uploading the edited videos to YouTube is optional.
+
+Usage:
+    python taquitobot/clip_batch.py CLIPS [--output-folder shorts]
+        [--workers 2] [--report report.jsonl] [--game valorant] [--upload]
+
+Attributes:
+    CLIP_EXTENSIONS (tuple[str, ...]): The extensions of the files picked up
+        from a folder of clips.
+    WORKERS (int): The default number of clips processed at the same time.
+    REPORT_FILE (str): The name of the report in the output folder when no
+        report is given.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    Every line of a manifest is a JSON object with the path to the clip in
+    "file", relative to the manifest, and optionally the title of the video
+    in "title" and the game in "game". The title defaults to the name of the
+    file and a clip without a game is identified from its HUD. Uploads are
+    made one at a time from the main process, so Chrome is only opened once.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from ..clip_cache.artifact_store import ArtifactStore
+from ..clip_cache.facecam_cache import FacecamCache
+from ..clip_cache.song_cache import SongCache
+from ..clip_editor.clip_editor import ClipEditor
+from ..clip_editor.clip_prep import ClipPrepAuto
+from ..clip_editor.game_detectors import get_detector, get_detectors
+from .clip_job_executor import upload_clip
+
+CLIP_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm")
+WORKERS = max(1, (os.cpu_count() or 1) // 2)
+REPORT_FILE = "clip_batch_report.jsonl"
+
+
+def find_clips(source: str, game_title: str = "") -> list[dict[str, str]]:
+    """
+    Function to list the clips of a batch from a folder or a manifest.
+
+    Args:
+        source (str): The path to a folder of clips or a JSONL manifest.
+        game_title (str): The game of every clip the manifest gives no game
+            for, empty string to identify it from the HUD. Defaults to empty
+            string.
+    Returns:
+        (list[dict[str, str]]): The path, title and game of every clip, in
+            order.
+
+    Raises:
+        FileNotFoundError: If the source does not exist.
+        ValueError: If a line of the manifest has no file.
+    """
+    if os.path.isdir(source):
+        return [{"file": os.path.join(source, name),
+                 "title": os.path.splitext(name)[0], "game": game_title}
+                for name in sorted(os.listdir(source))
+                if name.lower().endswith(CLIP_EXTENSIONS)]
+
+    clips = []
+    with open(source) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "file" not in entry:
+                raise ValueError(f"Line {line_number} of {source} has no "
+                                 f"file")
+            file_name = os.path.join(os.path.dirname(source), entry["file"])
+            clips.append({"file": file_name,
+                          "title": entry.get("title") or os.path.splitext(
+                              os.path.basename(file_name))[0],
+                          "game": entry.get("game") or game_title})
+    return clips
+
+
+def find_output(clip: dict[str, str], output_folder: str) -> str | None:
+    """
+    Function to find the edited video of a clip from an earlier batch. A clip
+    without a game may have been edited as any registered game, and a game
+    with a detector is titled the way the detector spells it.
+
+    Args:
+        clip (dict[str, str]): The path, title and game of the clip.
+        output_folder (str): The folder the edited videos are saved in.
+    Returns:
+        (str | None): The path to the edited video, None if there is none.
+    """
+    detectors = [get_detector(clip["game"])] if clip["game"] else \
+        get_detectors()
+    games = [clip["game"] if detector is None else detector.get_game()
+             for detector in detectors]
+    for game_title in games:
+        edited_clip = ClipEditor.get_edited_file_name(
+            video_title=clip["title"], game_title=game_title,
+            output_folder=output_folder)
+        if os.path.exists(edited_clip):
+            return edited_clip
+    return None
+
+
+def process_clip(clip: dict[str, str], output_folder: str) -> dict:
+    """
+    Function run in a worker process to find the highlights of a clip and
+    render the edited video. Highlights found for the clip before are read
+    from the artifact store.
+
+    Args:
+        clip (dict[str, str]): The path, title and game of the clip.
+        output_folder (str): The folder the edited video is saved in.
+    Returns:
+        (dict): The report of the clip, the status is "done" or "failed".
+    """
+    report = dict(clip, status="failed", highlights=[], output="",
+                  seconds={}, error="")
+    start = time.perf_counter()
+    try:
+        clip_prep = ClipPrepAuto(video_file=clip["file"],
+                                 game_title=clip["game"],
+                                 artifact_store=ArtifactStore())
+        report["game"] = clip_prep.get_game_title()
+        report["highlights"] = clip_prep.get_highlight_time()
+        report["seconds"]["detection"] = time.perf_counter() - start
+
+        render_start = time.perf_counter()
+        clip_editor = ClipEditor(clip_prep=clip_prep, song_cache=SongCache(),
+                                 facecam_cache=FacecamCache())
+        report["output"] = clip_editor.edit_and_save_video(
+            clip_file=clip["file"], game_title=report["game"],
+            video_title=clip["title"], output_folder=output_folder)
+        report["seconds"]["render"] = time.perf_counter() - render_start
+        if report["output"] == "":
+            report["error"] = "render failed"
+        else:
+            report["status"] = "done"
+    except Exception as error:
+        report["error"] = f"{type(error).__name__}: {error}"
+    report["seconds"]["total"] = time.perf_counter() - start
+    return report
+
+
+def run_batch(clips: list[dict[str, str]], output_folder: str,
+              report_file: str, workers: int = WORKERS,
+              upload: bool = False,
+              pool: Executor | None = None) -> list[dict]:
+    """
+    Function to process a batch of clips in a pool of worker processes. A
+    line is appended to the report as soon as a clip is done, so the report
+    of a batch that is stopped part way covers the clips it finished. A
+    clip whose worker process dies is reported as failed and the batch goes
+    on.
+
+    Args:
+        clips (list[dict[str, str]]): The path, title and game of every clip.
+        output_folder (str): The folder the edited videos are saved in.
+        report_file (str): The path to the JSONL report.
+        workers (int): The number of clips processed at the same time.
+            Defaults to WORKERS.
+        upload (bool): If the edited videos should be uploaded to YouTube.
+            Defaults to False.
+        pool (Executor): The executor the clips are processed in, it is
+            shut down at the end of the batch. Defaults to a process pool
+            with workers processes.
+    Returns:
+        (list[dict]): The report of every clip, in the order they finished.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    reports = []
+    pool = pool or ProcessPoolExecutor(max_workers=workers)
+    with open(report_file, "a") as report, pool:
+
+        def write(clip_report: dict) -> None:
+            reports.append(clip_report)
+            report.write(json.dumps(clip_report) + "\n")
+            report.flush()
+            error = clip_report["error"]
+            print(f"{clip_report['status']} {clip_report['file']}"
+                  f"{': ' + error if error else ''}")
+
+        jobs = {}
+        for clip in clips:
+            edited_clip = find_output(clip=clip, output_folder=output_folder)
+            if edited_clip is not None:
+                write(dict(clip, status="skipped", highlights=[],
+                           output=edited_clip, seconds={}, error=""))
+            else:
+                jobs[pool.submit(process_clip, clip, output_folder)] = clip
+
+        for job in as_completed(jobs):
+            try:
+                clip_report = job.result()
+            except Exception as error:
+                # process_clip reports its own errors, this is the worker
+                # dying under it, e.g. a BrokenProcessPool
+                write(dict(jobs[job], status="failed", highlights=[],
+                           output="", seconds={},
+                           error=f"{type(error).__name__}: {error}"))
+                continue
+            if upload and clip_report["status"] == "done":
+                _upload_report(clip_report=clip_report)
+            write(clip_report)
+    return reports
+
+
+def _upload_report(clip_report: dict) -> None:
+    """
+    Helper function to upload the edited video of a clip and add the link
+    and upload time to its report.
+
+    Args:
+        clip_report (dict): The report of a clip that was rendered.
+    """
+    upload_start = time.perf_counter()
+    try:
+        clip_report["video_link"] = upload_clip(
+            clip_report["output"], clip_report["title"], clip_report["game"])
+    except Exception as error:
+        clip_report["status"] = "failed"
+        clip_report["error"] = f"upload {type(error).__name__}: {error}"
+    clip_report["seconds"]["upload"] = time.perf_counter() - upload_start
+    clip_report["seconds"]["total"] += clip_report["seconds"]["upload"]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Function to run a batch from the command line.
+
+    Args:
+        argv (list[str] | None): The command line arguments, None for
+            sys.argv. Defaults to None.
+    Returns:
+        (int): The exit code, 1 if any clip failed.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("clips",
+                        help="folder of clips or JSONL manifest of clips")
+    parser.add_argument("--output-folder", default="shorts")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--report", default=None,
+                        help=f"JSONL report, {REPORT_FILE} in the output "
+                             f"folder by default")
+    parser.add_argument("--game", default="",
+                        help="game of the clips without one, identified "
+                             "from the HUD by default")
+    parser.add_argument("--upload", action="store_true",
+                        help="upload the edited videos to YouTube")
+    args = parser.parse_args(argv)
+
+    clips = find_clips(source=args.clips, game_title=args.game)
+    reports = run_batch(
+        clips=clips, output_folder=args.output_folder,
+        report_file=args.report or os.path.join(args.output_folder,
+                                                REPORT_FILE),
+        workers=args.workers, upload=args.upload)
+    statuses = [clip_report["status"] for clip_report in reports]
+    print(f"{statuses.count('done')} edited, "
+          f"{statuses.count('skipped')} skipped, "
+          f"{statuses.count('failed')} failed")
+    return 1 if "failed" in statuses else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
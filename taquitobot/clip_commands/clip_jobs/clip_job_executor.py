@@ -0,0 +1,482 @@
+"""
+clip_job_executor.py
+
+Class implementation to run the outplayed.tv clip pipeline (download, prep,
+edit and upload) off of the discord event loop. Jobs are submitted from the
+bot and return immediately, the CPU heavy stages are run in a process pool
+and the network stages are run in a thread pool. In streaming mode the clip
+is downloaded and searched for highlights at the same time, in one stage in
+the process pool, after the link has been resolved in the thread pool.
+
+Attributes:
+    MAX_JOBS_IN_FLIGHT (int): The default number of clip jobs that can be
+        processed at the same time, extra jobs wait for a free slot.
+    IO_WORKERS (int): The default number of threads used for the network
+        bound stages of the pipeline.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The stage functions are defined at the module level so that they can be
+    pickled and sent to the process pool. The job directory is acquired and
+    released in the default executor of the event loop rather than the
+    thread pool, so it is still removed after shutdown has stopped the
+    thread pool.
+"""
+import asyncio
+import contextlib
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from ..clip_cache.artifact_store import ArtifactStore
+from ..clip_cache.facecam_cache import FacecamCache
+from ..clip_cache.song_cache import SongCache
+from ..clip_downloader.clip_downloader_discord import ClipDownloaderDiscord
+from ..clip_downloader.clip_downloader_exceptions import DownloadException
+from ..clip_downloader.clip_downloader_link import ClipDownloaderLink
+from ..clip_downloader.clip_stream import ClipStream
+from ..clip_editor.clip_prep import ClipPrepAbstract, ClipPrepAuto
+from ..clip_editor.clip_editor import ClipEditor
+from ..clip_metrics.pipeline_metrics import get_metrics
+from ..clip_uploader.chrome_driver_pool import get_driver_pool
+from ..clip_uploader.clip_uploader import YouTubeUploader
+from ..clip_uploader.youtube_api_uploader import YouTubeApiUploader
+from .workspace import Workspace, get_workspace
+
+MAX_JOBS_IN_FLIGHT = 2
+IO_WORKERS = 4
+
+
+def _download_clip(discord_message: str,
+                   job_folder: str) -> tuple[str, str, str]:
+    """
+    Network stage to find the clip from the discord message and download it
+    into the job directory, from where it is linked into the artifact store.
+    A clip that has been downloaded from the same link before is linked into
+    the job directory from the artifact store instead.
+
+    Args:
+        discord_message (str): The discord message containing the outplayed
+            link.
+        job_folder (str): The scratch directory of the job.
+    Returns:
+        (tuple[str, str, str]): The path to the clip in the job directory,
+            the title of the game and the title of the video.
+    """
+    clip_downloader = ClipDownloaderDiscord(discord_message=discord_message,
+                                            download_folder=job_folder)
+    artifact_store = ArtifactStore()
+    web_link = clip_downloader.get_web_link()
+    file_name = artifact_store.get_clip(url=web_link, job_folder=job_folder)
+    if file_name is None:
+        file_name = artifact_store.put_clip(
+            url=web_link, file_name=clip_downloader.download_video(),
+            keep=True)
+    return (file_name, clip_downloader.get_game_title(),
+            clip_downloader.get_video_title())
+
+
+def _prepare_and_edit_clip(file_name: str, game_title: str,
+                           video_title: str,
+                           job_folder: str) -> tuple[str, str]:
+    """
+    CPU stage to find the highlights in the clip and render the edited video.
+    A clip that has been rendered with the same title before is linked from
+    the artifact store, and a clip that has been searched before reuses the
+    stored highlight times.
+
+    Args:
+        file_name (str): The path to the downloaded clip.
+        game_title (str): The title of the game given by outplayed.tv.
+        video_title (str): The title of the video set by the user.
+        job_folder (str): The scratch directory of the job, the edited clip
+            is saved in it.
+    Returns:
+        (tuple[str, str]): The path to the edited clip and the title of the
+            game it is titled with, the same whether it was rendered or
+            taken from the artifact store.
+    """
+    artifact_store = ArtifactStore()
+    render_key = f"{artifact_store.get_clip_hash(file_name)}:{game_title}:" \
+                 f"{video_title}"
+    stored_render = artifact_store.get_render(render_key=render_key,
+                                              job_folder=job_folder)
+    if stored_render is not None:
+        stored_game = artifact_store.get_render_game(render_key=render_key)
+        game_title = stored_game or game_title
+        edited_clip = ClipEditor.get_edited_file_name(
+            video_title=video_title, game_title=game_title,
+            output_folder=job_folder)
+        os.replace(stored_render, edited_clip)
+        return edited_clip, game_title
+
+    clip_prep = _make_clip_prep(game_title=game_title, file_name=file_name,
+                                artifact_store=artifact_store)
+    return _render_clip(clip_prep=clip_prep, file_name=file_name,
+                        video_title=video_title, job_folder=job_folder,
+                        artifact_store=artifact_store,
+                        render_key=render_key), clip_prep.get_game_title()
+
+
+def _resolve_clip(discord_message: str,
+                  job_folder: str) -> tuple[str, str, str, str | None]:
+    """
+    Network stage of the streaming pipeline to find the link to the clip
+    from the discord message and look it up in the artifact store, without
+    downloading it.
+
+    Args:
+        discord_message (str): The discord message containing the outplayed
+            link.
+        job_folder (str): The scratch directory of the job, a stored clip is
+            linked into it.
+    Returns:
+        (tuple[str, str, str, str | None]): The link to the video, the title
+            of the game, the title of the video and the path to the stored
+            clip, None if it has not been downloaded before.
+    """
+    clip_downloader = ClipDownloaderDiscord(discord_message=discord_message,
+                                            download_folder=job_folder)
+    web_link = clip_downloader.get_web_link()
+    stored_clip = ArtifactStore().get_clip(url=web_link,
+                                           job_folder=job_folder)
+    return (web_link, clip_downloader.get_game_title(),
+            clip_downloader.get_video_title(), stored_clip)
+
+
+def _stream_and_edit_clip(web_link: str, game_title: str, video_title: str,
+                          job_folder: str) -> tuple[str, str]:
+    """
+    CPU stage of the streaming pipeline to download the clip and search it
+    for highlights at the same time, then render the edited video. The
+    highlights are found by the time the download finishes when the clip can
+    be decoded as it arrives, otherwise the search waits for the download.
+    The link has been resolved by _resolve_clip, only the download of the
+    video itself runs here.
+
+    Args:
+        web_link (str): The link to the video.
+        game_title (str): The title of the game given by outplayed.tv.
+        video_title (str): The title of the video set by the user.
+        job_folder (str): The scratch directory of the job, the clip is
+            downloaded to it and the edited clip is saved in it.
+    Returns:
+        (tuple[str, str]): The path to the edited clip and the title of the
+            game the clip was identified as.
+    """
+    clip_downloader = ClipDownloaderLink(web_link=web_link,
+                                         game_title=game_title,
+                                         video_title=video_title,
+                                         download_folder=job_folder)
+    artifact_store = ArtifactStore()
+    video_stream = clip_downloader.stream_video()
+    downloaded_clip = video_stream.get_file_name()
+    try:
+        clip_prep = _make_clip_prep(game_title=game_title,
+                                    file_name=downloaded_clip,
+                                    artifact_store=artifact_store,
+                                    video_stream=video_stream)
+    except Exception:
+        # Let the download stop before the job directory is removed.
+        with contextlib.suppress(DownloadException):
+            video_stream.wait()
+        raise
+    render_key = f"{artifact_store.get_clip_hash(downloaded_clip)}:" \
+                 f"{game_title}:{video_title}"
+    file_name = artifact_store.put_clip(url=web_link,
+                                        file_name=downloaded_clip, keep=True)
+    edited_clip = _render_clip(clip_prep=clip_prep, file_name=file_name,
+                               video_title=video_title,
+                               job_folder=job_folder,
+                               artifact_store=artifact_store,
+                               render_key=render_key)
+    return edited_clip, clip_prep.get_game_title()
+
+
+def _make_clip_prep(
+        game_title: str, file_name: str, artifact_store: ArtifactStore,
+        video_stream: ClipStream | None = None) -> ClipPrepAbstract:
+    """
+    Helper function to find the highlights of a clip with every registered
+    detector, identifying its game from the HUD when the title outplayed.tv
+    gives is missing or wrong.
+
+    Args:
+        game_title (str): The title of the game given by outplayed.tv.
+        file_name (str): The path to the clip.
+        artifact_store (ArtifactStore): The store the highlight times are
+            read from and saved to.
+        video_stream (ClipStream): The stream of the clip while it
+            downloads, None if it is on disk. Defaults to None.
+    Returns:
+        (ClipPrepAbstract): The prepared clip.
+    """
+    return ClipPrepAuto(video_file=file_name, game_title=game_title,
+                        artifact_store=artifact_store,
+                        video_stream=video_stream)
+
+
+def _render_clip(clip_prep: ClipPrepAbstract, file_name: str,
+                 video_title: str, job_folder: str,
+                 artifact_store: ArtifactStore, render_key: str) -> str:
+    """
+    Helper function to render the edited video, titled with the game of the
+    clip (see ClipPrepAuto.get_game_title), and keep it in the artifact store
+    along with that game.
+
+    Args:
+        clip_prep (ClipPrepAbstract): The prepared clip.
+        file_name (str): The path to the clip.
+        video_title (str): The title of the video set by the user.
+        job_folder (str): The scratch directory the edited clip is saved in.
+        artifact_store (ArtifactStore): The store the render is kept in.
+        render_key (str): The key the render is stored under.
+    Returns:
+        (str): The path to the edited clip, empty string if it could not be
+            rendered.
+    """
+    clip_editor = ClipEditor(clip_prep=clip_prep, song_cache=SongCache(),
+                             facecam_cache=FacecamCache())
+    edited_clip = clip_editor.edit_and_save_video(
+        clip_file=file_name, game_title=clip_prep.get_game_title(),
+        video_title=video_title, output_folder=job_folder)
+    if edited_clip != "":
+        artifact_store.put_render(render_key=render_key,
+                                  file_name=edited_clip,
+                                  game_title=clip_prep.get_game_title())
+    return edited_clip
+
+
+def upload_clip(edited_clip: str, video_title: str, game_title: str) -> str:
+    """
+    Network stage to upload the edited clip to YouTube, also used by the
+    clip batch. The clip is uploaded over the YouTube Data API when API
+    credentials are configured and through YouTube Studio in Chrome
+    otherwise.
+
+    Args:
+        edited_clip (str): The path to the edited clip.
+        video_title (str): The title of the video set by the user.
+        game_title (str): The title of the game as a string.
+    Returns:
+        (str): The url of the video on YouTube.
+    """
+    if "YouTube_refresh_token" in os.environ:
+        clip_uploader = YouTubeApiUploader(video_title=video_title,
+                                           game_title=game_title)
+    else:
+        clip_uploader = YouTubeUploader(video_title=video_title,
+                                        game_title=game_title)
+    return clip_uploader.upload_to_youtube(file_name=edited_clip)
+
+
+def _run_with_metrics(stage: Callable, *args) -> tuple[object, dict]:
+    """
+    Helper function to run a stage in a worker process and send back the
+    metrics it recorded along with its result.
+
+    Args:
+        stage (Callable): The stage function.
+        *args: The arguments of the stage.
+    Returns:
+        (tuple[object, dict]): The result of the stage and the metrics
+            drained from the registry of the worker.
+
+    Raises:
+        Exception: Whatever the stage raised, with the metrics it recorded
+            before failing in its drained_metrics attribute.
+    """
+    try:
+        result = stage(*args)
+    except Exception as error:
+        error.drained_metrics = get_metrics().drain()
+        raise
+    return result, get_metrics().drain()
+
+
+class ClipJobExecutor:
+    """
+    A ClipJobExecutor runs clip jobs in the background so the bot can keep
+    answering commands and heartbeats while a clip is being processed. The
+    number of jobs in flight is capped and progress messages are sent back to
+    the channel the clip was posted in.
+
+    Args:
+        max_jobs_in_flight (int): The number of jobs that can be processed at
+            the same time. Defaults to MAX_JOBS_IN_FLIGHT.
+        process_pool (Executor): Executor for the CPU heavy stages. Defaults
+            to a process pool sized to the number of cores.
+        thread_pool (Executor): Executor for the network stages. Defaults to
+            a thread pool with IO_WORKERS threads.
+        metrics_file (str): The path the pipeline metrics are written to in
+            the Prometheus text format after every job, None to not write
+            them. Defaults to None.
+        workspace (Workspace): The scratch workspace the jobs download and
+            render in. Defaults to the workspace shared by the bot.
+        streaming (bool): If the clip should be searched for highlights
+            while it downloads, in a single stage in the process pool, rather
+            than downloading it in the thread pool first. Defaults to False.
+    """
+    """
+    Private Attributes:
+        _process_pool (Executor): Executor running the prep and edit stages.
+        _thread_pool (Executor): Executor running the download and upload
+            stages.
+        _max_jobs_in_flight (int): The cap on the number of running jobs.
+        _job_slots (asyncio.Semaphore): Semaphore enforcing the cap, created
+            lazily on the running event loop.
+        _jobs (set[asyncio.Task]): Tasks for the jobs that have not finished,
+            a reference is kept so they are not garbage collected.
+        _metrics_file (str | None): The path the metrics are written to.
+        _workspace (Workspace): The workspace giving every job its own
+            directory.
+        _streaming (bool): If jobs download and search the clip at once.
+    """
+
+    def __init__(self, max_jobs_in_flight: int = MAX_JOBS_IN_FLIGHT,
+                 process_pool: Executor | None = None,
+                 thread_pool: Executor | None = None,
+                 metrics_file: str | None = None,
+                 workspace: Workspace | None = None,
+                 streaming: bool = False) -> None:
+        self._process_pool = process_pool or ProcessPoolExecutor(
+            max_workers=os.cpu_count())
+        self._thread_pool = thread_pool or ThreadPoolExecutor(
+            max_workers=IO_WORKERS)
+        self._max_jobs_in_flight = max_jobs_in_flight
+        self._metrics_file = metrics_file
+        self._workspace = workspace or get_workspace()
+        self._streaming = streaming
+        self._job_slots = None
+        self._jobs = set()
+
+    def submit(self, discord_message: str, channel) -> asyncio.Task:
+        """
+        Submits a clip job and returns at once, the job runs in the background
+        on the running event loop.
+
+        Args:
+            discord_message (str): The discord message containing the
+                outplayed link.
+            channel (discord.abc.Messageable): The channel to send progress
+                and completion messages to.
+        Returns:
+            (asyncio.Task): The task running the job.
+        """
+        if self._job_slots is None:
+            self._job_slots = asyncio.Semaphore(self._max_jobs_in_flight)
+        job = asyncio.get_running_loop().create_task(
+            self._run_job(discord_message, channel))
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+        return job
+
+    def jobs_in_flight(self) -> int:
+        """
+        Method to access the number of jobs that have been submitted and have
+        not finished, including the jobs waiting for a free slot.
+
+        Returns:
+            (int): The number of unfinished jobs.
+        """
+        return len(self._jobs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shuts down the executors, cancelling the jobs that have not finished,
+        and closes the Chrome drivers kept open for uploads.
+
+        Args:
+            wait (bool): If the call should block until the running stages
+                have completed. Defaults to True.
+        """
+        for job in list(self._jobs):
+            job.cancel()
+        self._thread_pool.shutdown(wait=wait, cancel_futures=True)
+        self._process_pool.shutdown(wait=wait, cancel_futures=True)
+        get_driver_pool().shutdown()
+
+    async def _run_job(self, discord_message: str, channel) -> str:
+        """
+        Helper method to run every stage of a clip job once a slot is free.
+
+        Args:
+            discord_message (str): The discord message containing the
+                outplayed link.
+            channel (discord.abc.Messageable): The channel to send progress
+                and completion messages to.
+        Returns:
+            (str): The url of the uploaded video, empty string if the job did
+                not complete.
+        """
+        if self._job_slots.locked():
+            await channel.send("Clip queued, waiting for other clips to "
+                               "finish.")
+
+        async with self._job_slots:
+            loop = asyncio.get_running_loop()
+            job_start = time.monotonic()
+            job_folder = None
+            try:
+                job_folder = await loop.run_in_executor(
+                    None, self._workspace.acquire)
+                if self._streaming:
+                    await channel.send("Downloading and editing clip...")
+                    web_link, game_title, video_title, stored_clip = \
+                        await loop.run_in_executor(self._thread_pool,
+                                                   _resolve_clip,
+                                                   discord_message,
+                                                   job_folder)
+                    if stored_clip is None:
+                        stage, clip = _stream_and_edit_clip, web_link
+                    else:
+                        stage, clip = _prepare_and_edit_clip, stored_clip
+                    (edited_clip, game_title), drained = \
+                        await loop.run_in_executor(
+                            self._process_pool, _run_with_metrics, stage,
+                            clip, game_title, video_title, job_folder)
+                else:
+                    await channel.send("Downloading clip...")
+                    file_name, game_title, video_title = \
+                        await loop.run_in_executor(self._thread_pool,
+                                                   _download_clip,
+                                                   discord_message,
+                                                   job_folder)
+
+                    await channel.send(f"Editing {game_title} clip...")
+                    (edited_clip, game_title), drained = \
+                        await loop.run_in_executor(
+                            self._process_pool, _run_with_metrics,
+                            _prepare_and_edit_clip, file_name,
+                            game_title, video_title, job_folder)
+                get_metrics().merge(drained)
+
+                await channel.send("Uploading clip to YouTube...")
+                video_link = await loop.run_in_executor(
+                    self._thread_pool, upload_clip, edited_clip,
+                    video_title, game_title)
+                await channel.send(f"Uploaded clip {video_link}")
+                return video_link
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                drained = getattr(error, "drained_metrics", None)
+                if drained is not None:
+                    get_metrics().merge(drained)
+                print(f"error processing clip: {error}")
+                await channel.send("Error processing clip.")
+                return ""
+            finally:
+                if job_folder is not None:
+                    await loop.run_in_executor(None, self._workspace.release,
+                                               job_folder)
+                get_metrics().observe(stage="job",
+                                      seconds=time.monotonic() - job_start)
+                if self._metrics_file is not None:
+                    get_metrics().write_prometheus(self._metrics_file)
@@ -0,0 +1,255 @@
+"""
+workspace.py
+
+Class implementation for the scratch workspace of the clip pipeline. Every
+clip job gets its own directory to download and render into, so concurrent
+jobs never collide on file names, and the directory is removed when the job
+ends whether it succeeded or failed. The scratch folder is kept under a disk
+budget by evicting the least recently used directories left behind by jobs
+that are no longer running.
+
+Attributes:
+    SHM_MIN_BYTES (int): The smallest /dev/shm tmpfs the scratch folder is
+        put on, Docker gives containers 64 MiB by default, which does not
+        fit a clip and its render.
+    SCRATCH_FOLDER (str): The default scratch folder. Taken from the
+        Clip_scratch_folder environment variable, otherwise a folder on the
+        /dev/shm tmpfs where it exists and is at least SHM_MIN_BYTES, and in
+        the temporary folder elsewhere.
+    SCRATCH_BYTES (int): The default size in bytes the scratch folder may
+        take up.
+    SCRATCH_SHARE (float): The share of the file system the scratch folder
+        is on that it may take up, the budget is capped to it.
+    JOB_PREFIX (str): The prefix of the job directories, only directories
+        with it are evicted.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    Directories are only left behind when the bot or a worker process is
+    killed in the middle of a job. A job in flight is never evicted, so the
+    scratch folder can go over the budget while the jobs in flight need
+    more than it.
+
+    Every method touching the file system blocks, the clip job executor
+    calls acquire and release in a thread so the event loop is not held up
+    while directories are walked and removed.
+"""
+import contextlib
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Iterator
+from ..clip_metrics.pipeline_metrics import get_metrics
+
+SHM_MIN_BYTES = 1024 * 1024 * 1024
+
+
+def _default_scratch_folder() -> str:
+    """
+    Helper function to pick the scratch folder when none is configured.
+
+    Returns:
+        (str): A folder on /dev/shm if it is large enough, otherwise in the
+            temporary folder.
+    """
+    with contextlib.suppress(OSError):
+        if shutil.disk_usage("/dev/shm").total >= SHM_MIN_BYTES:
+            return os.path.join("/dev/shm", "taquitobot")
+    return os.path.join(tempfile.gettempdir(), "taquitobot")
+
+
+SCRATCH_FOLDER = os.environ.get("Clip_scratch_folder",
+                                _default_scratch_folder())
+SCRATCH_BYTES = 2 * 1024 * 1024 * 1024
+SCRATCH_SHARE = 0.5
+JOB_PREFIX = "clip_job_"
+
+
+class Workspace:
+    """
+    A Workspace hands out a directory to every clip job in the scratch
+    folder and keeps the folder under its disk budget.
+
+    Args:
+        scratch_folder (str): The folder the job directories are made in.
+            Defaults to SCRATCH_FOLDER.
+        max_bytes (int): The size in bytes the scratch folder may take up
+            before directories are evicted, capped to SCRATCH_SHARE of the
+            file system it is on. Defaults to SCRATCH_BYTES.
+    """
+    """
+    Private Attributes:
+        _active (set[str]): The directories of the jobs in flight, they are
+            never evicted.
+        _lock (threading.Lock): Lock guarding the active directories and
+            eviction.
+    """
+
+    def __init__(self, scratch_folder: str = SCRATCH_FOLDER,
+                 max_bytes: int = SCRATCH_BYTES) -> None:
+        self._scratch_folder = scratch_folder
+        self._max_bytes = min(max_bytes, self._disk_budget())
+        self._active = set()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def job(self) -> Iterator[str]:
+        """
+        Context manager to give a job a unique directory of its own. Room is
+        made for it under the budget first, and the directory and everything
+        in it is removed when the block exits, even when it raises.
+
+        Yields:
+            (str): The path to the job directory.
+        """
+        job_folder = self.acquire()
+        try:
+            yield job_folder
+        finally:
+            self.release(job_folder)
+
+    def acquire(self) -> str:
+        """
+        Method to make a unique directory for a job, after making room for
+        it under the budget. It must be given back with release.
+
+        Returns:
+            (str): The path to the job directory.
+        """
+        with self._lock:
+            os.makedirs(self._scratch_folder, exist_ok=True)
+            self._evict()
+            job_folder = tempfile.mkdtemp(prefix=JOB_PREFIX,
+                                          dir=self._scratch_folder)
+            self._active.add(job_folder)
+        self._record_usage()
+        return job_folder
+
+    def release(self, job_folder: str) -> None:
+        """
+        Method to remove the directory of a job that has ended and
+        everything in it.
+
+        Args:
+            job_folder (str): The path to the job directory from acquire.
+        """
+        get_metrics().add(counter="bytes", stage="scratch",
+                          amount=self._folder_size(job_folder))
+        shutil.rmtree(job_folder, ignore_errors=True)
+        with self._lock:
+            self._active.discard(job_folder)
+        self._record_usage()
+
+    def get_usage(self) -> int:
+        """
+        Method to access the size of the scratch folder.
+
+        Returns:
+            (int): The bytes taken up by every file in the scratch folder.
+        """
+        return self._folder_size(self._scratch_folder)
+
+    def get_max_bytes(self) -> int:
+        """
+        Method to access the budget of the scratch folder.
+
+        Returns:
+            (int): The size in bytes the scratch folder may take up.
+        """
+        return self._max_bytes
+
+    def get_jobs_active(self) -> int:
+        """
+        Method to access the number of job directories in use.
+
+        Returns:
+            (int): The number of jobs in flight.
+        """
+        return len(self._active)
+
+    def _disk_budget(self) -> int:
+        """
+        Helper method to get SCRATCH_SHARE of the file system the scratch
+        folder is on, checked on the closest folder that exists.
+
+        Returns:
+            (int): The size in bytes.
+        """
+        folder = os.path.abspath(self._scratch_folder)
+        while not os.path.isdir(folder) and os.path.dirname(folder) != folder:
+            folder = os.path.dirname(folder)
+        return int(shutil.disk_usage(folder).total * SCRATCH_SHARE)
+
+    def _evict(self) -> None:
+        """
+        Helper method to remove the least recently modified job directories
+        that are not in use until the scratch folder fits in the budget.
+        """
+        usage = self.get_usage()
+        idle = []
+        for entry in os.scandir(self._scratch_folder):
+            if entry.is_dir(follow_symlinks=False) and \
+                    entry.name.startswith(JOB_PREFIX) and \
+                    entry.path not in self._active:
+                idle.append((entry.stat().st_mtime, entry.path))
+        for _, job_folder in sorted(idle):
+            if usage <= self._max_bytes:
+                break
+            size = self._folder_size(job_folder)
+            shutil.rmtree(job_folder, ignore_errors=True)
+            usage -= size
+            print(f"evicted scratch folder {job_folder}")
+            get_metrics().add(counter="bytes", stage="scratch_eviction",
+                              amount=size)
+
+    def _record_usage(self) -> None:
+        """
+        Helper method to update the scratch gauges of the pipeline metrics.
+        """
+        get_metrics().set_gauge(gauge="scratch_bytes",
+                                value=self.get_usage())
+        get_metrics().set_gauge(gauge="scratch_budget_bytes",
+                                value=self._max_bytes)
+        get_metrics().set_gauge(gauge="scratch_jobs",
+                                value=self.get_jobs_active())
+
+    def _folder_size(self, folder: str) -> int:
+        """
+        Helper method to add up the size of the files in a folder.
+
+        Args:
+            folder (str): The path to the folder.
+        Returns:
+            (int): The size in bytes, 0 if the folder does not exist.
+        """
+        total = 0
+        for root, _, files in os.walk(folder):
+            for file in files:
+                with contextlib.suppress(OSError):
+                    total += os.path.getsize(os.path.join(root, file))
+        return total
+
+
+_workspace = None
+_workspace_lock = threading.Lock()
+
+
+def get_workspace() -> Workspace:
+    """
+    Function to get the workspace shared by the clip jobs of the bot.
+
+    Returns:
+        (Workspace): The shared workspace.
+    """
+    global _workspace
+    with _workspace_lock:
+        if _workspace is None:
+            _workspace = Workspace()
+        return _workspace
@@ -0,0 +1,106 @@
+"""
+clip_stats_commands.py
+
+File that handles the command to show how long the stages of the clip
+pipeline have been taking.
+
+Attributes:
+    STAGE_ORDER (tuple[str, ...]): The stages of the clip pipeline in the
+        order they run, stages that are not listed are shown after them.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+
+"""
+from discord.ext import commands
+from .pipeline_metrics import get_metrics
+
+STAGE_ORDER = ("page_fetch", "download", "highlight_search",
+               "highlight_skipped", "render", "upload", "job")
+
+
+def format_summary(summary: dict[str, dict[str, float]],
+                   gauges: dict[str, float] | None = None) -> str:
+    """
+    Function to format the metrics summary as a table for discord, followed
+    by the usage of the scratch folder when it is known.
+
+    Args:
+        summary (dict[str, dict[str, float]]): The summary from
+            PipelineMetrics.get_summary.
+        gauges (dict[str, float] | None): The gauges from
+            PipelineMetrics.get_gauges. Defaults to None.
+    Returns:
+        (str): The table in a code block.
+    """
+    stages = [stage for stage in STAGE_ORDER if stage in summary] + \
+        sorted(stage for stage in summary if stage not in STAGE_ORDER)
+    lines = [f"{'stage':<17}{'runs':>5}{'p50':>8}{'p95':>8}{'p99':>8}"
+             f"  processed"]
+    for stage in stages:
+        metrics = summary[stage]
+        line = f"{stage:<17}{metrics.get('count', 0):>5}"
+        for percentile in ("p50", "p95", "p99"):
+            if percentile in metrics:
+                line += f"{metrics[percentile]:>7.1f}s"
+            else:
+                line += f"{'-':>8}"
+        processed = []
+        if "bytes" in metrics:
+            processed.append(f"{metrics['bytes'] / 1024 / 1024:.1f} MiB")
+        if "frames" in metrics:
+            processed.append(f"{int(metrics['frames'])} frames")
+        lines.append(line + "  " + ", ".join(processed))
+    if gauges and "scratch_bytes" in gauges:
+        lines.append(f"\nscratch {gauges['scratch_bytes'] / 1024 / 1024:.1f}"
+                     f" of {gauges['scratch_budget_bytes'] / 1024 / 1024:.0f}"
+                     f" MiB, {int(gauges['scratch_jobs'])} jobs")
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+class ClipStats(commands.Cog):
+    """
+    Class to report the metrics of the clip pipeline in discord.
+
+    Args:
+        bot (discord.ext.bot): The bot object to connect the commands to.
+    """
+    """
+    Private Attributes:
+        _bot (discord.ext.bot): Bot object to connect the commands to.
+    """
+    def __init__(self, bot):
+        self._bot = bot
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """
+        Method to inform the user when the clip stats cog has been properly
+        loaded.
+        """
+        print("clip_stats_commands ready")
+
+    @commands.command(name="clipstats")
+    async def clip_stats(self, ctx):
+        """
+        Command to show the number of runs, the p50, p95 and p99 times and
+        the bytes or frames processed of every stage of the clip pipeline.
+
+        Args:
+            ctx (discord.ext.commands.Context): The context of the command.
+        """
+        summary = get_metrics().get_summary()
+        if not summary:
+            await ctx.send("No clips have been processed yet.")
+            return
+        await ctx.send(format_summary(summary, get_metrics().get_gauges()))
+
+
+async def setup(bot):
+    await bot.add_cog(ClipStats(bot))
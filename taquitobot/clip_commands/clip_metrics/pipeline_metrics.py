@@ -0,0 +1,317 @@
+"""
+pipeline_metrics.py
+
+Class implementation to record how long each stage of the clip pipeline
+takes, along with the bytes and frames it processed. The latest durations of
+every stage are kept in a rolling window to report percentiles, and the
+metrics can be exported in the Prometheus text format to a file or served
+over HTTP.
+
+Attributes:
+    WINDOW (int): The default number of latest durations kept per stage.
+    QUANTILES (tuple[float, ...]): The percentiles reported for every stage.
+    COUNTERS (tuple[str, ...]): The quantities counted per stage.
+    METRICS_FILE (str): The default path the Prometheus metrics are written
+        to.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The prep and edit stages run in worker processes, each with its own
+    registry. The executor drains the registry of the worker after every
+    stage and merges it into the registry of the bot. A forked worker starts
+    with an empty registry rather than a copy of the bot's.
+"""
+import contextlib
+import math
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WINDOW = 500
+QUANTILES = (0.5, 0.95, 0.99)
+COUNTERS = ("bytes", "frames")
+METRICS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "clip_metrics.prom")
+
+
+class PipelineMetrics:
+    """
+    A PipelineMetrics is a registry of the durations, bytes and frames of
+    the stages of the clip pipeline.
+
+    Args:
+        window (int): The number of latest durations kept per stage to
+            compute the percentiles from. Defaults to WINDOW.
+    """
+    """
+    Private Attributes:
+        _durations (dict[str, deque[float]]): The latest durations of every
+            stage in seconds.
+        _totals (dict[str, list[float]]): The number of runs of every stage
+            and their total duration, since the registry was created.
+        _counters (dict[str, dict[str, float]]): The total of every counter
+            per stage.
+        _gauges (dict[str, float]): The latest value of every gauge, such as
+            the size of the scratch folder.
+        _lock (threading.Lock): Lock guarding the metrics, stages run in
+            several threads at once.
+    """
+
+    def __init__(self, window: int = WINDOW) -> None:
+        self._window = window
+        self._durations = {}
+        self._totals = {}
+        self._counters = {counter: {} for counter in COUNTERS}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """
+        Context manager to time a stage with the monotonic clock, the time is
+        recorded even when the stage raises.
+
+        Args:
+            stage (str): The name of the stage.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage=stage, seconds=time.monotonic() - start)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Method to record one run of a stage.
+
+        Args:
+            stage (str): The name of the stage.
+            seconds (float): The time the stage took in seconds.
+        """
+        with self._lock:
+            self._durations.setdefault(
+                stage, deque(maxlen=self._window)).append(seconds)
+            totals = self._totals.setdefault(stage, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def add(self, counter: str, stage: str, amount: float) -> None:
+        """
+        Method to add to a counter of a stage.
+
+        Args:
+            counter (str): One of COUNTERS.
+            stage (str): The name of the stage.
+            amount (float): The amount to add.
+        """
+        with self._lock:
+            counters = self._counters[counter]
+            counters[stage] = counters.get(stage, 0) + amount
+
+    def set_gauge(self, gauge: str, value: float) -> None:
+        """
+        Method to set a quantity that goes up and down, gauges are only kept
+        by the process that sets them and are not drained.
+
+        Args:
+            gauge (str): The name of the gauge.
+            value (float): The current value.
+        """
+        with self._lock:
+            self._gauges[gauge] = value
+
+    def get_gauges(self) -> dict[str, float]:
+        """
+        Method to access the latest value of every gauge.
+
+        Returns:
+            (dict[str, float]): The values keyed by gauge.
+        """
+        with self._lock:
+            return dict(self._gauges)
+
+    def drain(self) -> dict:
+        """
+        Method to take every run and count recorded since the last drain,
+        leaving the registry empty. Used to send the metrics of a worker
+        process back to the bot.
+
+        Returns:
+            (dict): The durations and counters, in the format taken by merge.
+        """
+        with self._lock:
+            drained = {"durations": {stage: list(durations)
+                                     for stage, durations
+                                     in self._durations.items()},
+                       "counters": self._counters}
+            self._durations = {}
+            self._totals = {}
+            self._counters = {counter: {} for counter in COUNTERS}
+        return drained
+
+    def merge(self, drained: dict) -> None:
+        """
+        Method to add the metrics drained from another registry.
+
+        Args:
+            drained (dict): The metrics returned by drain.
+        """
+        for stage, durations in drained["durations"].items():
+            for seconds in durations:
+                self.observe(stage=stage, seconds=seconds)
+        for counter, stages in drained["counters"].items():
+            for stage, amount in stages.items():
+                self.add(counter=counter, stage=stage, amount=amount)
+
+    def get_summary(self) -> dict[str, dict[str, float]]:
+        """
+        Method to summarise every stage with its number of runs, the
+        percentiles of its latest durations and its counters.
+
+        Returns:
+            (dict[str, dict[str, float]]): The summary keyed by stage, with
+                the keys count, sum, p50, p95, p99 and the counters.
+        """
+        with self._lock:
+            summary = {}
+            for stage, durations in self._durations.items():
+                ordered = sorted(durations)
+                summary[stage] = {"count": self._totals[stage][0],
+                                  "sum": self._totals[stage][1]}
+                for quantile in QUANTILES:
+                    summary[stage][f"p{round(quantile * 100)}"] = \
+                        self._percentile(ordered=ordered, quantile=quantile)
+            for counter, stages in self._counters.items():
+                for stage, amount in stages.items():
+                    summary.setdefault(stage, {})[counter] = amount
+        return summary
+
+    def to_prometheus(self) -> str:
+        """
+        Method to format the metrics in the Prometheus text format. The
+        durations are a summary with the percentiles of the rolling window
+        and the counters are counters labelled by stage.
+
+        Returns:
+            (str): The metrics.
+        """
+        summary = self.get_summary()
+        lines = ["# HELP clip_stage_seconds Time taken by each stage of the "
+                 "clip pipeline.",
+                 "# TYPE clip_stage_seconds summary"]
+        for stage, metrics in summary.items():
+            if "count" not in metrics:
+                continue
+            for quantile in QUANTILES:
+                lines.append(f'clip_stage_seconds{{stage="{stage}",'
+                             f'quantile="{quantile}"}} '
+                             f'{metrics[f"p{round(quantile * 100)}"]}')
+            lines.append(f'clip_stage_seconds_sum{{stage="{stage}"}} '
+                         f'{metrics["sum"]}')
+            lines.append(f'clip_stage_seconds_count{{stage="{stage}"}} '
+                         f'{metrics["count"]}')
+        for counter in COUNTERS:
+            lines.append(f"# HELP clip_stage_{counter}_total The {counter} "
+                         f"processed by each stage of the clip pipeline.")
+            lines.append(f"# TYPE clip_stage_{counter}_total counter")
+            for stage, metrics in summary.items():
+                if counter in metrics:
+                    lines.append(f'clip_stage_{counter}_total'
+                                 f'{{stage="{stage}"}} {metrics[counter]}')
+        for gauge, value in self.get_gauges().items():
+            lines.append(f"# TYPE clip_{gauge} gauge")
+            lines.append(f"clip_{gauge} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, file_name: str = METRICS_FILE) -> None:
+        """
+        Method to atomically write the metrics in the Prometheus text format,
+        for the node exporter textfile collector or any other scraper.
+
+        Args:
+            file_name (str): The path to write to. Defaults to METRICS_FILE.
+        """
+        temporary_file = f"{file_name}.{os.getpid()}.tmp"
+        with open(temporary_file, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(temporary_file, file_name)
+
+    def serve_prometheus(self, port: int,
+                         host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Method to serve the metrics over HTTP in a background thread.
+
+        Args:
+            port (int): The port to listen on.
+            host (str): The address to listen on. Defaults to localhost.
+        Returns:
+            (ThreadingHTTPServer): The server, shut it down to stop serving.
+        """
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type",
+                                 "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def _percentile(self, ordered: list[float], quantile: float) -> float:
+        """
+        Helper method to get a percentile with the nearest rank method.
+
+        Args:
+            ordered (list[float]): The durations in ascending order.
+            quantile (float): The percentile as a fraction.
+        Returns:
+            (float): The percentile.
+        """
+        rank = max(1, math.ceil(quantile * len(ordered)))
+        return ordered[rank - 1]
+
+
+_metrics = PipelineMetrics()
+
+
+def get_metrics() -> PipelineMetrics:
+    """
+    Function to get the registry of the current process.
+
+    Returns:
+        (PipelineMetrics): The registry.
+    """
+    return _metrics
+
+
+def _reset_after_fork() -> None:
+    """
+    Function run in a forked child to give it an empty registry, so the
+    runs the parent recorded before the fork are not drained and merged back
+    into the parent a second time.
+    """
+    global _metrics
+    _metrics = PipelineMetrics()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
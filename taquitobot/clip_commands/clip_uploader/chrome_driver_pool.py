@@ -0,0 +1,211 @@
+"""
+chrome_driver_pool.py
+
+Class implementation for a pool of long lived Chrome drivers used by the
+YouTubeUploader. Starting Chrome and loading YouTube is the slowest part of
+an upload, so drivers are kept open between uploads, checked before they are
+handed out and replaced after a number of uploads to keep memory in check.
+
+Attributes:
+    POOL_SIZE (int): The default number of drivers kept open.
+    RECYCLE_AFTER (int): The default number of uploads a driver is used for
+        before it is replaced.
+    CHROME_ARGUMENTS (tuple[str, ...]): The arguments Chrome is started
+        with, it runs headless with the features uploads do not need turned
+        off.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    Every driver is started with the logged in profile in COOKIES_FOLDER and
+    Chrome only lets one browser use a profile at a time, so a pool with more
+    than one driver needs a profile folder per driver.
+"""
+import contextlib
+import queue
+import threading
+from collections.abc import Callable, Iterator
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from .const import COOKIES_FOLDER
+
+POOL_SIZE = 1
+RECYCLE_AFTER = 20
+CHROME_ARGUMENTS = (
+    "--headless=new",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--mute-audio",
+    "--no-first-run",
+    "--window-size=1280,900",
+)
+
+
+def _start_chrome(profile_folder: str) -> webdriver.Chrome:
+    """
+    Helper function to start a headless Chrome with a logged in profile.
+
+    Args:
+        profile_folder (str): The path to the Chrome profile.
+    Returns:
+        (webdriver.Chrome): The driver.
+    """
+    chrome_options = Options()
+    chrome_options.add_argument(f"user-data-dir={profile_folder}")
+    for argument in CHROME_ARGUMENTS:
+        chrome_options.add_argument(argument)
+    return webdriver.Chrome(service=Service(), options=chrome_options)
+
+
+class ChromeDriverPool:
+    """
+    A ChromeDriverPool hands out warm Chrome drivers to the uploads and takes
+    them back when the upload is done.
+
+    Args:
+        size (int): The number of drivers kept open. Defaults to POOL_SIZE.
+        recycle_after (int): The number of uploads a driver is used for
+            before it is replaced. Defaults to RECYCLE_AFTER.
+        profile_folders (list[str]): The Chrome profile of every driver,
+            None to use COOKIES_FOLDER for a pool of one. Defaults to None.
+        driver_factory (Callable[[str], webdriver.Chrome]): Function starting
+            a driver with a profile. Defaults to a headless Chrome.
+    """
+    """
+    Private Attributes:
+        _idle (queue.Queue): The profiles that are free, with their driver
+            and the number of uploads it has been used for. The driver is
+            None until it is first needed.
+        _drivers_started (int): The number of drivers that have been started
+            by the pool.
+        _lock (threading.Lock): Lock guarding the number of drivers
+            started.
+    """
+
+    def __init__(self, size: int = POOL_SIZE,
+                 recycle_after: int = RECYCLE_AFTER,
+                 profile_folders: list[str] | None = None,
+                 driver_factory: Callable[[str], webdriver.Chrome]
+                 = _start_chrome) -> None:
+        if profile_folders is None:
+            profile_folders = [COOKIES_FOLDER]
+        if len(profile_folders) < size:
+            raise ValueError(f"A pool of {size} drivers needs {size} Chrome "
+                             f"profiles, got {len(profile_folders)}")
+        self._recycle_after = recycle_after
+        self._driver_factory = driver_factory
+        self._idle = queue.Queue()
+        for profile_folder in profile_folders[:size]:
+            self._idle.put((profile_folder, None, 0))
+        self._drivers_started = 0
+        self._lock = threading.Lock()
+
+    def get_drivers_started(self) -> int:
+        """
+        Method to access the number of drivers the pool has started, an
+        upload that reuses a driver does not start one.
+
+        Returns:
+            (int): The number of drivers started.
+        """
+        return self._drivers_started
+
+    @contextlib.contextmanager
+    def driver(self) -> Iterator[webdriver.Chrome]:
+        """
+        Context manager to borrow a driver, waiting for one to be free. A
+        driver that raised an error while borrowed is closed instead of being
+        returned to the pool.
+
+        Yields:
+            (webdriver.Chrome): A driver that has passed its health check.
+        """
+        profile_folder, driver, uses = self._idle.get()
+        try:
+            if driver is not None and (uses >= self._recycle_after or
+                                       not self._is_healthy(driver)):
+                self._quit(driver)
+                driver = None
+            if driver is None:
+                driver = self._driver_factory(profile_folder)
+                uses = 0
+                with self._lock:
+                    self._drivers_started += 1
+            yield driver
+            uses += 1
+        except BaseException:
+            if driver is not None:
+                self._quit(driver)
+            driver = None
+            raise
+        finally:
+            self._idle.put((profile_folder, driver, uses))
+
+    def shutdown(self) -> None:
+        """
+        Closes every idle driver, a driver that is borrowed stays open until
+        it is returned.
+        """
+        idle = []
+        while not self._idle.empty():
+            idle.append(self._idle.get_nowait())
+        for profile_folder, driver, _ in idle:
+            if driver is not None:
+                self._quit(driver)
+            self._idle.put((profile_folder, None, 0))
+
+    def _is_healthy(self, driver: webdriver.Chrome) -> bool:
+        """
+        Helper method to check that a driver's browser is still responding.
+
+        Args:
+            driver (webdriver.Chrome): The driver to check.
+        Returns:
+            (bool): True if the browser answered, False otherwise.
+        """
+        try:
+            driver.current_url
+            return len(driver.window_handles) > 0
+        except WebDriverException:
+            return False
+
+    def _quit(self, driver: webdriver.Chrome) -> None:
+        """
+        Helper method to close a driver, ignoring a browser that has already
+        gone away.
+
+        Args:
+            driver (webdriver.Chrome): The driver to close.
+        """
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> ChromeDriverPool:
+    """
+    Function to get the driver pool shared by every upload in the process.
+
+    Returns:
+        (ChromeDriverPool): The shared pool.
+    """
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            _driver_pool = ChromeDriverPool()
+        return _driver_pool
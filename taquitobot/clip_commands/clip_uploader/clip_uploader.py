@@ -5,95 +5,122 @@ Class implementation to handle uploading clips to YouTube that have been
 edited by the clip_editor.
 
 Attributes:
+    WAIT_TIMEOUT (float): The time in seconds to wait for an element of the
+        upload dialog to be ready.
+    PUBLISH_TIMEOUT (float): The time in seconds to wait for the video to be
+        ready to publish, it includes the time to send the file.
 
 TODO:
 
 Versioning:
     Author: Aidan (Chimichanga Kid)
     Date: 2024-08-23
-    Version: 1.0.0
+    Version: 1.1.0
 
 Notes:
-
+    Chrome is borrowed from a ChromeDriverPool so it stays open and logged in
+    between uploads, and every step waits for the element it needs rather
+    than sleeping for a fixed time.
 """
 
+import contextlib
 import os
 import time
-from .const import DESCRIPTION_TEMPLATE, COOKIES_FOLDER
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from collections.abc import Iterator
+from ..clip_metrics.pipeline_metrics import get_metrics
+from .chrome_driver_pool import ChromeDriverPool, get_driver_pool
+from .const import DESCRIPTION_TEMPLATE
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service 
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+WAIT_TIMEOUT = 30
+PUBLISH_TIMEOUT = 600
 
-chrome_options = Options()
-chrome_options.add_argument(f"user-data-dir={COOKIES_FOLDER}") 
-chrome_options.add_argument('--no-sandbox')
-chrome_options.add_argument('--disable-dev-shm-usage')
 
 class YouTubeUploader:
 
-    def __init__(self, video_title: str, game_title: str) -> None:
-        self._driver = webdriver.Chrome(service=Service(), 
-                                        options=chrome_options)
+    def __init__(self, video_title: str, game_title: str,
+                 driver_pool: ChromeDriverPool | None = None) -> None:
+        self._driver_pool = driver_pool or get_driver_pool()
+        self._driver = None
         self._video_title = video_title + f""" #{game_title} #{game_title}Clip 
         #{game_title}Guides"""[:100]
-        self._description = DESCRIPTION_TEMPLATE.replace("placeholder", 
+        self._description = DESCRIPTION_TEMPLATE.replace("placeholder",
                                                          game_title)[:5000]
+        self._step_times = {}
+
+    def get_step_times(self) -> dict[str, float]:
+        """
+        Method to access the time in seconds each step of the last upload
+        took.
+
+        Returns:
+            (dict[str, float]): The time of every step keyed by its name.
+        """
+        return self._step_times
 
     def upload_to_youtube(self, file_name: str) -> str:
         """
-        Uploads the specified video to YouTube by navigating to site and 
+        Uploads the specified video to YouTube by navigating to site and
         uploading to the logged in user.
 
         Args:
-            file_name (str): The path to the video file that should be 
+            file_name (str): The path to the video file that should be
                 uploaded.
         Returns:
             (str): The url of the video on YouTube.
         """
-        self._driver.get("https://www.youtube.com")
-        self._driver.implicitly_wait(5)
-
-        self._go_to_video_manager()
-        self._driver.implicitly_wait(5)
-        self._upload_video_file_helper(os.path.join(os.getcwd(), file_name))
-        self._driver.implicitly_wait(5)
-        self._add_title_and_description()
-        self._driver.implicitly_wait(7)
-        self._make_public()
-        
-        print("Getting link")
-        link_element = self._driver.find_element(By.XPATH, """//a[contains(@class, "style-scope ytcp-video-info")]""")
-        video_link = link_element.get_attribute("href")
-        print(f"link is {video_link}")
-
-    
-        time.sleep(2)
-        publish_button = self._driver.find_element(By.XPATH, '//ytcp-button[@id="done-button"]')
-        publish_button.click()
-        
-
-        time.sleep(3)
-
-        self._driver.implicitly_wait(7)
-        self._driver.quit()
-
+        self._step_times = {}
+        with get_metrics().timer("upload"), \
+                self._driver_pool.driver() as driver:
+            self._driver = driver
+            with self._timed("open YouTube"):
+                self._driver.get("https://www.youtube.com")
+            with self._timed("open upload dialog"):
+                self._go_to_video_manager()
+            with self._timed("select file"):
+                self._upload_video_file_helper(
+                    os.path.join(os.getcwd(), file_name))
+            with self._timed("title and description"):
+                self._add_title_and_description()
+            with self._timed("visibility"):
+                self._make_public()
+
+            with self._timed("publish"):
+                print("Getting link")
+                video_link = WebDriverWait(self._driver, WAIT_TIMEOUT).until(
+                    lambda d: d.find_element(By.XPATH, """//a[contains(@class, "style-scope ytcp-video-info")]""").get_attribute("href"))
+                print(f"link is {video_link}")
+
+                publish_button = self._wait_for_button(
+                    '//ytcp-button[@id="done-button"]',
+                    timeout=PUBLISH_TIMEOUT)
+                publish_button.click()
+                WebDriverWait(self._driver, WAIT_TIMEOUT).until(
+                    EC.staleness_of(publish_button))
+            self._driver = None
+
+        get_metrics().add(counter="bytes", stage="upload",
+                          amount=os.path.getsize(file_name))
+        print("upload step times: " + ", ".join(
+            f"{step} {seconds:.1f}s"
+            for step, seconds in self._step_times.items()))
         return video_link
 
     def _go_to_video_manager(self) -> None:
         """
         Helper method to navigate to video manager screen on YouTube.
         """
-        upload_button = self._driver.find_element(By.XPATH, """/html/body/ytd-app/div[1]/div[2]/ytd-masthead/div[4]/div[3]/div[2]/ytd-topbar-menu-button-renderer[1]/div/a/yt-icon-button/button""")
+        upload_button = self._wait_for_button("""/html/body/ytd-app/div[1]/div[2]/ytd-masthead/div[4]/div[3]/div[2]/ytd-topbar-menu-button-renderer[1]/div/a/yt-icon-button/button""")
         upload_button.click()
 
-        self._driver.implicitly_wait(5)
-
-        video_manager_button = self._driver.find_element(By.XPATH, """//tp-yt-paper-item[.//yt-formatted-string[contains(., "Upload video")]]""")
+        video_manager_button = self._wait_for_button("""//tp-yt-paper-item[.//yt-formatted-string[contains(., "Upload video")]]""")
         video_manager_button.click()
 
         return
-    
+
     def _upload_video_file_helper(self, video_path: str) -> None:
         """
         Helper method to upload the specified video to YouTube.
@@ -101,47 +128,74 @@ class YouTubeUploader:
         Args:
             video_path (str): The path to the video file.
         """
-        file_input_box = self._driver.find_element(By.XPATH, 
-                                                   """//input[@type="file"]""")
+        file_input_box = WebDriverWait(self._driver, WAIT_TIMEOUT).until(
+            EC.presence_of_element_located((By.XPATH,
+                                            """//input[@type="file"]""")))
         file_input_box.send_keys(video_path)
 
     def _add_title_and_description(self) -> None:
         """
         Helper method to add the title and description to the video.
         """
-        title_textbox = self._driver.find_element(By.XPATH, """//div[@id="textbox" and contains(@class, "ytcp-social-suggestions-textbox")]""")
+        title_textbox = self._wait_for_button("""//div[@id="textbox" and contains(@class, "ytcp-social-suggestions-textbox")]""")
         title_textbox.clear()
-        time.sleep(0.5)
         title_textbox.send_keys(self._video_title)
 
-        self._driver.implicitly_wait(3)
-
-        description_textbox = self._driver.find_element(By.XPATH, """//div[@aria-label="Tell viewers about your video (type @ to mention a channel)"]""")
+        description_textbox = self._wait_for_button("""//div[@aria-label="Tell viewers about your video (type @ to mention a channel)"]""")
         description_textbox.clear()
-        time.sleep(0.5)
         description_textbox.send_keys(self._description)
 
-        self._driver.implicitly_wait(3)
-
-        not_made_for_kids_button = self._driver.find_element(By.XPATH, """//tp-yt-paper-radio-button[@name="VIDEO_MADE_FOR_KIDS_NOT_MFK"]""")
+        not_made_for_kids_button = self._wait_for_button("""//tp-yt-paper-radio-button[@name="VIDEO_MADE_FOR_KIDS_NOT_MFK"]""")
         not_made_for_kids_button.click()
 
         return
 
     def _make_public(self) -> None:
         """
-        Helper method to make the video public. 
+        Helper method to make the video public.
         """
-        next_button = self._driver.find_element(By.XPATH, """//ytcp-button[@id="next-button"]""")
-        next_button.click()
-        self._driver.implicitly_wait(2)
-        next_button.click()
-        self._driver.implicitly_wait(2)
-        next_button.click()
-        self._driver.implicitly_wait(2)
-        time.sleep(5)
+        for _ in range(3):
+            next_button = self._wait_for_button("""//ytcp-button[@id="next-button"]""")
+            next_button.click()
 
-        public_button = self._driver.find_element(By.XPATH, """//tp-yt-paper-radio-button[@name="PUBLIC"]""")
+        public_button = self._wait_for_button("""//tp-yt-paper-radio-button[@name="PUBLIC"]""")
         public_button.click()
-        time.sleep(15)
         return
+
+    def _wait_for_button(self, xpath: str,
+                         timeout: float = WAIT_TIMEOUT) -> WebElement:
+        """
+        Helper method to wait for an element to be visible and enabled,
+        YouTube Studio buttons mark themselves disabled with aria-disabled.
+
+        Args:
+            xpath (str): The XPath of the element.
+            timeout (float): The time in seconds to wait. Defaults to
+                WAIT_TIMEOUT.
+        Returns:
+            (WebElement): The element.
+        Raises:
+            selenium.common.exceptions.TimeoutException: If the element was
+                not ready in time.
+        """
+        def ready(driver):
+            element = EC.element_to_be_clickable((By.XPATH, xpath))(driver)
+            if element and element.get_attribute("aria-disabled") != "true":
+                return element
+            return False
+
+        return WebDriverWait(self._driver, timeout).until(ready)
+
+    @contextlib.contextmanager
+    def _timed(self, step: str) -> Iterator[None]:
+        """
+        Helper context manager to record the time a step of the upload took.
+
+        Args:
+            step (str): The name of the step.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._step_times[step] = time.perf_counter() - start
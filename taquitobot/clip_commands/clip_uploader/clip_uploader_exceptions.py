@@ -0,0 +1,22 @@
+# =============================================================================
+#
+# Title: clip_uploader_exceptions.py
+#
+# Author: Aidan
+#
+# Description: File to describe all exceptions related to uploading clips.
+#
+# =============================================================================
+
+# =============================================================================
+#
+#                                     Classes
+#
+# =============================================================================
+
+
+class UploadException(Exception):
+    """
+    An UploadException is a subclass of an Exception to describe an issue with uploading a clip to YouTube.
+    """
+    pass
@@ -2,6 +2,8 @@ import os
 
 COOKIES_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
                               "selenium")
+UPLOAD_CHECKPOINT_FOLDER = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "upload_checkpoints")
 DESCRIPTION_TEMPLATE = """
 placeholder Gameplay placeholder highlights placeholder Clips placeholder Plays
 placeholder Montage placeholder Shorts placeholder outplay placeholder Clutches
@@ -0,0 +1,386 @@
+"""
+youtube_api_uploader.py
+
+Class implementation to upload clips to YouTube with the resumable upload
+protocol of the YouTube Data API instead of driving YouTube Studio through
+Chrome. The video is sent in chunks, the session and the offset the server
+has confirmed are checkpointed to disk after every chunk, and failed requests
+are retried with exponential backoff, resuming from the last confirmed byte.
+
+Attributes:
+    UPLOAD_URL (str): The endpoint that starts a resumable upload session.
+    TOKEN_URL (str): The endpoint that exchanges the refresh token for an
+        access token.
+    VIDEO_LINK (str): The link to an uploaded video, formatted with its id.
+    CHUNK_SIZE (int): The default number of bytes sent per request, it must
+        be a multiple of 256 KiB.
+    MAX_RETRIES (int): The default number of consecutive failed requests
+        before the upload is abandoned.
+    BACKOFF_BASE (float): The default delay in seconds before the first
+        retry, doubled on every retry after it.
+    BACKOFF_MAX (float): The longest delay in seconds between retries.
+    RETRY_STATUSES (tuple[int, ...]): The response codes that are retried.
+    REQUEST_TIMEOUT (float): The time in seconds to wait for a response.
+    CATEGORY_GAMING (str): The id of the Gaming category on YouTube.
+    CHECKPOINT_MAX_AGE (float): The time in seconds after its last chunk
+        that a checkpoint is removed, YouTube expires an upload session
+        about a week after it is started.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The uploader authenticates with the OAuth client and refresh token in
+    the YouTube_client_id, YouTube_client_secret and YouTube_refresh_token
+    environment variables. The protocol is documented at
+    https://developers.google.com/youtube/v3/guides/using_resumable_upload_protocol.
+
+    Checkpoints are keyed by the content of the video rather than its path,
+    clip jobs render into a new scratch directory every time so a retried
+    job uploads the same video from a different path.
+"""
+import hashlib
+import json
+import os
+import random
+import time
+import requests
+from ..clip_metrics.pipeline_metrics import get_metrics
+from .clip_uploader_exceptions import UploadException
+from .const import DESCRIPTION_TEMPLATE, UPLOAD_CHECKPOINT_FOLDER
+
+UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos"
+TOKEN_URL = "https://oauth2.googleapis.com/token"
+VIDEO_LINK = "https://youtube.com/shorts/{}"
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_RETRIES = 8
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 64.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REQUEST_TIMEOUT = 60
+CATEGORY_GAMING = "20"
+CHECKPOINT_MAX_AGE = 7 * 24 * 60 * 60.0
+
+
+class _RetryableError(Exception):
+    """
+    Raised inside the upload loop for a response that should be retried.
+    """
+    pass
+
+
+class YouTubeApiUploader:
+    """
+    A YouTubeApiUploader uploads edited clips to YouTube over the Data API,
+    it has the same interface as the YouTubeUploader.
+
+    Args:
+        video_title (str): The title of the video set by the user.
+        game_title (str): The title of the game as a string.
+        chunk_size (int): The number of bytes sent per request. Defaults to
+            CHUNK_SIZE.
+        max_retries (int): The number of consecutive failed requests before
+            the upload is abandoned. Defaults to MAX_RETRIES.
+        backoff_base (float): The delay in seconds before the first retry.
+            Defaults to BACKOFF_BASE.
+        upload_url (str): The endpoint that starts an upload session.
+            Defaults to UPLOAD_URL.
+        token_url (str): The endpoint that issues access tokens. Defaults to
+            TOKEN_URL.
+        checkpoint_folder (str): The folder the checkpoints are kept in.
+            Defaults to UPLOAD_CHECKPOINT_FOLDER.
+    """
+    """
+    Private Attributes:
+        _session (requests.Session): Session reused for every request of the
+            upload so the connection stays open between chunks.
+        _access_token (str | None): The current access token, None until one
+            has been requested.
+        _token_expiry (float): The time.monotonic time the access token
+            expires at.
+    """
+
+    def __init__(self, video_title: str, game_title: str,
+                 chunk_size: int = CHUNK_SIZE,
+                 max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE,
+                 upload_url: str = UPLOAD_URL, token_url: str = TOKEN_URL,
+                 checkpoint_folder: str = UPLOAD_CHECKPOINT_FOLDER) -> None:
+        self._video_title = f"{video_title} #{game_title} " \
+                            f"#{game_title}Clip #{game_title}Guides"[:100]
+        self._description = DESCRIPTION_TEMPLATE.replace("placeholder",
+                                                         game_title)[:5000]
+        self._chunk_size = chunk_size
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._upload_url = upload_url
+        self._token_url = token_url
+        self._checkpoint_folder = checkpoint_folder
+        self._session = requests.Session()
+        self._access_token = None
+        self._token_expiry = 0.0
+
+    def upload_to_youtube(self, file_name: str) -> str:
+        """
+        Uploads the specified video to YouTube, an upload of the same file
+        that was interrupted is resumed from its checkpoint.
+
+        Args:
+            file_name (str): The path to the video file that should be
+                uploaded.
+        Returns:
+            (str): The url of the video on YouTube.
+        Raises:
+            UploadException: If the upload was rejected or failed more than
+                max_retries times in a row.
+        """
+        self._remove_stale_checkpoints()
+        size = os.path.getsize(file_name)
+        version = {"size": size}
+        checkpoint_file = self._checkpoint_file(file_name)
+        session_uri = self._load_checkpoint(checkpoint_file, version)
+        # None means the offset has to be asked for before sending, the
+        # server is the authority on what it has stored
+        offset = None if session_uri is not None else 0
+        retries = 0
+        video_id = None
+
+        with get_metrics().timer("upload"), open(file_name, "rb") as f:
+            while video_id is None:
+                try:
+                    if session_uri is None:
+                        session_uri = self._start_session(size)
+                        offset = 0
+                        self._save_checkpoint(checkpoint_file, session_uri,
+                                              version, offset)
+                    if offset is None:
+                        response = self._request(
+                            "PUT", session_uri,
+                            headers={"Content-Range": f"bytes */{size}"})
+                    else:
+                        f.seek(offset)
+                        chunk = f.read(self._chunk_size)
+                        last = offset + len(chunk) - 1
+                        response = self._request(
+                            "PUT", session_uri, data=chunk,
+                            headers={"Content-Range":
+                                     f"bytes {offset}-{last}/{size}"})
+
+                    if response.status_code in (200, 201):
+                        video_id = response.json()["id"]
+                    elif response.status_code == 308:
+                        offset = self._confirmed_offset(response)
+                        retries = 0
+                        self._save_checkpoint(checkpoint_file, session_uri,
+                                              version, offset)
+                    elif response.status_code in (404, 410):
+                        # A new session counts as a retry, so a server that
+                        # expires every session cannot keep the loop going
+                        session_uri = None
+                        raise _RetryableError(
+                            f"upload session expired with "
+                            f"{response.status_code}")
+                    else:
+                        raise UploadException(
+                            f"Upload rejected with {response.status_code}: "
+                            f"{response.text[:200]}")
+                except (_RetryableError, requests.ConnectionError,
+                        requests.Timeout) as error:
+                    retries += 1
+                    if retries > self._max_retries:
+                        raise UploadException(
+                            f"Upload failed after {self._max_retries} "
+                            f"retries: {error}")
+                    delay = min(BACKOFF_MAX,
+                                self._backoff_base * 2 ** (retries - 1))
+                    print(f"upload failed ({error}), retrying in "
+                          f"{delay:.1f}s")
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+                    offset = None if session_uri is not None else 0
+
+        if os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+        get_metrics().add(counter="bytes", stage="upload", amount=size)
+        return VIDEO_LINK.format(video_id)
+
+    def _start_session(self, size: int) -> str:
+        """
+        Helper method to start a resumable upload session with the metadata
+        of the video.
+
+        Args:
+            size (int): The size of the video in bytes.
+        Returns:
+            (str): The session uri the video is sent to.
+        """
+        metadata = {
+            "snippet": {"title": self._video_title,
+                        "description": self._description,
+                        "categoryId": CATEGORY_GAMING},
+            "status": {"privacyStatus": "public",
+                       "selfDeclaredMadeForKids": False}}
+        response = self._request(
+            "POST", self._upload_url,
+            params={"uploadType": "resumable", "part": "snippet,status"},
+            json=metadata,
+            headers={"X-Upload-Content-Length": str(size),
+                     "X-Upload-Content-Type": "video/mp4"})
+        if response.status_code != 200 or "Location" not in response.headers:
+            raise UploadException(
+                f"Could not start upload, {response.status_code}: "
+                f"{response.text[:200]}")
+        return response.headers["Location"]
+
+    def _request(self, method: str, url: str, headers: dict,
+                 **kwargs) -> requests.Response:
+        """
+        Helper method to make an authorized request, the access token is
+        refreshed once if it was rejected.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The url to request.
+            headers (dict): The headers of the request.
+            **kwargs: Passed on to requests.
+        Returns:
+            (requests.Response): The response.
+        Raises:
+            _RetryableError: If the response should be retried.
+        """
+        for attempt in range(2):
+            headers["Authorization"] = f"Bearer {self._get_access_token()}"
+            response = self._session.request(method, url, headers=headers,
+                                             timeout=REQUEST_TIMEOUT,
+                                             **kwargs)
+            if response.status_code != 401 or attempt == 1:
+                break
+            self._access_token = None
+        if response.status_code in RETRY_STATUSES:
+            raise _RetryableError(f"server responded {response.status_code}")
+        return response
+
+    def _get_access_token(self) -> str:
+        """
+        Helper method to get an access token, a new one is requested with the
+        refresh token when the current one is about to expire.
+
+        Returns:
+            (str): The access token.
+        """
+        if self._access_token is None or \
+                time.monotonic() >= self._token_expiry:
+            try:
+                response = self._session.post(self._token_url, data={
+                    "client_id": os.environ["YouTube_client_id"],
+                    "client_secret": os.environ["YouTube_client_secret"],
+                    "refresh_token": os.environ["YouTube_refresh_token"],
+                    "grant_type": "refresh_token"},
+                    timeout=REQUEST_TIMEOUT)
+            except KeyError as error:
+                raise UploadException(f"Missing YouTube credential {error}")
+            if response.status_code in RETRY_STATUSES:
+                raise _RetryableError(
+                    f"token endpoint responded {response.status_code}")
+            if response.status_code != 200:
+                raise UploadException(
+                    f"Could not refresh the access token, "
+                    f"{response.status_code}: {response.text[:200]}")
+            token = response.json()
+            self._access_token = token["access_token"]
+            self._token_expiry = time.monotonic() + \
+                token.get("expires_in", 3600) - 60
+        return self._access_token
+
+    def _confirmed_offset(self, response: requests.Response) -> int:
+        """
+        Helper method to read the next byte to send from the Range header of
+        a 308 response, no Range header means nothing has been stored yet.
+
+        Args:
+            response (requests.Response): The 308 response.
+        Returns:
+            (int): The offset of the next byte to send.
+        """
+        confirmed = response.headers.get("Range")
+        if confirmed is None:
+            return 0
+        return int(confirmed.rpartition("-")[2]) + 1
+
+    def _checkpoint_file(self, file_name: str) -> str:
+        """
+        Helper method to get the checkpoint file of a video, named after the
+        sha256 of the video and the metadata it is uploaded with, so the
+        same video is resumed wherever it is uploaded from.
+
+        Args:
+            file_name (str): The path to the video.
+        Returns:
+            (str): The path to the checkpoint file.
+        """
+        digest = hashlib.sha256()
+        with open(file_name, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest.update(f":{self._video_title}".encode())
+        return os.path.join(self._checkpoint_folder,
+                            f"{digest.hexdigest()}.json")
+
+    def _remove_stale_checkpoints(self) -> None:
+        """
+        Helper method to remove the checkpoints of uploads that were not
+        resumed within CHECKPOINT_MAX_AGE, their sessions have expired.
+        """
+        stale_before = time.time() - CHECKPOINT_MAX_AGE
+        try:
+            entries = list(os.scandir(self._checkpoint_folder))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < stale_before:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _load_checkpoint(self, checkpoint_file: str,
+                         version: dict) -> str | None:
+        """
+        Helper method to read the session of an interrupted upload.
+
+        Args:
+            checkpoint_file (str): The path to the checkpoint file.
+            version (dict): The size of the video.
+        Returns:
+            (str | None): The session uri, None if there is no checkpoint or
+                it is for a different version of the file.
+        """
+        try:
+            with open(checkpoint_file, "r") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("version") != version:
+            return None
+        return checkpoint.get("session_uri")
+
+    def _save_checkpoint(self, checkpoint_file: str, session_uri: str,
+                         version: dict, offset: int) -> None:
+        """
+        Helper method to atomically write the checkpoint of an upload.
+
+        Args:
+            checkpoint_file (str): The path to the checkpoint file.
+            session_uri (str): The session uri of the upload.
+            version (dict): The size of the video.
+            offset (int): The number of bytes the server has confirmed.
+        """
+        os.makedirs(self._checkpoint_folder, exist_ok=True)
+        temporary_file = f"{checkpoint_file}.{os.getpid()}.tmp"
+        with open(temporary_file, "w") as f:
+            json.dump({"session_uri": session_uri, "version": version,
+                       "offset": offset}, f)
+        os.replace(temporary_file, checkpoint_file)
@@ -9,6 +9,9 @@ Attributes:
     bot (discord.ext.commands.Bot): Discord bot object to attach commands.
     outplayed_pattern (str): Regex string containing the outplayed.tv link for 
         automatic video uploading.
+    clip_jobs (ClipJobExecutor): Executor that processes the outplayed.tv
+        clips in the background so the bot stays responsive, it writes the
+        pipeline metrics to METRICS_FILE after every clip.
 
 TODO:
     - Write tests
@@ -31,18 +34,11 @@ import re
 import nest_asyncio
 import discord
 from discord.ext import commands
-from clip_commands.clip_downloader.clip_downloader_discord import (
-    ClipDownloaderDiscord
+from clip_commands.clip_jobs.clip_job_executor import (
+    ClipJobExecutor
 )
-from clip_commands.clip_editor.clip_prep import (
-    ClipPrepValorant,
-    ClipPrepLeagueOfLegends
-)
-from clip_commands.clip_editor.clip_editor import (
-    ClipEditor
-)
-from clip_commands.clip_uploader.clip_uploader import (
-    YouTubeUploader
+from clip_commands.clip_metrics.pipeline_metrics import (
+    METRICS_FILE, get_metrics
 )
 
 
@@ -50,6 +46,7 @@ nest_asyncio.apply()
 intents = discord.Intents.all()
 bot = commands.Bot(command_prefix='$', intents=intents)
 outplayed_pattern = r"https://outplayed\.tv/media/.*"
+clip_jobs = ClipJobExecutor(metrics_file=METRICS_FILE, streaming=True)
 
 
 @bot.event
@@ -77,31 +74,7 @@ async def on_message(message):
     content = message.content.lower()
 
     if re.search(outplayed_pattern, content, re.IGNORECASE):
-        clip_downloader = ClipDownloaderDiscord(discord_message=content)
-        file_name = clip_downloader.download_video()
-        game_title = clip_downloader.get_game_title()
-        video_title = clip_downloader.get_video_title()
-        match game_title:
-            case "valorant":
-                clip_prep = ClipPrepValorant(video_file=file_name)
-            case "leagueoflegends":
-                clip_prep = ClipPrepLeagueOfLegends(video_file=file_name)
-            case _:
-                clip_prep = ClipPrepValorant(video_file=file_name)
-
-        clip_editor = ClipEditor(clip_prep=clip_prep)  
-        edited_clip = clip_editor.edit_and_save_video(clip_file=file_name, 
-                                                      game_title=game_title,
-                                                      video_title=video_title)
-        
-        clip_uploader = YouTubeUploader(video_title=video_title,
-                                        game_title=game_title)
-        try:
-            clip_uploader.upload_to_youtube(file_name=edited_clip)
-        except:
-            print("error uploading video")
-        finally:
-            clip_editor.remove_footage(edited_clip)
+        clip_jobs.submit(discord_message=content, channel=message.channel)
 
 
 async def load():
@@ -110,6 +83,7 @@ async def load():
     """
     await bot.load_extension("music_commands.music_commands")
     await bot.load_extension("riot.riot_requests")
+    await bot.load_extension("clip_commands.clip_metrics.clip_stats_commands")
 
 
 async def main():
@@ -118,10 +92,15 @@ async def main():
     """
     async with bot:
         await load()
+        if 'Clip_metrics_port' in os.environ:
+            get_metrics().serve_prometheus(
+                port=int(os.environ['Clip_metrics_port']))
         try:
             await bot.run(os.environ['Discord_test_token'])
         except:
             os.system("kill 1")
+        finally:
+            clip_jobs.shutdown(wait=False)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,264 @@
+"""
+guild_player.py
+
+Class implementation of the music player of a single discord server. Every
+guild the bot plays music in gets its own GuildPlayer with its own queue,
+playback state and voice client, so requests from one server never touch
+the queue or voice connection of another.
+
+Attributes:
+    IDLE_TIMEOUT (float): The time in seconds a player with nothing playing
+        or queued is kept before it is collected.
+    FFMPEG_OPTIONS (dict): Dictionary of options for FFMPEG audio processing.
+
+TODO:
+
+Versioning:
+    Author: Aidan (Chimichanga Kid)
+    Date: 2026-10-18
+    Version: 1.0.0
+
+Notes:
+    The voice client of a player is the one discord.py keeps for the guild
+    (ctx.voice_client), so a player never holds on to the voice connection
+    of another guild.
+"""
+import asyncio
+import time
+import discord
+from music_commands.music_exceptions import JoinException
+
+IDLE_TIMEOUT = 300.0
+
+FFMPEG_OPTIONS = {
+    'before_options':
+    '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
+    'options': '-vn'
+}
+
+
+class GuildPlayer:
+    """
+    A GuildPlayer holds the music queue and playback state of one guild.
+
+    Args:
+        bot (discord.ext.bot): The bot object the player sends messages
+            with.
+        guild_id (int): The id of the guild the player is for.
+    """
+    """
+    Private Attributes:
+        _is_playing (bool): Boolean if the player is currently playing music.
+        _title_list (list[str]): The titles of the queued songs FIFO.
+        _song_queue (list[str]): The links to the queued songs on YouTube
+            matching with _title_list FIFO.
+        _current_song (str): The title of the song currently playing.
+        _voice (discord.VoiceClient): The voice client of the guild, None
+            before the player has joined a channel.
+        _last_active (float): The monotonic time the player was last used or
+            last finished a song.
+        _fetches (dict[asyncio.Task, int]): The songs being fetched for the
+            queue, mapped to the id of the member that requested them.
+    """
+
+    def __init__(self, bot, guild_id: int) -> None:
+        self._bot = bot
+        self._guild_id = guild_id
+
+        self._is_playing = False
+        self._title_list = []
+        self._song_queue = []
+        self._current_song = ''
+
+        self._voice = None
+        self._last_active = time.monotonic()
+        self._fetches = {}
+
+    def get_guild_id(self) -> int:
+        """
+        Method to access the id of the guild the player is for.
+
+        Returns:
+            (int): The id of the guild.
+        """
+        return self._guild_id
+
+    def get_titles(self) -> list[str]:
+        """
+        Method to access the titles of the queued songs.
+
+        Returns:
+            (list[str]): The titles in the order they will be played.
+        """
+        return self._title_list
+
+    def get_current_song(self) -> str:
+        """
+        Method to access the title of the song that is playing.
+
+        Returns:
+            (str): The title, empty string before the first song.
+        """
+        return self._current_song
+
+    def get_voice(self):
+        """
+        Method to access the voice client of the guild.
+
+        Returns:
+            (discord.VoiceClient | None): The voice client, None if the
+                player has not joined a channel.
+        """
+        return self._voice
+
+    def is_playing(self) -> bool:
+        """
+        Method to check if the player is working through its queue.
+
+        Returns:
+            (bool): True if a song is playing or paused.
+        """
+        return self._is_playing
+
+    def is_idle(self, now: float, timeout: float = IDLE_TIMEOUT) -> bool:
+        """
+        Method to check if the player can be collected, it has nothing
+        playing or queued and has not been used for timeout seconds.
+
+        Args:
+            now (float): The current monotonic time.
+            timeout (float): The time in seconds an idle player is kept.
+                Defaults to IDLE_TIMEOUT.
+        Returns:
+            (bool): True if the player is idle.
+        """
+        return not self._is_playing and not self._song_queue and \
+            not self._fetches and now - self._last_active >= timeout
+
+    def add_fetch(self, fetch: asyncio.Task, member_id: int) -> None:
+        """
+        Method to keep track of a song being fetched for the queue until it
+        is done, so it can be cancelled.
+
+        Args:
+            fetch (asyncio.Task): The task fetching the song.
+            member_id (int): The id of the member that requested the song.
+        """
+        self._fetches[fetch] = member_id
+        fetch.add_done_callback(lambda done: self._fetches.pop(done, None))
+
+    def cancel_fetches(self, member_id: int | None = None) -> int:
+        """
+        Method to cancel the songs being fetched for the queue.
+
+        Args:
+            member_id (int | None): The id of the member whose requests are
+                cancelled, None for every request. Defaults to None.
+        Returns:
+            (int): The number of fetches cancelled.
+        """
+        fetches = [fetch for fetch, requester in self._fetches.items()
+                   if member_id is None or requester == member_id]
+        for fetch in fetches:
+            fetch.cancel()
+        return len(fetches)
+
+    def touch(self) -> None:
+        """
+        Method to mark the player as used now.
+        """
+        self._last_active = time.monotonic()
+
+    def clear(self) -> None:
+        """
+        Method to empty the queue and cancel the songs being fetched, used
+        when the bot leaves the channel.
+        """
+        self.cancel_fetches()
+        self._title_list.clear()
+        self._song_queue.clear()
+
+    def remove(self, song_index: int) -> str | None:
+        """
+        Method to remove a song from the queue.
+
+        Args:
+            song_index (int): The index of the song in the queue, from 0.
+        Returns:
+            (str | None): The title of the removed song, None if there is no
+                song at the index.
+        """
+        if -1 < song_index < len(self._song_queue):
+            self._song_queue.pop(song_index)
+            return self._title_list.pop(song_index)
+        return None
+
+    def play_next_song(self, ctx) -> None:
+        """
+        Method to play the next song in queue if it exists.
+
+        Args:
+            ctx (discord.ext.commands.Context): Discord Context object
+                containing information about the command request.
+        """
+        self.touch()
+        if len(self._song_queue) > 0:
+            self._is_playing = True
+
+            song_url = self._song_queue.pop(0)
+            song_title = self._title_list.pop(0)
+            self._current_song = song_title
+
+            channel_id = ctx.channel.id
+            channel = self._bot.get_channel(channel_id)
+
+            # After the song has finished playing, play the next song
+            self._voice.play(discord.FFmpegOpusAudio(song_url,
+                                                    **FFMPEG_OPTIONS),
+                             after=lambda x: self.play_next_song(ctx))
+            self._bot.loop.create_task(
+                channel.send(f"Playing song {song_title}"))
+        else:
+            self._is_playing = False
+
+    def add_song(self, title: str, song_url: str) -> None:
+        """
+        Method to add a song to the end of the queue.
+
+        Args:
+            title (str): The title of the song.
+            song_url (str): The link to the audio of the song.
+        """
+        self.touch()
+        self._title_list.append(title)
+        self._song_queue.append(song_url)
+
+    async def join_voice(self, ctx) -> None:
+        """
+        Method to join the voice channel of the user that requested the
+        command.
+
+        Args:
+            ctx (discord.ext.commands.Context): Discord Context object
+                containing information about the command request.
+
+        Raises:
+            JoinException (Exception): If the user is not in a voice channel.
+        """
+        if ctx.voice_client is None:
+            if ctx.author.voice:
+                channel = ctx.message.author.voice.channel
+                self._voice = await channel.connect()
+            else:
+                await ctx.send(
+                    "Must be in a voice channel to use this command.")
+                raise JoinException("Not in voice channel")
+        else:
+            try:
+                channel = ctx.message.author.voice.channel
+                self._voice = ctx.voice_client
+                await ctx.voice_client.move_to(channel)
+            except:
+                if ctx.author.voice:
+                    channel = ctx.message.author.voice.channel
+                    self._voice = await channel.connect()
@@ -2,10 +2,10 @@
 music_commands.py
 
 File that handles commands related to requesting music to be played over the 
-bot. Has class definitions for the cog and interfaces with yt_dlp.
+bot. Has class definitions for the cog and interfaces with yt_dlp. Every guild
+has its own GuildPlayer, so the bot can play music in many servers at once.
 
 Attributes:
-    FFMPEG_OPTIONS (dict): Dictionary of options for FFMPEG audio processing.
 
 TODO:
     - Modularize the code, try and integrate youtube methods and exceptions 
@@ -20,23 +20,21 @@ Notes:
     Private methods and variables are documented to assist developers that need
     to understand the underlying code. 
 """
-import discord
+import asyncio
+import time
 from discord.ext import commands
+from music_commands.guild_player import GuildPlayer
 from music_commands.my_youtube.youtube_requests import fetch_song
 from music_commands.my_youtube.youtube_exceptions import SongException
 from music_commands.music_exceptions import JoinException
 
-FFMPEG_OPTIONS = {
-    'before_options':
-    '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
-    'options': '-vn'
-}
-
 
 class MusicPlayer(commands.Cog):
     """
     Class to handle information about the music playing on the bot and getting
-    music from YouTube.
+    music from YouTube. The queue, playback state and voice client of every
+    guild are kept in a GuildPlayer, created the first time the guild uses a
+    music command and collected once it has been idle.
 
     Args:
         bot (discord.ext.bot): The bot object to connect the commands to.
@@ -48,24 +46,33 @@ class MusicPlayer(commands.Cog):
     """
     Private Attributes:
         _bot (discord.ext.bot): Bot object to connect the commands to.
-        _is_playing (bool): Boolean if the bot is currently playing music.
-        _title_list (array): Array of strings representing the titles FIFO.
-        _song_queue (array): Array of links to the song on YouTube matching 
-            with _title_list FIFO.
-        _current_song (str): String that is the song title of the song 
-            currently playing on the bot.
-        _voice (discord.VoiceClient): VoiceClient object that contains 
-            information about the voice channel that is requesting songs.
+        _players (dict[int, GuildPlayer]): The player of every guild that
+            has used a music command recently, keyed by the guild id.
     """
     def __init__(self, bot):
         self._bot = bot
 
-        self._is_playing = False
-        self._title_list = []
-        self._song_queue = []
-        self._current_song = ''
+        self._players = {}
+
+    def get_player(self, guild_id: int) -> GuildPlayer | None:
+        """
+        Method to access the player of a guild without creating one.
+
+        Args:
+            guild_id (int): The id of the guild.
+        Returns:
+            (GuildPlayer | None): The player, None if the guild has none.
+        """
+        return self._players.get(guild_id)
+
+    def get_player_count(self) -> int:
+        """
+        Method to access the number of guilds with a player.
 
-        self._voice = None
+        Returns:
+            (int): The number of players.
+        """
+        return len(self._players)
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -75,6 +82,22 @@ class MusicPlayer(commands.Cog):
         """
         print("music_commands ready")
 
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """
+        Method to cancel the songs a member is still waiting on when they
+        leave the voice channel.
+
+        Args:
+            member (discord.Member): The member whose voice state changed.
+            before (discord.VoiceState): The voice state before the change.
+            after (discord.VoiceState): The voice state after the change.
+        """
+        if before.channel is not None and after.channel is None:
+            player = self._players.get(member.guild.id)
+            if player is not None:
+                player.cancel_fetches(member.id)
+
     @commands.command(name="play", aliases=['p', 'P'])
     async def play(self, ctx):
         """
@@ -91,9 +114,10 @@ class MusicPlayer(commands.Cog):
         """
 
         song_name = ctx.message.content.split(None, 1)[1]
+        player = self._player(ctx)
 
         try:
-            await self._join_voice(ctx)
+            await player.join_voice(ctx)
         except JoinException:
             await ctx.send(
                 """Error joining voice channel. Check that you are in a channel
@@ -101,29 +125,39 @@ class MusicPlayer(commands.Cog):
             )
             return None
 
+        fetch = asyncio.ensure_future(self._queue_song(player, song_name))
+        player.add_fetch(fetch, ctx.author.id)
         try:
-            queued_song = await self._queue_song(song_name)
+            queued_song = await fetch
             await ctx.send(f"Queued song {queued_song}.")
         except SongException:
             await ctx.send("Error fetching song from YouTube.")
             return None
+        except asyncio.CancelledError:
+            # Only the fetch was cancelled, not the command
+            if asyncio.current_task().cancelling():
+                raise
+            await ctx.send(f"Cancelled request for {song_name}.")
+            return None
 
-        if not self._is_playing:
-            self._play_next_song(ctx)
+        if not player.is_playing():
+            player.play_next_song(ctx)
 
     @commands.command(name="leave", aliases=["disconnect", 'l', 'L'])
     async def leave(self, ctx):
         """
         Command to instruct the bot to disconnect from the voice channel. If 
-        not in a voice channel this command does nothing.
+        not in a voice channel this command does nothing. The player of the
+        guild is dropped and the songs still being fetched are cancelled.
         
         Args:
             ctx (discord.ext.commands.Context): Discord Context object 
                 containing information about the command request.
         """
         if ctx.voice_client:
-            self._title_list.clear()
-            self._song_queue.clear()
+            player = self._players.pop(ctx.guild.id, None)
+            if player is not None:
+                player.clear()
             await ctx.send(f"Disconnected {ctx.voice_client.channel.name}.")
             await ctx.guild.voice_client.disconnect()
         else:
@@ -142,12 +176,13 @@ class MusicPlayer(commands.Cog):
         Raises:
             SongException (Exception): if the track is not playing or paused.
         """
+        voice = self._player(ctx).get_voice()
 
-        if self._voice._is_playing():
-            self._voice.pause()
+        if voice is not None and voice.is_playing():
+            voice.pause()
             await ctx.send("Successfully paused.")
-        elif self._voice.is_paused():
-            self._voice.resume()
+        elif voice is not None and voice.is_paused():
+            voice.resume()
             await ctx.send("Successfully resumed.")
         else:
             await ctx.send("Unable to pause/resume")
@@ -163,10 +198,12 @@ class MusicPlayer(commands.Cog):
             ctx (discord.ext.commands.Context): Discord Context object 
                 containing information about the command request.
         """
+        player = self._player(ctx)
+        voice = player.get_voice()
 
-        if self._voice._is_playing() or self._voice.is_paused():
-            self._voice.stop()
-            await ctx.send(f"Skipped song {self._current_song}")
+        if voice is not None and (voice.is_playing() or voice.is_paused()):
+            voice.stop()
+            await ctx.send(f"Skipped song {player.get_current_song()}")
 
     @commands.command(name="queue", aliases=['q', 'Q'])
     async def queue(self, ctx):
@@ -178,14 +215,15 @@ class MusicPlayer(commands.Cog):
             ctx (discord.ext.commands.Context): Discord Context object 
                 containing information about the command request.
         """
+        title_list = self._player(ctx).get_titles()
 
-        if len(self._title_list) < 1:
+        if len(title_list) < 1:
             await ctx.send("No songs in queue.")
             return
 
         queue = "Queue: "
 
-        for song_index, song_title in enumerate(self._title_list, start=1):
+        for song_index, song_title in enumerate(title_list, start=1):
             queue = queue + "\n" + str(song_index) + '. ' + song_title
 
         await ctx.send("**" + queue + "**")
@@ -203,44 +241,50 @@ class MusicPlayer(commands.Cog):
         """
         index = ctx.message.content
         song_index = int(index.split(None, 1)[1]) - 1
-        if -1 < song_index < len(self._song_queue):
-            self._song_queue.pop(song_index)
-            title = self._title_list.pop(song_index)
+        title = self._player(ctx).remove(song_index)
+        if title is not None:
             await ctx.send("Removed: **" + str(song_index + 1) + '. ' + title + '**')
         else:
             await ctx.send("Invalid input brainless idjit")
-    
-    def _play_next_song(self, ctx):
+
+    def _player(self, ctx) -> GuildPlayer:
         """
-        Private helper function to play the next song in queue if it exists
+        Private helper function to get the player of the guild the command
+        came from, creating it the first time the guild uses a command. The
+        players of other guilds that have been idle for too long are
+        collected first.
 
         Args:
             ctx (discord.ext.commands.Context): Discord Context object 
                 containing information about the command request.
-        """
-        if len(self._song_queue) > 0:
-            self._is_playing = True
-
-            song_url = self._song_queue.pop(0)
-            song_title = self._title_list.pop(0)
-
-            channel_id = ctx.channel.id
-            channel = self._bot.get_channel(channel_id)
 
-            # After the song has finished playing, send self._play_next_song
-            self._voice.play(discord.FFmpegOpusAudio(song_url,
-                                                    **FFMPEG_OPTIONS),
-                            after=lambda x: self._play_next_song(ctx))
-            self._bot.loop.create_task(
-                channel.send(f"Playing song {song_title}"))
-        else:
-            self._is_playing = False
+        Returns:
+            (GuildPlayer): The player of the guild.
+        """
+        self._collect_idle_players()
+        player = self._players.get(ctx.guild.id)
+        if player is None:
+            player = GuildPlayer(self._bot, ctx.guild.id)
+            self._players[ctx.guild.id] = player
+        player.touch()
+        return player
+
+    def _collect_idle_players(self) -> None:
+        """
+        Private helper function to drop the players that have nothing playing
+        or queued and have not been used for IDLE_TIMEOUT seconds.
+        """
+        now = time.monotonic()
+        for guild_id in [guild_id for guild_id, player in
+                         self._players.items() if player.is_idle(now)]:
+            del self._players[guild_id]
 
-    async def _queue_song(self, song_name: str) -> str:
+    async def _queue_song(self, player: GuildPlayer, song_name: str) -> str:
         """
         Private helper function to queue up the song from YouTube.
 
         Args:
+            player (GuildPlayer): The player of the guild the song is for.
             song_name (str): The name of the requested song as a string.
         
         Returns:
@@ -252,39 +296,12 @@ class MusicPlayer(commands.Cog):
         """
         song_information = await fetch_song(song_name)
         if song_information:
-            self._title_list.append(song_information['entries'][0]['title'])
-            self._song_queue.append(song_information['entries'][0]['url'])
-            return song_information['entries'][0]['title']
+            entry = song_information['entries'][0]
+            player.add_song(entry['title'], entry['url'])
+            return entry['title']
         else:
             raise SongException("Unable to fetch song from YouTube.")
 
-    async def _join_voice(self, ctx):
-        """
-        Helper function to join the voice channel of the user that requested 
-        the command.
-
-        Args:
-            ctx (discord.ext.commands.Context): Discord Context object 
-                containing information about the command request.
-        """
-        if self._voice is None:
-            if ctx.author.voice:
-                channel = ctx.message.author.voice.channel
-                self._voice = await channel.connect()
-            else:
-                await ctx.send(
-                    "Must be in a voice channel to use this command.")
-                raise JoinException("Not in voice channel")
-        else:
-            try:
-                channel = ctx.message.author.voice.channel
-                self._voice = ctx.voice_client
-                await ctx.voice_client.move_to(channel)
-            except:
-                if ctx.author.voice:
-                    channel = ctx.message.author.voice.channel
-                    self._voice = await channel.connect()
-
 
 async def setup(bot):
     await bot.add_cog(MusicPlayer(bot))
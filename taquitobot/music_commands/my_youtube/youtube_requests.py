@@ -4,7 +4,9 @@
 #
 # Author: Aidan
 #
-# Description: Script to interface with YouTube related commands.
+# Description: Script to interface with YouTube related commands. The searches
+#              block while yt_dlp talks to YouTube, so they run in a bounded
+#              pool of threads to keep the event loop free.
 #
 # =============================================================================
 
@@ -13,7 +15,12 @@
 #                                   Imports
 #
 # =============================================================================
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import yt_dlp
+from clip_commands.clip_metrics.pipeline_metrics import get_metrics
 from music_commands.my_youtube.youtube_exceptions import SongException
 
 # =============================================================================
@@ -22,6 +29,11 @@ from music_commands.my_youtube.youtube_exceptions import SongException
 #
 # =============================================================================
 
+# The number of searches that run at the same time, the rest wait in a queue.
+FETCH_WORKERS = 4
+# The time in seconds a search may take, queueing included.
+FETCH_TIMEOUT = 20.0
+
 ydl_opts = {
     'format':
     'bestaudio/best',
@@ -30,26 +42,111 @@ ydl_opts = {
         'preferredcodec': 'mp3',
         'preferredquality': '192',
     }],
+    # A search that has timed out cannot be stopped, so its thread is only
+    # freed once yt_dlp gives up on the connection.
+    'socket_timeout': FETCH_TIMEOUT,
 }
 
+_fetch_executor = None
+_fetch_depth = {"queued": 0, "running": 0}
+_fetch_lock = threading.Lock()
+
 
 # =============================================================================
 #
 #                                   Functions
 #
 # =============================================================================
-async def fetch_song(song_name: str) -> dict:
+def get_fetch_executor() -> ThreadPoolExecutor:
+    """
+    Function to get the pool the searches run in, created on first use.
+
+    Returns:
+        (ThreadPoolExecutor): The pool of FETCH_WORKERS threads.
+    """
+    global _fetch_executor
+    with _fetch_lock:
+        if _fetch_executor is None:
+            _fetch_executor = ThreadPoolExecutor(
+                max_workers=FETCH_WORKERS, thread_name_prefix="fetch_song")
+        return _fetch_executor
+
+
+def get_fetch_depth() -> dict[str, int]:
+    """
+    Function to get the number of searches waiting for a thread and running.
+
+    Returns:
+        (dict[str, int]): The number of searches keyed by queued and running.
+    """
+    with _fetch_lock:
+        return dict(_fetch_depth)
+
+
+async def fetch_song(song_name: str, timeout: float = FETCH_TIMEOUT) -> dict:
     """
     Helper function to obtain information about the requested song from YouTube.
+    The search runs in the fetch executor, so searches from different users
+    run in parallel and the event loop is free while they do. Cancelling the
+    call drops a search that is still queued.
     :param song_name: The name of the song that is being requested.
+    :param timeout: The time in seconds to wait for the search.
     :return: A dict that contains information about the requested song, importantly the url and
              name of the song.
-    :raises: SongException if the specified song was not fetched from YouTube.
+    :raises: SongException if the specified song was not fetched from YouTube in time.
     """
+    _change_depth(queued=1)
+    job = get_fetch_executor().submit(_extract_info, song_name,
+                                      time.monotonic())
+    job.add_done_callback(_drop_cancelled)
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            song_information = ydl.extract_info(f"ytsearch:{song_name}",
-                                                download=False)
-            return song_information
+        return await asyncio.wait_for(asyncio.wrap_future(job), timeout)
+    except asyncio.TimeoutError:
+        raise SongException("Timed out fetching song from YouTube.")
     except Exception:
         raise SongException("Error occurred fetching song from YouTube.")
+
+
+def _extract_info(song_name: str, submitted: float) -> dict:
+    """
+    Helper function run in the fetch executor to search YouTube for the song.
+    :param song_name: The name of the song that is being requested.
+    :param submitted: The monotonic time the search was queued.
+    :return: The information yt_dlp found for the search.
+    """
+    get_metrics().observe(stage="song_fetch_queue",
+                          seconds=time.monotonic() - submitted)
+    _change_depth(queued=-1, running=1)
+    try:
+        with get_metrics().timer("song_fetch"):
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                return ydl.extract_info(f"ytsearch:{song_name}",
+                                        download=False)
+    finally:
+        _change_depth(running=-1)
+
+
+def _drop_cancelled(job: Future) -> None:
+    """
+    Helper function to take a search that was cancelled before it started out
+    of the queue depth.
+    :param job: The finished search.
+    """
+    if job.cancelled():
+        _change_depth(queued=-1)
+
+
+def _change_depth(queued: int = 0, running: int = 0) -> None:
+    """
+    Helper function to update the number of searches queued and running, and
+    their gauges.
+    :param queued: The change in the number of queued searches.
+    :param running: The change in the number of running searches.
+    """
+    with _fetch_lock:
+        _fetch_depth["queued"] += queued
+        _fetch_depth["running"] += running
+        depth = dict(_fetch_depth)
+    get_metrics().set_gauge(gauge="song_fetch_queued", value=depth["queued"])
+    get_metrics().set_gauge(gauge="song_fetch_running",
+                            value=depth["running"])
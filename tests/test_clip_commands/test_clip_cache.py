@@ -0,0 +1,352 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from benchmarks.bench_utils import make_test_clip, make_test_song
+import numpy as np
+from taquitobot.clip_commands.clip_cache import artifact_store, locked_manifest
+from taquitobot.clip_commands.clip_cache.artifact_store import ArtifactStore
+from taquitobot.clip_commands.clip_cache.asset_cache import AssetCache
+from taquitobot.clip_commands.clip_cache.facecam_cache import FacecamCache
+from taquitobot.clip_commands.clip_cache.media_index import MediaIndex
+from taquitobot.clip_commands.clip_cache.song_cache import SongCache
+from taquitobot.clip_commands.clip_editor.ffmpeg_renderer import FfmpegRenderer
+from taquitobot.clip_commands.clip_editor.frame_sampler import FrameSampler
+
+
+def copy_build(source: str, file_name: str) -> None:
+    with open(source, "rb") as f, open(file_name, "wb") as output:
+        output.write(f.read())
+
+
+class TestAssetCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = AssetCache(
+            cache_folder=os.path.join(self.directory.name, "cache"),
+            max_bytes=250, in_use_seconds=0)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def _source(self, name: str, content: bytes) -> str:
+        file_name = os.path.join(self.directory.name, name)
+        with open(file_name, "wb") as f:
+            f.write(content)
+        return file_name
+
+    def _get(self, source: str) -> str:
+        return self.cache.get(source=source, variant="copy", extension=".bin",
+                              build=copy_build)
+
+    def test_hit_after_build(self) -> None:
+        source = self._source("a.bin", b"a" * 100)
+        first = self._get(source)
+        second = self._get(source)
+
+        self.assertEqual(first, second)
+        self.assertEqual((self.cache.get_hits(), self.cache.get_misses()),
+                         (1, 1))
+
+    def test_rebuilt_when_source_changes(self) -> None:
+        source = self._source("a.bin", b"a" * 100)
+        self._get(source)
+        self._source("a.bin", b"b" * 120)
+
+        with open(self._get(source), "rb") as f:
+            self.assertEqual(f.read(), b"b" * 120)
+        self.assertEqual(self.cache.get_misses(), 2)
+
+    def test_least_recently_used_evicted(self) -> None:
+        sources = [self._source(f"{name}.bin", name.encode() * 100)
+                   for name in "abc"]
+        cached = [self._get(source) for source in sources[:2]]
+        time.sleep(0.01)
+        self._get(sources[0])
+        time.sleep(0.01)
+        self._get(sources[2])
+
+        self.assertTrue(os.path.exists(cached[0]))
+        self.assertFalse(os.path.exists(cached[1]))
+
+    def test_files_in_use_not_evicted(self) -> None:
+        cache = AssetCache(cache_folder=self.cache._cache_folder,
+                           max_bytes=250)
+        sources = [self._source(f"{name}.bin", name.encode() * 100)
+                   for name in "abc"]
+        cached = [cache.get(source=source, variant="copy", extension=".bin",
+                            build=copy_build) for source in sources]
+
+        self.assertTrue(all(os.path.exists(file) for file in cached))
+
+    def test_concurrent_builds_keep_every_entry(self) -> None:
+        cache_folder = self.cache._cache_folder
+        sources = [self._source(f"{n}.bin", b"x" * 10) for n in range(8)]
+
+        def get(source):
+            return AssetCache(cache_folder=cache_folder, max_bytes=1000).get(
+                source=source, variant="copy", extension=".bin",
+                build=copy_build)
+
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(get, sources))
+
+        with open(os.path.join(cache_folder, "manifest.json")) as f:
+            self.assertEqual(len(json.load(f)), 8)
+
+
+class TestArtifactStore(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ArtifactStore(
+            store_folder=os.path.join(self.directory.name, "artifacts"),
+            max_bytes=250)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def _download(self, name: str, content: bytes) -> str:
+        file_name = os.path.join(self.directory.name, name)
+        with open(file_name, "wb") as f:
+            f.write(content)
+        return file_name
+
+    def test_clip_keyed_by_url_and_content(self) -> None:
+        self.assertIsNone(self.store.get_clip(url="https://a/clip.mp4"))
+        download = self._download("clip.mp4", b"a" * 100)
+        stored = self.store.put_clip(url="https://a/clip.mp4",
+                                     file_name=download)
+        duplicate = self.store.put_clip(
+            url="https://b/clip.mp4",
+            file_name=self._download("copy.mp4", b"a" * 100))
+
+        self.assertFalse(os.path.exists(download))
+        self.assertEqual(duplicate, stored)
+        self.assertEqual(self.store.get_clip(url="https://a/clip.mp4"), stored)
+        self.assertEqual((self.store.get_hits("download"),
+                          self.store.get_misses("download")), (1, 1))
+
+    def test_highlights_and_renders(self) -> None:
+        clip = self.store.put_clip(url="https://a/clip.mp4",
+                                   file_name=self._download("clip.mp4",
+                                                            b"a" * 100))
+        clip_hash = self.store.get_clip_hash(clip)
+        self.assertIsNone(self.store.get_highlights(clip_hash, "Valorant:5"))
+        self.store.put_highlights(clip_hash, "Valorant:5", [0.9, 4.65])
+        render = self._download("render.mp4", b"r" * 50)
+        self.store.put_render(render_key=f"{clip_hash}:title", file_name=render)
+
+        self.assertEqual(self.store.get_highlights(clip_hash, "Valorant:5"),
+                         [0.9, 4.65])
+        self.assertTrue(os.path.exists(render))
+        with open(self.store.get_render(f"{clip_hash}:title"), "rb") as f:
+            self.assertEqual(f.read(), b"r" * 50)
+        self.assertEqual(self.store.get_hits("detection"), 1)
+
+    def test_least_recently_used_evicted(self) -> None:
+        for name in "abc":
+            self.store.put_clip(url=f"https://{name}/clip.mp4",
+                                file_name=self._download(f"{name}.mp4",
+                                                         name.encode() * 100))
+            time.sleep(0.01)
+            self.store.get_clip(url="https://a/clip.mp4")
+
+        self.assertIsNotNone(self.store.get_clip(url="https://a/clip.mp4"))
+        self.assertIsNone(self.store.get_clip(url="https://b/clip.mp4"))
+        self.assertIsNotNone(self.store.get_clip(url="https://c/clip.mp4"))
+
+    def test_clip_in_use_kept_after_eviction(self) -> None:
+        job_folder = os.path.join(self.directory.name, "clip_job")
+        os.makedirs(job_folder)
+        download = self._download("a.mp4", b"a" * 100)
+        self.store.put_clip(url="https://a/clip.mp4", file_name=download,
+                            keep=True)
+        clip = self.store.get_clip(url="https://a/clip.mp4",
+                                   job_folder=job_folder)
+        for name in "bc":
+            time.sleep(0.01)
+            self.store.put_clip(url=f"https://{name}/clip.mp4",
+                                file_name=self._download(f"{name}.mp4",
+                                                         name.encode() * 100))
+
+        self.assertIsNone(self.store.get_clip(url="https://a/clip.mp4"))
+        self.assertEqual(os.path.dirname(clip), job_folder)
+        for kept in (download, clip):
+            with open(kept, "rb") as f:
+                self.assertEqual(f.read(), b"a" * 100)
+
+    def test_reads_do_not_rewrite_manifest(self) -> None:
+        self.store.put_render(render_key="clip:title", game_title="Valorant",
+                              file_name=self._download("render.mp4",
+                                                       b"r" * 50))
+        with patch.object(locked_manifest.os, "replace",
+                          wraps=os.replace) as replace:
+            self.assertEqual(self.store.get_render_game("clip:title"),
+                             "Valorant")
+            self.assertEqual(self.store.get_hits("render"), 0)
+            for _ in range(2):
+                self.store.put_highlights("clip", "Valorant:5", [1.0])
+
+        self.assertEqual(replace.call_count, 1)
+
+    @patch.object(artifact_store, "MAX_HIGHLIGHTS", 2)
+    def test_least_recently_used_highlights_dropped(self) -> None:
+        for clip_hash in ("a", "b"):
+            self.store.put_highlights(clip_hash, "Valorant:5", [1.0])
+        self.store.get_highlights("a", "Valorant:5")
+        self.store.put_highlights("c", "Valorant:5", [2.0])
+
+        self.assertEqual(self.store.get_highlights("a", "Valorant:5"), [1.0])
+        self.assertIsNone(self.store.get_highlights("b", "Valorant:5"))
+        self.assertEqual(self.store.get_highlights("c", "Valorant:5"), [2.0])
+
+
+class TestSongCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.clip = make_test_clip(os.path.join(cls.directory.name, "clip.mp4"),
+                                  duration=3, fps=30, width=640, height=360)
+        cls.clip_prep = SimpleNamespace(
+            _song_name=make_test_song(os.path.join(cls.directory.name,
+                                                   "song 70$5.mp3"),
+                                      duration=80),
+            _song_start_time=70.5, _highlight_time=[1.0],
+            _facecam_clip="", _face_cam_start_time=0)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.directory.cleanup()
+
+    def test_track_starts_before_beat_drop(self) -> None:
+        song_cache = SongCache(
+            cache_folder=os.path.join(self.directory.name, "songs"))
+        cached_song, start = song_cache.get_track(
+            song_name=self.clip_prep._song_name, beat_drop=70.5)
+
+        self.assertEqual(start, 10.5)
+        self.assertAlmostEqual(ffmpeg_parse_infos(cached_song)["duration"],
+                               80 - 10.5, delta=0.1)
+
+    def test_render_stream_copies_song(self) -> None:
+        song_cache = SongCache(
+            cache_folder=os.path.join(self.directory.name, "render_songs"))
+        renderer = FfmpegRenderer(clip_prep=self.clip_prep,
+                                  song_cache=song_cache)
+        for attempt in range(2):
+            file_name = os.path.join(self.directory.name, f"{attempt}.mp4")
+            command = renderer._ffmpeg_command(clip_file=self.clip,
+                                               file_name=file_name, audio=True)
+            renderer.render(clip_file=self.clip, file_name=file_name,
+                            audio=True)
+
+        self.assertIn("copy", command)
+        self.assertEqual(song_cache.get_asset_cache().get_hits(), 3)
+        self.assertTrue(os.path.exists(file_name))
+
+
+class TestFacecamCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.clip = make_test_clip(os.path.join(cls.directory.name, "clip.mp4"),
+                                  duration=3, fps=30, width=640, height=360)
+        cls.facecam = make_test_clip(
+            os.path.join(cls.directory.name, "facecam 0$5.mp4"), duration=2,
+            fps=60, width=800, height=600, audio=True)
+        cls.facecam_cache = FacecamCache(
+            cache_folder=os.path.join(cls.directory.name, "facecam"))
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.directory.cleanup()
+
+    def test_cropped_to_visible_part(self) -> None:
+        prepared = self.facecam_cache.get_clip(facecam_clip=self.facecam,
+                                               width=540, height=960, fps=30)
+        infos = ffmpeg_parse_infos(prepared)
+
+        self.assertEqual(infos["video_size"], [540, 600])
+        self.assertEqual(infos["video_fps"], 30)
+        self.assertTrue(infos["audio_found"])
+
+    def test_render_matches_uncached(self) -> None:
+        clip_prep = SimpleNamespace(_facecam_clip=self.facecam,
+                                    _face_cam_start_time=0.5,
+                                    _highlight_time=[1.0])
+        renders = []
+        for facecam_cache in (None, self.facecam_cache):
+            file_name = os.path.join(self.directory.name,
+                                     f"{len(renders)}.mp4")
+            FfmpegRenderer(clip_prep=clip_prep,
+                           facecam_cache=facecam_cache).render(
+                clip_file=self.clip, file_name=file_name, audio=False)
+            renders.append([frame for _, frame in
+                            FrameSampler(file=file_name, interval=0.5)])
+
+        for uncached, cached in zip(*renders):
+            difference = np.abs(uncached.astype(float) - cached)
+            self.assertLess(difference.mean(), 2)
+
+
+class TestMediaIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.directory.name, "music")
+        os.makedirs(self.folder)
+        make_test_song(os.path.join(self.folder, "short 3$5.mp3"), duration=6)
+        make_test_song(os.path.join(self.folder, "long 10$0.mp3"), duration=40)
+        with open(os.path.join(self.folder, "README.md"), "w") as f:
+            f.write("Songs go here")
+        self.index_file = os.path.join(self.directory.name, "music.json")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def _index(self) -> MediaIndex:
+        return MediaIndex(folder=self.folder, index_file=self.index_file)
+
+    def test_entries(self) -> None:
+        entries = self._index().get_entries()
+
+        self.assertEqual(entries["short 3$5.mp3"]["start_time"], 3.5)
+        self.assertAlmostEqual(entries["long 10$0.mp3"]["duration"], 40,
+                               delta=0.1)
+        self.assertEqual(entries["long 10$0.mp3"]["codec"], "mp3")
+        self.assertIsNone(entries["README.md"]["start_time"])
+
+    def test_choose_rejects_short_songs(self) -> None:
+        media_index = self._index()
+        for _ in range(10):
+            self.assertEqual(media_index.choose(min_length=5),
+                             (os.path.join(self.folder, "long 10$0.mp3"),
+                              10.0))
+        self.assertIsNone(media_index.choose(min_length=60))
+
+    def test_incremental_refresh(self) -> None:
+        self._index()
+        os.remove(os.path.join(self.folder, "short 3$5.mp3"))
+        make_test_song(os.path.join(self.folder, "new 1$0.mp3"), duration=5)
+
+        with patch.object(MediaIndex, "_probe", autospec=True,
+                          side_effect=MediaIndex._probe) as mock_probe:
+            entries = self._index().get_entries()
+            self._index()
+
+        self.assertEqual(mock_probe.call_count, 1)
+        self.assertEqual(sorted(entries),
+                         ["README.md", "long 10$0.mp3", "new 1$0.mp3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,304 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+import numpy as np
+from benchmarks.bench_utils import make_test_clip, make_test_song
+from benchmarks.synthetic_clips import make_synthetic_clip
+from taquitobot.clip_commands.clip_cache.artifact_store import ArtifactStore
+from taquitobot.clip_commands.clip_downloader.clip_stream import ClipStream
+from taquitobot.clip_commands.clip_editor.clip_editor import ClipEditor
+from taquitobot.clip_commands.clip_editor.clip_editor_exceptions import RenderException
+from taquitobot.clip_commands.clip_editor.clip_prep import ClipPrepAbstract, ClipPrepAuto, ClipPrepValorant, ClipPrepLeagueOfLegends
+from taquitobot.clip_commands.clip_editor import clip_prep
+from taquitobot.clip_commands.clip_editor.frame_sampler import FrameSampler
+from taquitobot.clip_commands.clip_editor.game_detectors import get_detector
+from taquitobot.clip_commands.clip_editor.roi_prefilter import RoiPrefilter
+
+
+class TestFrameSampler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.clip = make_test_clip(os.path.join(cls.directory.name,
+                                               "clip.mp4"),
+                                  duration=3, fps=30, width=320, height=240)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.directory.cleanup()
+
+    def test_samples_at_interval(self) -> None:
+        frame_sampler = FrameSampler(file=self.clip, interval=0.25)
+        samples = list(frame_sampler)
+
+        self.assertEqual([t for t, _ in samples],
+                         [i * 0.25 for i in range(12)])
+        self.assertEqual(samples[0][1].shape, (240, 320, 3))
+        self.assertEqual(frame_sampler.get_frames_decoded(), 12)
+
+    def test_region_of_interest(self) -> None:
+        # Coordinates are given for 1080p and scaled to the 320x240 clip.
+        frame_sampler = FrameSampler(file=self.clip, interval=1,
+                                     crop=(905, 805, 1015, 920))
+        samples = list(frame_sampler)
+
+        self.assertEqual(len(samples), 3)
+        self.assertEqual(samples[0][1].shape, (115, 110, 3))
+
+    def test_window(self) -> None:
+        frame_sampler = FrameSampler(file=self.clip, interval=0.5, start=1,
+                                     duration=1)
+        self.assertEqual([t for t, _ in frame_sampler], [1.0, 1.5])
+
+    def test_stop_early(self) -> None:
+        frames = FrameSampler(file=self.clip, interval=0.25).frames()
+        next(frames)
+        frames.close()
+
+
+class TestRoiPrefilter(unittest.TestCase):
+
+    def test_unchanged_regions_reuse_result(self) -> None:
+        rng = np.random.default_rng(0)
+        static = rng.integers(0, 255, size=(115, 110, 3), dtype=np.uint8)
+        noisy = np.clip(static.astype(int) + rng.integers(-2, 3, static.shape),
+                        0, 255).astype(np.uint8)
+        changed = static.copy()
+        changed[40:70, 40:70] = 255
+        regions = [static, noisy, changed, changed]
+        tested = []
+
+        def is_highlight_frame(region):
+            tested.append(region)
+            return region is changed
+
+        prefilter = RoiPrefilter()
+        signatures = prefilter.signatures(np.stack(regions))
+        results = [prefilter.check(is_highlight_frame, region, signature)
+                   for region, signature in zip(regions, signatures)]
+
+        self.assertEqual(results, [False, False, True, True])
+        self.assertEqual(len(tested), 2)
+        self.assertEqual(prefilter.get_frames_skipped(), 2)
+        self.assertEqual(prefilter.get_frames_checked(), 2)
+
+    def test_batch_matches_single_frames(self) -> None:
+        rng = np.random.default_rng(0)
+        regions = rng.integers(0, 255, size=(8, 207, 55, 3), dtype=np.uint8)
+        detector = get_detector("leagueoflegends")
+
+        images, pixels = detector.measure(regions)
+        signatures = RoiPrefilter().signatures(regions)
+
+        for region, image, count, signature in zip(regions, images, pixels,
+                                                   signatures):
+            np.testing.assert_array_equal(image, detector._image(region))
+            self.assertEqual(count, np.count_nonzero(image))
+            np.testing.assert_allclose(
+                signature, region[:200, :48].reshape(
+                    8, 25, 8, 6, 3).mean(axis=(1, 3)), rtol=1e-6)
+
+
+@patch.object(ClipPrepAbstract, "_choose_random_song", return_value="")
+@patch.object(ClipPrepAbstract, "_choose_random_facecam_clip",
+              return_value="facecam.mp4")
+class TestHighlightSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.valorant_clip = make_synthetic_clip(
+            os.path.join(cls.directory.name, "valorant.mp4"), "valorant",
+            [1.1, 5.0], duration=8)
+        cls.league_clip = make_synthetic_clip(
+            os.path.join(cls.directory.name, "league.mp4"),
+            "leagueoflegends", [1.0, 3.0, 6.6], duration=8)
+        cls.faststart_clip = make_synthetic_clip(
+            os.path.join(cls.directory.name, "faststart.mp4"), "valorant",
+            [1.1, 5.0], duration=8, faststart=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.directory.cleanup()
+
+    def _dense(self, clip_prep_class):
+        class DenseClipPrep(clip_prep_class):
+            def _find_highlight_time(self, file):
+                self._coarse_interval = None
+                return super()._find_highlight_time(file)
+        return DenseClipPrep
+
+    def test_valorant_highlights(self, *mocks) -> None:
+        clip_prep = ClipPrepValorant(video_file=self.valorant_clip)
+        self.assertEqual(clip_prep._highlight_time, [1.25 - 0.35, 5.0 - 0.35])
+
+    def test_league_highlights(self, *mocks) -> None:
+        # The highlight at 3 s is within five seconds of the first.
+        clip_prep = ClipPrepLeagueOfLegends(video_file=self.league_clip)
+        self.assertEqual(clip_prep._highlight_time, [1.0, 6.75])
+
+    def test_coarse_to_fine_matches_dense(self, *mocks) -> None:
+        for clip_prep_class, clip in ((ClipPrepValorant, self.valorant_clip),
+                                      (ClipPrepLeagueOfLegends,
+                                       self.league_clip)):
+            coarse = clip_prep_class(video_file=clip)
+            dense = self._dense(clip_prep_class)(video_file=clip)
+            self.assertEqual(coarse._highlight_time, dense._highlight_time)
+            self.assertLessEqual(coarse.get_frames_analysed(),
+                            dense.get_frames_analysed())
+
+    def test_prefilter_skips_static_frames(self, *mocks) -> None:
+        for clip_prep_class, clip in ((ClipPrepValorant, self.valorant_clip),
+                                      (ClipPrepLeagueOfLegends,
+                                       self.league_clip)):
+            prefiltered = clip_prep_class(video_file=clip)
+            with patch.object(clip_prep, "RoiPrefilter",
+                              lambda: RoiPrefilter(threshold=None)):
+                unfiltered = clip_prep_class(video_file=clip)
+
+            self.assertEqual(prefiltered._highlight_time,
+                             unfiltered._highlight_time)
+            self.assertGreater(prefiltered.get_skip_rate(), 0)
+            self.assertEqual(unfiltered.get_frames_skipped(), 0)
+
+    def test_game_identified_from_hud(self, *mocks) -> None:
+        league = ClipPrepLeagueOfLegends(video_file=self.league_clip)
+        # The titles as outplayed_resolver parses them from the page
+        for game_title in ("Valorant", "", "LeagueofLegends"):
+            clip_prep = ClipPrepAuto(video_file=self.league_clip,
+                                     game_title=game_title)
+            self.assertEqual(clip_prep.get_game_title(), "LeagueofLegends")
+            self.assertEqual(clip_prep._highlight_time, league._highlight_time)
+
+        clip_prep = ClipPrepAuto(video_file=self.valorant_clip,
+                                 game_title="Valorant")
+        self.assertEqual(clip_prep._trusted_detectors, 1)
+        self.assertEqual(clip_prep.get_detector().get_game(), "Valorant")
+        self.assertEqual(clip_prep.get_game_title(), "Valorant")
+        self.assertEqual(clip_prep._highlight_time, [1.25 - 0.35, 5.0 - 0.35])
+
+    def test_game_without_detector_keeps_its_title(self, *mocks) -> None:
+        clip_prep = ClipPrepAuto(video_file=self.valorant_clip,
+                                 game_title="LethalCompany")
+        self.assertEqual(clip_prep.get_game_title(), "LethalCompany")
+
+    def test_stops_at_first_without_facecam(self, mock_facecam,
+                                            mock_song) -> None:
+        mock_facecam.return_value = ""
+        clip_prep = ClipPrepValorant(video_file=self.valorant_clip)
+        self.assertEqual(clip_prep._highlight_time, [1.25 - 0.35])
+
+    def test_stored_highlights_reused(self, *mocks) -> None:
+        artifact_store = ArtifactStore(
+            store_folder=os.path.join(self.directory.name, "artifacts"))
+        first = ClipPrepValorant(video_file=self.valorant_clip,
+                                 artifact_store=artifact_store)
+        second = ClipPrepValorant(video_file=self.valorant_clip,
+                                  artifact_store=artifact_store)
+
+        self.assertEqual(second._highlight_time, first._highlight_time)
+        self.assertEqual(second.get_frames_analysed(), 0)
+        self.assertEqual(artifact_store.get_hits("detection"), 1)
+
+    def _download_slowly(self, clip: str, name: str) -> ClipStream:
+        video_stream = ClipStream(
+            file_name=os.path.join(self.directory.name, name))
+
+        def download():
+            part_file = video_stream.get_file_name() + ".part"
+            with open(clip, "rb") as source, open(part_file, "wb") as f:
+                for chunk in iter(lambda: source.read(64 * 1024), b""):
+                    f.write(chunk)
+                    f.flush()
+                    video_stream.progress(f.tell())
+                    time.sleep(0.005)
+            os.replace(part_file, video_stream.get_file_name())
+            video_stream.finish()
+
+        threading.Thread(target=download, daemon=True).start()
+        return video_stream
+
+    def test_highlights_found_while_downloading(self, *mocks) -> None:
+        downloaded = ClipPrepValorant(video_file=self.valorant_clip)
+        for clip in (self.faststart_clip, self.valorant_clip):
+            name = f"streamed_{os.path.basename(clip)}"
+            video_stream = self._download_slowly(clip, name)
+            streamed = ClipPrepValorant(video_file=video_stream.get_file_name(),
+                                        video_stream=video_stream)
+
+            self.assertEqual(video_stream.is_streamable(),
+                             clip == self.faststart_clip)
+            self.assertEqual(streamed._highlight_time,
+                             downloaded._highlight_time)
+            self.assertTrue(os.path.exists(video_stream.get_file_name()))
+
+    @patch("taquitobot.clip_commands.clip_editor.clip_prep.MIN_SEGMENT_LENGTH",
+           2)
+    @patch("os.cpu_count", return_value=4)
+    def test_parallel_matches_sequential(self, *mocks) -> None:
+        # Four 2 second segments so highlights straddle the boundaries.
+        for clip_prep_class, clip in ((ClipPrepValorant, self.valorant_clip),
+                                      (ClipPrepLeagueOfLegends,
+                                       self.league_clip)):
+            sequential = clip_prep_class(video_file=clip)
+            parallel = clip_prep_class(video_file=clip, parallel=True)
+            self.assertEqual(parallel._highlight_time,
+                             sequential._highlight_time)
+
+
+class TestClipEditor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.clip = make_test_clip(os.path.join(cls.directory.name, "clip.mp4"),
+                                  duration=3, fps=30, width=1280, height=720,
+                                  audio=True)
+        facecam = make_test_clip(os.path.join(cls.directory.name,
+                                              "facecam.mp4"),
+                                 duration=1.5, fps=30, width=320, height=240,
+                                 audio=True)
+        cls.clip_prep = SimpleNamespace(
+            _song_name=make_test_song(os.path.join(cls.directory.name,
+                                                   "song.mp3"), duration=10),
+            _song_start_time=5, _highlight_time=[1.0, 2.0],
+            _facecam_clip=facecam, _face_cam_start_time=1.0)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.directory.cleanup()
+
+    def _render(self, backend: str) -> str:
+        clip_editor = ClipEditor(clip_prep=self.clip_prep, backend=backend)
+        return clip_editor.edit_and_save_video(
+            clip_file=self.clip, game_title="Valorant",
+            video_title=os.path.join(self.directory.name, backend))
+
+    def test_ffmpeg_matches_moviepy(self) -> None:
+        renders = [FrameSampler(file=self._render(backend), interval=0.5)
+                   for backend in ("moviepy", "ffmpeg")]
+        moviepy_frames, ffmpeg_frames = [list(render) for render in renders]
+
+        self.assertAlmostEqual(renders[1].get_duration(),
+                               renders[0].get_duration(), places=1)
+        self.assertEqual(len(ffmpeg_frames), len(moviepy_frames))
+        for (_, moviepy_frame), (_, ffmpeg_frame) in zip(moviepy_frames,
+                                                         ffmpeg_frames):
+            self.assertEqual(ffmpeg_frame.shape, (960, 540, 3))
+            difference = np.abs(moviepy_frame.astype(float) - ffmpeg_frame)
+            self.assertLess(difference.mean(), 4)
+
+    def test_falls_back_to_moviepy(self) -> None:
+        with patch("taquitobot.clip_commands.clip_editor.clip_editor."
+                   "FfmpegRenderer.render", side_effect=RenderException):
+            file_name = self._render("ffmpeg")
+        self.assertTrue(os.path.exists(file_name))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import AsyncMock, patch
+from benchmarks.synthetic_clips import make_synthetic_clip
+from taquitobot.clip_commands.clip_cache.artifact_store import ArtifactStore
+from taquitobot.clip_commands.clip_editor.clip_editor import ClipEditor
+from taquitobot.clip_commands.clip_editor.clip_prep import ClipPrepAbstract
+from taquitobot.clip_commands.clip_jobs import clip_batch, clip_job_executor, workspace
+from taquitobot.clip_commands.clip_jobs.clip_job_executor import ClipJobExecutor
+from taquitobot.clip_commands.clip_jobs.workspace import Workspace
+
+
+class TestClipJobExecutor(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.channel = AsyncMock()
+        self.release = threading.Event()
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+        self.directory = tempfile.TemporaryDirectory()
+        self.workspace = Workspace(scratch_folder=self.directory.name)
+
+    def tearDown(self) -> None:
+        self.release.set()
+        self.directory.cleanup()
+
+    def _slow_prepare(self, file_name, game_title, video_title, job_folder):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.release.wait(5)
+        with self.lock:
+            self.running -= 1
+        return "edited.mp4", "valorant"
+
+    def _make_executor(self, max_jobs_in_flight):
+        return ClipJobExecutor(max_jobs_in_flight=max_jobs_in_flight,
+                               process_pool=ThreadPoolExecutor(4),
+                               thread_pool=ThreadPoolExecutor(4),
+                               workspace=self.workspace)
+
+    @patch.object(clip_job_executor, "upload_clip",
+                  return_value="https://youtube.com/shorts/test")
+    @patch.object(clip_job_executor, "_download_clip",
+                  return_value=("clip.mp4", "valorant", "title"))
+    async def test_submit_returns_immediately(self, mock_download,
+                                              mock_upload) -> None:
+        executor = self._make_executor(max_jobs_in_flight=1)
+        with patch.object(clip_job_executor, "_prepare_and_edit_clip",
+                          side_effect=self._slow_prepare):
+            job = executor.submit("https://outplayed.tv/media/test",
+                                  self.channel)
+            self.assertFalse(job.done())
+            self.release.set()
+            video_link = await asyncio.wait_for(job, 5)
+
+        self.assertEqual(video_link, "https://youtube.com/shorts/test")
+        self.channel.send.assert_awaited_with(
+            "Uploaded clip https://youtube.com/shorts/test")
+        executor.shutdown()
+
+    @patch.object(clip_job_executor, "upload_clip", return_value="link")
+    @patch.object(clip_job_executor, "_download_clip",
+                  return_value=("clip.mp4", "valorant", "title"))
+    async def test_jobs_in_flight_are_capped(self, mock_download,
+                                             mock_upload) -> None:
+        executor = self._make_executor(max_jobs_in_flight=2)
+        with patch.object(clip_job_executor, "_prepare_and_edit_clip",
+                          side_effect=self._slow_prepare):
+            jobs = [executor.submit("https://outplayed.tv/media/test",
+                                    self.channel) for _ in range(5)]
+            await asyncio.sleep(0.2)
+            self.assertEqual(executor.jobs_in_flight(), 5)
+            self.release.set()
+            await asyncio.wait_for(asyncio.gather(*jobs), 5)
+
+        self.assertEqual(self.max_running, 2)
+        self.assertEqual(executor.jobs_in_flight(), 0)
+        executor.shutdown()
+
+    async def test_job_folders_unique_and_removed(self) -> None:
+        job_folders = []
+
+        def download(discord_message, job_folder):
+            job_folders.append(job_folder)
+            with open(os.path.join(job_folder, "clip.mp4"), "wb") as f:
+                f.write(b"clip")
+            if len(job_folders) == 2:
+                raise ConnectionError("outplayed is down")
+            return os.path.join(job_folder, "clip.mp4"), "valorant", "title"
+
+        executor = self._make_executor(max_jobs_in_flight=2)
+        with patch.object(clip_job_executor, "_download_clip",
+                          side_effect=download), \
+             patch.object(clip_job_executor, "_prepare_and_edit_clip",
+                          return_value=("edited.mp4", "valorant")), \
+             patch.object(clip_job_executor, "upload_clip",
+                          return_value="link"):
+            results = await asyncio.gather(*[
+                executor.submit("https://outplayed.tv/media/test",
+                                self.channel) for _ in range(3)])
+
+        self.assertEqual(sorted(results), ["", "link", "link"])
+        self.assertEqual(len(set(job_folders)), 3)
+        self.assertEqual(os.listdir(self.directory.name), [])
+        self.assertEqual(self.workspace.get_jobs_active(), 0)
+        executor.shutdown()
+
+    @patch.object(clip_job_executor, "upload_clip", return_value="link")
+    @patch.object(clip_job_executor, "_download_clip")
+    @patch.object(clip_job_executor, "_resolve_clip",
+                  return_value=("https://cdn.test/clip.mp4", "valorant",
+                                "title", None))
+    @patch.object(clip_job_executor, "_stream_and_edit_clip",
+                  return_value=("edited.mp4", "valorant"))
+    async def test_streaming_job_downloads_and_edits_at_once(
+            self, mock_stream, mock_resolve, mock_download,
+            mock_upload) -> None:
+        executor = ClipJobExecutor(max_jobs_in_flight=1,
+                                   process_pool=ThreadPoolExecutor(1),
+                                   thread_pool=ThreadPoolExecutor(1),
+                                   workspace=self.workspace, streaming=True)
+        video_link = await executor.submit("https://outplayed.tv/media/test",
+                                           self.channel)
+
+        self.assertEqual(video_link, "link")
+        mock_download.assert_not_called()
+        mock_resolve.assert_called_once()
+        self.assertEqual(mock_stream.call_args.args[:3],
+                         ("https://cdn.test/clip.mp4", "valorant", "title"))
+        mock_upload.assert_called_once_with("edited.mp4", "title",
+                                            "valorant")
+        executor.shutdown()
+
+    @patch.object(clip_job_executor, "upload_clip", return_value="link")
+    @patch.object(clip_job_executor, "_resolve_clip",
+                  return_value=("https://cdn.test/clip.mp4", "valorant",
+                                "title", "stored.mp4"))
+    @patch.object(clip_job_executor, "_stream_and_edit_clip")
+    @patch.object(clip_job_executor, "_prepare_and_edit_clip",
+                  return_value=("edited.mp4", "valorant"))
+    async def test_streaming_job_edits_stored_clip(
+            self, mock_prepare, mock_stream, mock_resolve,
+            mock_upload) -> None:
+        executor = ClipJobExecutor(max_jobs_in_flight=1,
+                                   process_pool=ThreadPoolExecutor(1),
+                                   thread_pool=ThreadPoolExecutor(1),
+                                   workspace=self.workspace, streaming=True)
+        video_link = await executor.submit("https://outplayed.tv/media/test",
+                                           self.channel)
+
+        self.assertEqual(video_link, "link")
+        mock_stream.assert_not_called()
+        self.assertEqual(mock_prepare.call_args.args[:3],
+                         ("stored.mp4", "valorant", "title"))
+        executor.shutdown()
+
+    @patch.object(clip_job_executor, "_download_clip",
+                  side_effect=ConnectionError("outplayed is down"))
+    async def test_failed_job_reports_error(self, mock_download) -> None:
+        executor = self._make_executor(max_jobs_in_flight=1)
+        video_link = await executor.submit("https://outplayed.tv/media/test",
+                                           self.channel)
+
+        self.assertEqual(video_link, "")
+        self.channel.send.assert_awaited_with("Error processing clip.")
+        executor.shutdown()
+
+    @patch.object(clip_job_executor, "upload_clip", return_value="link")
+    @patch.object(clip_job_executor, "_download_clip",
+                  return_value=("clip.mp4", "valorant", "title"))
+    @patch.object(clip_job_executor, "_prepare_and_edit_clip",
+                  return_value=("edited.mp4", "valorant"))
+    async def test_scratch_folder_work_off_the_loop(self, mock_prepare,
+                                                    mock_download,
+                                                    mock_upload) -> None:
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        def slow_walk(folder):
+            time.sleep(0.2)
+            return 0
+
+        executor = self._make_executor(max_jobs_in_flight=1)
+        beating = asyncio.create_task(heartbeat())
+        with patch.object(self.workspace, "_folder_size",
+                          side_effect=slow_walk):
+            video_link = await executor.submit(
+                "https://outplayed.tv/media/test", self.channel)
+        beating.cancel()
+
+        self.assertEqual(video_link, "link")
+        self.assertGreater(ticks, 20)
+        self.assertEqual(os.listdir(self.directory.name), [])
+        executor.shutdown()
+
+
+class TestPrepareAndEditClip(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.store_folder = os.path.join(self.directory.name, "artifacts")
+        self.clip = os.path.join(self.directory.name, "clip.mp4")
+        with open(self.clip, "wb") as f:
+            f.write(b"clip")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def _render(self, clip_file, game_title, video_title, output_folder):
+        edited_clip = os.path.join(
+            output_folder, f"{video_title} {game_title} "
+                           f"tiktok_youtube_shorts.mp4")
+        with open(edited_clip, "wb") as f:
+            f.write(b"render")
+        return edited_clip
+
+    def test_render_reused_for_repost(self) -> None:
+        with patch.object(clip_job_executor, "ArtifactStore",
+                          lambda: ArtifactStore(
+                              store_folder=self.store_folder)), \
+             patch.object(clip_job_executor, "ClipPrepAuto", **{
+                 "return_value.get_game_title.return_value": "Valorant"}), \
+             patch.object(clip_job_executor.ClipEditor,
+                          "edit_and_save_video",
+                          side_effect=self._render) as mock_edit:
+            # outplayed.tv got the game wrong, the HUD says Valorant
+            first, first_game = clip_job_executor._prepare_and_edit_clip(
+                self.clip, "LeagueofLegends", "title", self.directory.name)
+            os.remove(first)
+            second, second_game = clip_job_executor._prepare_and_edit_clip(
+                self.clip, "LeagueofLegends", "title", self.directory.name)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first_game, "Valorant")
+        self.assertEqual(second_game, "Valorant")
+        self.assertEqual(mock_edit.call_count, 1)
+        with open(second, "rb") as f:
+            self.assertEqual(f.read(), b"render")
+
+
+class TestWorkspace(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.workspace = Workspace(scratch_folder=self.directory.name,
+                                   max_bytes=2500)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def _leave_behind(self, name: str, size: int, mtime: float) -> str:
+        job_folder = os.path.join(self.directory.name, name)
+        os.makedirs(job_folder)
+        with open(os.path.join(job_folder, "clip.mp4"), "wb") as f:
+            f.write(b"x" * size)
+        os.utime(job_folder, (mtime, mtime))
+        return job_folder
+
+    def test_idle_folders_evicted_least_recently_used_first(self) -> None:
+        oldest = self._leave_behind("clip_job_old", 1000, mtime=1)
+        newest = self._leave_behind("clip_job_new", 1000, mtime=2)
+        other = self._leave_behind("songs", 1000, mtime=0)
+
+        with self.workspace.job() as job_folder:
+            self.assertFalse(os.path.exists(oldest))
+            self.assertTrue(os.path.exists(newest))
+            self.assertTrue(os.path.exists(other))
+            with open(os.path.join(job_folder, "clip.mp4"), "wb") as f:
+                f.write(b"x" * 1000)
+            with self.workspace.job():
+                self.assertTrue(os.path.exists(job_folder))
+                self.assertFalse(os.path.exists(newest))
+            self.assertEqual(self.workspace.get_usage(), 2000)
+
+        self.assertFalse(os.path.exists(job_folder))
+        self.assertEqual(self.workspace.get_usage(), 1000)
+
+    def test_budget_capped_to_file_system(self) -> None:
+        disk = shutil.disk_usage(self.directory.name)._replace(total=1000)
+        with patch.object(workspace.shutil, "disk_usage", return_value=disk):
+            small = Workspace(scratch_folder=os.path.join(
+                self.directory.name, "not", "made"))
+        self.assertEqual(small.get_max_bytes(), 500)
+
+    def test_small_shm_not_used(self) -> None:
+        shm = shutil.disk_usage(self.directory.name)._replace(
+            total=64 * 1024 * 1024)
+        with patch.object(workspace.shutil, "disk_usage", return_value=shm):
+            self.assertEqual(workspace._default_scratch_folder(),
+                             os.path.join(tempfile.gettempdir(),
+                                          "taquitobot"))
+
+
+class TestClipBatch(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.clips = os.path.join(self.directory.name, "clips")
+        self.output_folder = os.path.join(self.directory.name, "shorts")
+        os.makedirs(self.clips)
+        os.makedirs(self.output_folder)
+        make_synthetic_clip(os.path.join(self.clips, "ace.mp4"),
+                            "leagueoflegends", [1.0], duration=3)
+        make_synthetic_clip(os.path.join(self.clips, "clutch.mp4"),
+                            "valorant", [1.1], duration=3)
+        with open(ClipEditor.get_edited_file_name(
+                video_title="clutch", game_title="Valorant",
+                output_folder=self.output_folder), "wb") as f:
+            f.write(b"render")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def _render(self, clip_file, game_title, video_title, output_folder):
+        edited_clip = ClipEditor.get_edited_file_name(
+            video_title=video_title, game_title=game_title,
+            output_folder=output_folder)
+        with open(edited_clip, "wb") as f:
+            f.write(b"render")
+        return edited_clip
+
+    def test_batch_skips_edited_clips_and_reports(self) -> None:
+        report_file = os.path.join(self.directory.name, "report.jsonl")
+        with patch.object(clip_batch, "ArtifactStore",
+                          lambda: ArtifactStore(store_folder=os.path.join(
+                              self.directory.name, "artifacts"))), \
+             patch.object(ClipPrepAbstract, "_choose_random_song",
+                          return_value=""), \
+             patch.object(ClipPrepAbstract, "_choose_random_facecam_clip",
+                          return_value=""), \
+             patch.object(ClipEditor, "edit_and_save_video",
+                          side_effect=self._render):
+            clip_batch.run_batch(
+                clips=clip_batch.find_clips(source=self.clips),
+                output_folder=self.output_folder, report_file=report_file,
+                pool=ThreadPoolExecutor(2))
+
+        with open(report_file) as f:
+            reports = {report["title"]: report for report in map(json.loads, f)}
+        self.assertEqual(reports["clutch"]["status"], "skipped")
+        self.assertEqual(reports["ace"]["status"], "done")
+        self.assertEqual(reports["ace"]["game"], "LeagueofLegends")
+        self.assertEqual(reports["ace"]["highlights"], [1.0])
+        self.assertTrue(os.path.exists(reports["ace"]["output"]))
+        self.assertEqual(set(reports["ace"]["seconds"]),
+                         {"detection", "render", "total"})
+
+    def test_dead_worker_reported_as_failed(self) -> None:
+        report_file = os.path.join(self.directory.name, "report.jsonl")
+        with patch.object(clip_batch, "process_clip",
+                          side_effect=BrokenProcessPool("worker died")):
+            reports = clip_batch.run_batch(
+                clips=clip_batch.find_clips(source=self.clips),
+                output_folder=self.output_folder, report_file=report_file,
+                pool=ThreadPoolExecutor(2))
+
+        self.assertEqual([(report["title"], report["status"])
+                          for report in reports],
+                         [("clutch", "skipped"), ("ace", "failed")])
+        self.assertEqual(reports[1]["error"],
+                         "BrokenProcessPool: worker died")
+        with open(report_file) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from taquitobot.clip_commands.clip_jobs.clip_job_executor import _run_with_metrics
+from taquitobot.clip_commands.clip_metrics.clip_stats_commands import format_summary
+from taquitobot.clip_commands.clip_metrics.pipeline_metrics import PipelineMetrics, get_metrics
+
+
+def _fail_stage(seconds: float) -> str:
+    get_metrics().observe(stage="render", seconds=seconds)
+    raise RuntimeError("render failed")
+
+
+def _record_stage(seconds: float) -> str:
+    get_metrics().observe(stage="render", seconds=seconds)
+    get_metrics().add(counter="bytes", stage="render", amount=1024)
+    return "edited.mp4"
+
+
+class TestPipelineMetrics(unittest.TestCase):
+
+    def test_percentiles_of_rolling_window(self) -> None:
+        metrics = PipelineMetrics(window=100)
+        for seconds in range(1, 201):
+            metrics.observe(stage="render", seconds=seconds)
+        metrics.add(counter="frames", stage="highlight_search", amount=30)
+
+        summary = metrics.get_summary()
+        self.assertEqual(summary["render"]["count"], 200)
+        self.assertEqual(summary["render"]["p50"], 150)
+        self.assertEqual(summary["render"]["p95"], 195)
+        self.assertEqual(summary["render"]["p99"], 199)
+        self.assertEqual(summary["highlight_search"], {"frames": 30})
+        self.assertIn("highlight_search", format_summary(summary))
+
+    def test_worker_metrics_merged(self) -> None:
+        metrics = PipelineMetrics()
+        # Recorded by the parent before the fork, not by the worker
+        get_metrics().observe(stage="render", seconds=10.0)
+        self.addCleanup(get_metrics().drain)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            for seconds in (1.0, 3.0):
+                result, drained = pool.submit(_run_with_metrics,
+                                              _record_stage, seconds).result()
+                metrics.merge(drained)
+
+        self.assertEqual(result, "edited.mp4")
+        summary = metrics.get_summary()["render"]
+        self.assertEqual(summary["count"], 2)
+        self.assertEqual(summary["sum"], 4.0)
+        self.assertEqual(summary["bytes"], 2048)
+
+    def test_failed_stage_metrics_kept(self) -> None:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            with self.assertRaises(RuntimeError) as context:
+                pool.submit(_run_with_metrics, _fail_stage, 2.0).result()
+
+        metrics = PipelineMetrics()
+        metrics.merge(context.exception.drained_metrics)
+        self.assertEqual(metrics.get_summary()["render"]["sum"], 2.0)
+
+    def test_prometheus_export(self) -> None:
+        metrics = PipelineMetrics()
+        with metrics.timer("download"):
+            pass
+        metrics.add(counter="bytes", stage="download", amount=10)
+        server = metrics.serve_prometheus(port=0)
+        try:
+            with urllib.request.urlopen(
+                    f"http://127.0.0.1:{server.server_port}/metrics") as r:
+                text = r.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertIn('clip_stage_seconds{stage="download",quantile="0.99"}',
+                      text)
+        self.assertIn('clip_stage_seconds_count{stage="download"} 1', text)
+        self.assertIn('clip_stage_bytes_total{stage="download"} 10', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,272 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import requests
+from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+from benchmarks.fake_youtube import FakeYouTubeServer
+from taquitobot.clip_commands.clip_uploader import clip_uploader
+from taquitobot.clip_commands.clip_uploader import youtube_api_uploader
+from taquitobot.clip_commands.clip_uploader.chrome_driver_pool import ChromeDriverPool
+from taquitobot.clip_commands.clip_uploader.clip_uploader import YouTubeUploader
+from taquitobot.clip_commands.clip_uploader.clip_uploader_exceptions import UploadException
+from taquitobot.clip_commands.clip_uploader.youtube_api_uploader import YouTubeApiUploader
+
+CHUNK = 256 * 1024
+VIDEO_BYTES = os.urandom(4 * CHUNK + 123)
+CREDENTIALS = {"YouTube_client_id": "id", "YouTube_client_secret": "secret",
+               "YouTube_refresh_token": "refresh"}
+
+
+@patch.dict(os.environ, CREDENTIALS)
+class TestYouTubeApiUploader(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.video = os.path.join(self.directory.name, "edited.mp4")
+        with open(self.video, "wb") as f:
+            f.write(VIDEO_BYTES)
+        self.checkpoints = os.path.join(self.directory.name, "checkpoints")
+        self.server = FakeYouTubeServer().__enter__()
+
+    def tearDown(self) -> None:
+        self.server.__exit__()
+        self.directory.cleanup()
+
+    def _make_uploader(self, **kwargs) -> YouTubeApiUploader:
+        return YouTubeApiUploader(
+            video_title="ace", game_title="valorant", chunk_size=CHUNK,
+            backoff_base=0, upload_url=self.server.get_upload_url(),
+            token_url=self.server.get_token_url(),
+            checkpoint_folder=self.checkpoints, **kwargs)
+
+    def _puts(self) -> list[str]:
+        return [content_range for method, _, content_range
+                in self.server.requests_seen if method == "PUT"]
+
+    def test_upload_in_chunks(self) -> None:
+        link = self._make_uploader().upload_to_youtube(self.video)
+
+        video_id = link.rpartition("/")[2]
+        video = self.server.videos[video_id]
+        self.assertEqual(bytes(video["data"]), VIDEO_BYTES)
+        self.assertTrue(video["metadata"]["snippet"]["title"]
+                        .startswith("ace #valorant"))
+        self.assertEqual(len(self._puts()), 5)
+        self.assertEqual(os.listdir(self.checkpoints), [])
+
+    def test_retries_and_resumes_from_confirmed_offset(self) -> None:
+        self.server.fail_next = [503, 500]
+        self.server.truncate_next = [1000]
+        link = self._make_uploader().upload_to_youtube(self.video)
+
+        video = self.server.videos[link.rpartition("/")[2]]
+        self.assertEqual(bytes(video["data"]), VIDEO_BYTES)
+        self.assertIn(f"bytes 1000-{1000 + CHUNK - 1}/{len(VIDEO_BYTES)}",
+                      self._puts())
+
+    def test_resumes_interrupted_upload_from_checkpoint(self) -> None:
+        uploader = self._make_uploader(max_retries=0)
+        request = uploader._request
+        chunks_sent = []
+
+        def interrupted_request(method, url, headers, **kwargs):
+            if method == "PUT" and len(chunks_sent) == 2:
+                raise requests.ConnectionError("connection lost")
+            chunks_sent.append(method)
+            return request(method, url, headers, **kwargs)
+
+        with patch.object(uploader, "_request",
+                          side_effect=interrupted_request):
+            with self.assertRaises(UploadException):
+                uploader.upload_to_youtube(self.video)
+        self.assertEqual(len(os.listdir(self.checkpoints)), 1)
+
+        self.server.requests_seen.clear()
+        link = self._make_uploader().upload_to_youtube(self.video)
+
+        video = self.server.videos[link.rpartition("/")[2]]
+        self.assertEqual(bytes(video["data"]), VIDEO_BYTES)
+        self.assertEqual(self._puts()[0], f"bytes */{len(VIDEO_BYTES)}")
+        self.assertEqual(self._puts()[1],
+                         f"bytes {CHUNK}-{2 * CHUNK - 1}/{len(VIDEO_BYTES)}")
+        self.assertNotIn("POST", [method for method, path, _
+                                  in self.server.requests_seen
+                                  if path != "/token"])
+
+    def test_resumes_same_video_from_another_folder(self) -> None:
+        uploader = self._make_uploader(max_retries=0)
+        request = uploader._request
+
+        def interrupted_request(method, url, headers, **kwargs):
+            if method == "PUT":
+                raise requests.ConnectionError("connection lost")
+            return request(method, url, headers, **kwargs)
+
+        with patch.object(uploader, "_request",
+                          side_effect=interrupted_request):
+            with self.assertRaises(UploadException):
+                uploader.upload_to_youtube(self.video)
+
+        other_folder = os.path.join(self.directory.name, "clip_job_retry")
+        os.makedirs(other_folder)
+        copy = shutil.copy(self.video, other_folder)
+        self.server.requests_seen.clear()
+        link = self._make_uploader().upload_to_youtube(copy)
+
+        video = self.server.videos[link.rpartition("/")[2]]
+        self.assertEqual(bytes(video["data"]), VIDEO_BYTES)
+        self.assertEqual(self._puts()[0], f"bytes */{len(VIDEO_BYTES)}")
+        self.assertEqual(os.listdir(self.checkpoints), [])
+
+    def test_stale_checkpoints_removed(self) -> None:
+        os.makedirs(self.checkpoints)
+        stale = os.path.join(self.checkpoints, "stale.json")
+        recent = os.path.join(self.checkpoints, "recent.json")
+        for checkpoint in (stale, recent):
+            with open(checkpoint, "w") as f:
+                f.write("{}")
+        expired = time.time() - youtube_api_uploader.CHECKPOINT_MAX_AGE - 1
+        os.utime(stale, (expired, expired))
+
+        self._make_uploader().upload_to_youtube(self.video)
+
+        self.assertEqual(os.listdir(self.checkpoints), ["recent.json"])
+
+    def test_expired_sessions_count_as_retries(self) -> None:
+        self.server.expire_sessions = True
+        with self.assertRaises(UploadException):
+            self._make_uploader(max_retries=2).upload_to_youtube(self.video)
+
+        sessions = [path for method, path, _ in self.server.requests_seen
+                    if method == "POST" and path != "/token"]
+        self.assertEqual(len(sessions), 3)
+
+    def test_rejected_upload_raises(self) -> None:
+        self.server.fail_next = [400]
+        with self.assertRaises(UploadException):
+            self._make_uploader().upload_to_youtube(self.video)
+
+
+class FakeElement:
+    """
+    Stands in for a YouTube Studio element, the done button goes stale once
+    it has been clicked.
+    """
+
+    def __init__(self, xpath: str) -> None:
+        self.xpath = xpath
+        self.clicked = False
+
+    def is_displayed(self) -> bool:
+        return True
+
+    def is_enabled(self) -> bool:
+        if self.clicked and "done-button" in self.xpath:
+            raise StaleElementReferenceException()
+        return True
+
+    def get_attribute(self, name: str) -> str | None:
+        if name == "href":
+            return "https://youtube.com/shorts/abc"
+        return None
+
+    def click(self) -> None:
+        self.clicked = True
+
+    def clear(self) -> None:
+        pass
+
+    def send_keys(self, keys: str) -> None:
+        pass
+
+
+class FakeDriver:
+
+    def __init__(self, profile_folder: str) -> None:
+        self.profile_folder = profile_folder
+        self.alive = True
+        self.quit_called = False
+        self.elements = {}
+
+    @property
+    def current_url(self) -> str:
+        if not self.alive:
+            raise WebDriverException("chrome not reachable")
+        return "https://www.youtube.com"
+
+    @property
+    def window_handles(self) -> list[str]:
+        return ["main"]
+
+    def get(self, url: str) -> None:
+        pass
+
+    def find_element(self, by: str, xpath: str) -> FakeElement:
+        return self.elements.setdefault(xpath, FakeElement(xpath))
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+class TestChromeDriverPool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.drivers = []
+        self.pool = ChromeDriverPool(recycle_after=2,
+                                     driver_factory=self._start_driver)
+
+    def _start_driver(self, profile_folder: str) -> FakeDriver:
+        self.drivers.append(FakeDriver(profile_folder))
+        return self.drivers[-1]
+
+    def test_driver_reused_and_recycled(self) -> None:
+        for _ in range(3):
+            with self.pool.driver():
+                pass
+
+        self.assertEqual(self.pool.get_drivers_started(), 2)
+        self.assertTrue(self.drivers[0].quit_called)
+        self.assertFalse(self.drivers[1].quit_called)
+
+    def test_unhealthy_and_failed_drivers_replaced(self) -> None:
+        with self.pool.driver() as driver:
+            driver.alive = False
+        with self.pool.driver() as driver:
+            self.assertIsNot(driver, self.drivers[0])
+        with self.assertRaises(RuntimeError):
+            with self.pool.driver():
+                raise RuntimeError("upload failed")
+
+        self.assertTrue(self.drivers[1].quit_called)
+        with self.pool.driver():
+            pass
+        self.assertEqual(self.pool.get_drivers_started(), 3)
+
+    def test_uploads_share_a_warm_driver_without_sleeping(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        video = os.path.join(directory.name, "edited.mp4")
+        with open(video, "wb") as f:
+            f.write(VIDEO_BYTES)
+
+        with patch.object(clip_uploader.time, "sleep",
+                          side_effect=AssertionError("fixed sleep")):
+            for _ in range(2):
+                uploader = YouTubeUploader(video_title="ace",
+                                           game_title="valorant",
+                                           driver_pool=self.pool)
+                link = uploader.upload_to_youtube(video)
+                self.drivers[0].elements.clear()
+
+        self.assertEqual(link, "https://youtube.com/shorts/abc")
+        self.assertEqual(self.pool.get_drivers_started(), 1)
+        self.assertEqual(list(uploader.get_step_times()),
+                         ["open YouTube", "open upload dialog", "select file",
+                          "title and description", "visibility", "publish"])
+
+
+if __name__ == "__main__":
+    unittest.main()
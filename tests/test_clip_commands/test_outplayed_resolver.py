@@ -0,0 +1,105 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from taquitobot.clip_commands.clip_downloader import outplayed_resolver
+from taquitobot.clip_commands.clip_downloader.clip_downloader_exceptions import DownloadException
+from taquitobot.clip_commands.clip_downloader.outplayed_resolver import OutplayedResolver
+
+PAGE_HEAD = (b"<html><head><title>Ace clutch #League of Legends | Outplayed"
+             b"</title></head><body><video src=\"https://cdn.test/clip.mp4\">"
+             b"</video>")
+PAGE_TAIL = b"<div>" + b"x" * 1024 * 1024 + b"</div></body></html>"
+
+
+class OutplayedPageHandler(BaseHTTPRequestHandler):
+    """
+    Serves an outplayed.tv like page, the path /novideo serves a page without
+    a video tag.
+    """
+    requests_seen = []
+
+    def do_GET(self):
+        type(self).requests_seen.append(self.path)
+        body = PAGE_HEAD + PAGE_TAIL
+        if self.path == "/novideo":
+            body = b"<html><head><title>Nothing</title></head></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestOutplayedResolver(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.handler = type("Handler", (OutplayedPageHandler,),
+                            {"requests_seen": []})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/media/clip"
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_resolve_page(self) -> None:
+        resolver = OutplayedResolver()
+        mp4_link, game_title = resolver.resolve(self.url)
+
+        self.assertEqual(mp4_link, "https://cdn.test/clip.mp4")
+        self.assertEqual(game_title, "LeagueofLegends")
+
+    def test_stops_reading_after_tags(self) -> None:
+        chunks_read = []
+
+        def chunks():
+            for chunk in (PAGE_HEAD, PAGE_TAIL, PAGE_TAIL):
+                chunks_read.append(chunk)
+                yield chunk
+
+        video_src, title = OutplayedResolver()._parse(chunks=chunks(),
+                                                      encoding="utf-8")
+
+        self.assertEqual(video_src, "https://cdn.test/clip.mp4")
+        self.assertEqual(title, "Ace clutch #League of Legends | Outplayed")
+        self.assertEqual(chunks_read, [PAGE_HEAD])
+
+    def test_game_title_fallback(self) -> None:
+        resolver = OutplayedResolver()
+
+        self.assertEqual(resolver._parse_game_title("Clip | Outplayed"),
+                         outplayed_resolver.DEFAULT_GAME_TITLE)
+        self.assertEqual(resolver._parse_game_title(""),
+                         outplayed_resolver.DEFAULT_GAME_TITLE)
+
+    def test_cached_until_expired(self) -> None:
+        resolver = OutplayedResolver(ttl=60)
+        with patch.object(outplayed_resolver.time, "monotonic",
+                          return_value=1000):
+            first = resolver.resolve(self.url)
+            second = resolver.resolve(self.url)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.handler.requests_seen), 1)
+        self.assertEqual(resolver.get_requests_made(), 1)
+
+        with patch.object(outplayed_resolver.time, "monotonic",
+                          return_value=1061):
+            resolver.resolve(self.url)
+        self.assertEqual(len(self.handler.requests_seen), 2)
+
+    def test_page_without_video(self) -> None:
+        resolver = OutplayedResolver()
+        with self.assertRaises(DownloadException):
+            resolver.resolve(self.url.replace("/media/clip", "/novideo"))
+
+
+if __name__ == "__main__":
+    unittest.main()
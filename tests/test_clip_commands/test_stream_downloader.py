@@ -0,0 +1,129 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from taquitobot.clip_commands.clip_downloader.clip_downloader_exceptions import DownloadException
+from taquitobot.clip_commands.clip_downloader.clip_stream import ClipStream
+from taquitobot.clip_commands.clip_downloader.stream_downloader import StreamDownloader
+
+CLIP_BYTES = os.urandom(3 * 1024 * 1024 + 123)
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves CLIP_BYTES with Range support, the first body response can be cut
+    short to simulate a broken transfer.
+    """
+    server_version = "TestServer"
+    supports_ranges = True
+    drop_after = None
+    requests_seen = []
+
+    def do_GET(self):
+        handler = type(self)
+        start, end = 0, len(CLIP_BYTES) - 1
+        range_header = self.headers.get("Range")
+        handler.requests_seen.append(range_header)
+        if range_header and handler.supports_ranges:
+            first, _, last = range_header.removeprefix("bytes=").partition("-")
+            start = int(first)
+            end = int(last) if last else end
+            self.send_response(206)
+            self.send_header("Content-Range",
+                             f"bytes {start}-{end}/{len(CLIP_BYTES)}")
+        else:
+            self.send_response(200)
+        body = CLIP_BYTES[start:end + 1]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if handler.drop_after is not None and len(body) > 1:
+            self.wfile.write(body[:handler.drop_after])
+            handler.drop_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestStreamDownloader(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.handler = type("Handler", (RangeRequestHandler,),
+                            {"requests_seen": []})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/clip.mp4"
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, "clip.mp4")
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def _download(self, **kwargs) -> str:
+        downloader = StreamDownloader(url=self.url, file_name=self.file_name,
+                                      chunk_size=64 * 1024, **kwargs)
+        return asyncio.run(downloader.download())
+
+    def _read_download(self) -> bytes:
+        with open(self.file_name, "rb") as f:
+            return f.read()
+
+    def test_single_stream_download(self) -> None:
+        output = self._download()
+
+        self.assertEqual(output, self.file_name)
+        self.assertEqual(self._read_download(), CLIP_BYTES)
+        self.assertFalse(os.path.exists(self.file_name + ".part"))
+        self.assertFalse(os.path.exists(self.file_name + ".part.json"))
+
+    def test_parallel_segments(self) -> None:
+        self._download(segment_threshold=1024 * 1024, max_segments=4)
+
+        self.assertEqual(self._read_download(), CLIP_BYTES)
+        segment_requests = [r for r in self.handler.requests_seen
+                            if r != "bytes=0-0"]
+        self.assertEqual(len(segment_requests), 4)
+
+    def test_resume_after_interruption(self) -> None:
+        self.handler.drop_after = 1024 * 1024
+        self._download()
+
+        self.assertEqual(self._read_download(), CLIP_BYTES)
+        self.assertIn("bytes=1048576-3145850", self.handler.requests_seen)
+
+    def test_restart_without_range_support(self) -> None:
+        self.handler.supports_ranges = False
+        self.handler.drop_after = 1024 * 1024
+        self._download()
+
+        self.assertEqual(self._read_download(), CLIP_BYTES)
+
+    def test_read_while_downloading(self) -> None:
+        self.handler.drop_after = 1024 * 1024
+        video_stream = ClipStream(file_name=self.file_name)
+
+        def download():
+            self._download(segment_threshold=1024 * 1024,
+                           progress=video_stream.progress)
+            video_stream.finish()
+
+        threading.Thread(target=download).start()
+        streamed = b"".join(video_stream.chunks())
+
+        self.assertEqual(streamed, CLIP_BYTES)
+        self.assertEqual(video_stream.wait(), self.file_name)
+        self.assertEqual(self.handler.requests_seen,
+                         ["bytes=0-0", "bytes=0-3145850",
+                          "bytes=1048576-3145850"])
+        self.assertFalse(video_stream.is_streamable())
+
+
+if __name__ == "__main__":
+    unittest.main()
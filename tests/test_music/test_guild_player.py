@@ -0,0 +1,131 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+from taquitobot.music_commands.guild_player import GuildPlayer, IDLE_TIMEOUT
+from taquitobot.music_commands.music_commands import MusicPlayer
+from taquitobot.music_commands.my_youtube import youtube_requests
+
+
+async def fetch_song(song_name):
+    return {'entries': [{'title': song_name,
+                         'url': f'https://youtube.com/{song_name}'}]}
+
+
+class TestGuildPlayers(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.bot = Mock()
+        self.music_player = MusicPlayer(self.bot)
+
+    def make_ctx(self, guild_id: int, content: str) -> Mock:
+        ctx = Mock()
+        ctx.guild.id = guild_id
+        ctx.message.content = content
+        ctx.send = AsyncMock()
+        ctx.voice_client = None
+        ctx.message.author = ctx.author
+        ctx.author.guild = ctx.guild
+
+        async def connect():
+            ctx.voice_client = Mock(**{"is_playing.return_value": True,
+                                       "is_paused.return_value": False,
+                                       "move_to": AsyncMock()})
+            return ctx.voice_client
+
+        ctx.author.voice.channel.connect = connect
+        return ctx
+
+    @patch('taquitobot.music_commands.music_commands.fetch_song', fetch_song)
+    @patch('discord.FFmpegOpusAudio')
+    async def test_guilds_have_their_own_queue(self, mock_audio) -> None:
+        first = self.make_ctx(1, '$play first song')
+        second = self.make_ctx(2, '$play second song')
+
+        for ctx in (first, second, first):
+            await MusicPlayer.play(self.music_player, ctx)
+
+        first_player = self.music_player.get_player(1)
+        second_player = self.music_player.get_player(2)
+        self.assertEqual(first_player.get_current_song(), 'first song')
+        self.assertEqual(first_player.get_titles(), ['first song'])
+        self.assertEqual(second_player.get_current_song(), 'second song')
+        self.assertEqual(second_player.get_titles(), [])
+        self.assertIsNot(first_player.get_voice(), second_player.get_voice())
+
+        await MusicPlayer.skip(self.music_player, second)
+        second_player.get_voice().stop.assert_called_once()
+        first_player.get_voice().stop.assert_not_called()
+
+    def test_idle_players_collected(self) -> None:
+        player = GuildPlayer(self.bot, 1)
+        self.assertFalse(player.is_idle(now=player._last_active))
+        self.assertTrue(player.is_idle(now=player._last_active + IDLE_TIMEOUT))
+        player.add_song('song', 'https://youtube.com/song')
+        self.assertFalse(player.is_idle(now=player._last_active + IDLE_TIMEOUT))
+
+        self.music_player._player(self.make_ctx(1, '$queue'))
+        self.music_player.get_player(1)._last_active -= IDLE_TIMEOUT
+        self.music_player._player(self.make_ctx(2, '$queue'))
+        self.assertIsNone(self.music_player.get_player(1))
+        self.assertEqual(self.music_player.get_player_count(), 1)
+
+    @patch('discord.FFmpegOpusAudio')
+    async def test_fetch_cancelled_when_member_leaves(self, mock_audio) -> None:
+        started = asyncio.Event()
+
+        async def slow_fetch_song(song_name):
+            started.set()
+            await asyncio.sleep(10)
+
+        ctx = self.make_ctx(1, '$play slow song')
+        with patch('taquitobot.music_commands.music_commands.fetch_song',
+                   slow_fetch_song):
+            play = asyncio.create_task(MusicPlayer.play(self.music_player, ctx))
+            await started.wait()
+            await self.music_player.on_voice_state_update(
+                ctx.author, Mock(channel=Mock()), Mock(channel=None))
+            await asyncio.wait_for(play, 1)
+
+        ctx.send.assert_called_with('Cancelled request for slow song.')
+        self.assertEqual(self.music_player.get_player(1).get_titles(), [])
+
+
+class TestFetchSong(unittest.IsolatedAsyncioTestCase):
+
+    class YoutubeDL:
+
+        def __init__(self, *_, **__) -> None:
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info) -> None:
+            pass
+
+        def extract_info(self, query, **_) -> dict:
+            time.sleep(0.3)
+            return {'entries': [{'title': query, 'url': query}]}
+
+    async def test_searches_run_in_parallel_off_the_loop(self) -> None:
+        with patch.object(youtube_requests.yt_dlp, 'YoutubeDL', self.YoutubeDL):
+            start = time.monotonic()
+            results = await asyncio.gather(
+                *(youtube_requests.fetch_song(f'song {n}') for n in range(3)))
+            elapsed = time.monotonic() - start
+
+        self.assertEqual([result['entries'][0]['title'] for result in results],
+                         [f'ytsearch:song {n}' for n in range(3)])
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(youtube_requests.get_fetch_depth(),
+                         {'queued': 0, 'running': 0})
+
+    async def test_search_times_out(self) -> None:
+        with patch.object(youtube_requests.yt_dlp, 'YoutubeDL', self.YoutubeDL):
+            with self.assertRaises(youtube_requests.SongException):
+                await youtube_requests.fetch_song('song', timeout=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()